@@ -4,7 +4,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.core.orm import Base
-from app.models import users, items, counts
+from app.models import locations, users, items, counts, inventory, jobs, ratelimit, outbox
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -17,7 +17,7 @@ if config.config_file_name is not None:
 
 
 from app.core.db import DATABASE_URL        # <-- import your real URL
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))   # configparser interpolation
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -49,6 +49,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -69,8 +70,12 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # One transaction per revision: an autocommit_block() (CREATE INDEX
+        # CONCURRENTLY, batched backfills; see app.core.migration_ops) then
+        # only commits its own revision's earlier steps
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
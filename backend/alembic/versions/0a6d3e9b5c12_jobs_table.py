@@ -0,0 +1,63 @@
+"""jobs table for the background job runner
+
+Revision ID: 0a6d3e9b5c12
+Revises: f4a8c2d61b07
+Create Date: 2025-10-22 15:37:09.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d3e9b5c12'
+down_revision: Union[str, Sequence[str], None] = 'f4a8c2d61b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=60), nullable=False),
+    sa.Column('params', postgresql.JSONB(), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('status', sa.Enum('queued', 'running', 'succeeded', 'failed', name='job_status'),
+              server_default='queued', nullable=False),
+    sa.Column('progress', sa.Float(), server_default='0', nullable=False),
+    sa.Column('message', sa.String(length=200), nullable=True),
+    sa.Column('result', postgresql.JSONB(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('output', sa.LargeBinary(), nullable=True),
+    sa.Column('output_type', sa.String(length=100), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('worker', sa.String(length=80), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('run_after', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id']),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id']),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_jobs_queued', 'jobs', ['run_after', 'id'],
+                    postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_jobs_running_heartbeat', 'jobs', ['heartbeat_at'],
+                    postgresql_where=sa.text("status = 'running'"))
+    op.create_index('ix_jobs_location_created', 'jobs', ['location_id', sa.text('created_at DESC')])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_location_created', table_name='jobs')
+    op.drop_index('ix_jobs_running_heartbeat', table_name='jobs')
+    op.drop_index('ix_jobs_queued', table_name='jobs')
+    op.drop_table('jobs')
+    op.execute("DROP TYPE job_status")
@@ -14,22 +14,31 @@ down_revision = "5b4e5d75bb0e"   # <-- keep this; it comes after your enum migra
 branch_labels = None
 depends_on = None
 
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
 def upgrade():
+    # ece16dee6db8 now adds both columns; only databases migrated before it
+    # did still need them here. Skipping when present lets a fresh database
+    # run the whole chain.
+
     # Add items.current_qty if missing
-    op.add_column(
-        "items",
-        sa.Column("current_qty", sa.Integer(), nullable=False, server_default="0"),
-    )
+    if not _has_column("items", "current_qty"):
+        op.add_column(
+            "items",
+            sa.Column("current_qty", sa.Integer(), nullable=False, server_default="0"),
+        )
+        # Drop server_default so future inserts use ORM default
+        op.alter_column("items", "current_qty", server_default=None)
 
     # Add counts.approved_count if missing
-    op.add_column(
-        "counts",
-        sa.Column("approved_count", sa.Integer(), nullable=True),
-    )
-
-    # Drop server_default so future inserts use ORM default
-    op.alter_column("items", "current_qty", server_default=None)
+    if not _has_column("counts", "approved_count"):
+        op.add_column(
+            "counts",
+            sa.Column("approved_count", sa.Integer(), nullable=True),
+        )
 
 def downgrade():
-    op.drop_column("counts", "approved_count")
-    op.drop_column("items", "current_qty")
+    # Nothing: ece16dee6db8's downgrade drops both columns
+    pass
@@ -0,0 +1,36 @@
+"""counts (item_id, submitted_at desc, id desc) index for item history
+
+Revision ID: 3d9f6a2c8e15
+Revises: b7e4c1f9a3d6
+Create Date: 2025-10-24 09:12:37.604518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9f6a2c8e15'
+down_revision: Union[str, Sequence[str], None] = 'b7e4c1f9a3d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /items/{id}/history: keyset pages on (submitted_at, id); status and
+    # approved_count ride along for the variance seed lookup
+    create_index_concurrently(
+        'ix_counts_item_submitted', 'counts',
+        ['item_id', sa.text('submitted_at DESC'), sa.text('id DESC')],
+        postgresql_include=['status', 'approved_count'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_counts_item_submitted', 'counts')
@@ -0,0 +1,39 @@
+"""items: unique index on lower(name)
+
+Revision ID: 7c2d9a41e5b3
+Revises: 3a014ed63d93
+Create Date: 2025-10-20 10:12:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d9a41e5b3'
+down_revision: Union[str, Sequence[str], None] = '3a014ed63d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NOTE: fails if rows already differ only by case ("Tomatoes" vs "tomatoes").
+    # Rename/merge those first:
+    #   SELECT lower(name), array_agg(id) FROM items GROUP BY 1 HAVING count(*) > 1;
+    op.create_index(
+        "ux_items_name_lower",
+        "items",
+        [sa.text("lower(name)")],
+        unique=True,
+    )
+    # The case-sensitive unique index is now redundant
+    op.drop_index("ix_items_name", table_name="items")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_items_name", "items", ["name"], unique=True)
+    op.drop_index("ux_items_name_lower", table_name="items")
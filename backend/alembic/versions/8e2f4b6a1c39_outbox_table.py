@@ -0,0 +1,51 @@
+"""outbox table for transactional notifications
+
+Revision ID: 8e2f4b6a1c39
+Revises: 3d9f6a2c8e15
+Create Date: 2025-10-27 10:04:51.227613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2f4b6a1c39'
+down_revision: Union[str, Sequence[str], None] = '3d9f6a2c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New and empty: plain DDL, nothing for migration_ops to protect
+    op.create_table('outbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=60), nullable=False),
+    sa.Column('payload', postgresql.JSONB(), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'delivered', 'dead', name='outbox_status'),
+              server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id']),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_outbox_pending', 'outbox', ['available_at', 'id'],
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_outbox_delivered_at', 'outbox', ['delivered_at'],
+                    postgresql_where=sa.text("status = 'delivered'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_delivered_at', table_name='outbox')
+    op.drop_index('ix_outbox_pending', table_name='outbox')
+    op.drop_table('outbox')
+    op.execute("DROP TYPE outbox_status")
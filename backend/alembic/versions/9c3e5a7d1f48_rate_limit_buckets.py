@@ -0,0 +1,34 @@
+"""rate limit buckets (shared token buckets)
+
+Revision ID: 9c3e5a7d1f48
+Revises: 0a6d3e9b5c12
+Create Date: 2025-10-23 10:12:44.502113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5a7d1f48'
+down_revision: Union[str, Sequence[str], None] = '0a6d3e9b5c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,61 @@
+"""items.is_below_par generated column + low-stock partial indexes
+
+Revision ID: a41f0c7e2b96
+Revises: 7c2d9a41e5b3
+Create Date: 2025-10-20 14:37:05.219804
+
+Blocking: adding a STORED generated column rewrites items under an ACCESS
+EXCLUSIVE lock (every read and write of items waits for the whole rewrite),
+and the two indexes are built inside the same lock. There is no online form
+of a generated column; on a large items table run this in a maintenance
+window, or replace it with the migration_ops route (plain column + trigger,
+backfill(), set_not_null(), create_index_concurrently()).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f0c7e2b96'
+down_revision: Union[str, Sequence[str], None] = '7c2d9a41e5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOW_STOCK_WHERE = sa.text("is_active AND is_below_par")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated column: Postgres keeps it in sync on every UPDATE of
+    # current_qty/par_level (approvals, par edits), so nothing to maintain by hand.
+    # Rewrites the table under an exclusive lock; see the module docstring.
+    op.add_column(
+        "items",
+        sa.Column(
+            "is_below_par",
+            sa.Boolean(),
+            sa.Computed("current_qty < par_level", persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_items_low_stock_name",
+        "items",
+        ["name", "id"],
+        postgresql_where=LOW_STOCK_WHERE,
+    )
+    op.create_index(
+        "ix_items_low_stock_deficit",
+        "items",
+        [sa.text("(par_level - current_qty) DESC"), "id"],
+        postgresql_where=LOW_STOCK_WHERE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_items_low_stock_deficit", table_name="items")
+    op.drop_index("ix_items_low_stock_name", table_name="items")
+    op.drop_column("items", "is_below_par")
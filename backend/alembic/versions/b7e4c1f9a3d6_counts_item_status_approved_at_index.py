@@ -0,0 +1,38 @@
+"""counts (item_id, status, approved_at desc) covering index for the count sheet; drop ix_counts_item_id
+
+Revision ID: b7e4c1f9a3d6
+Revises: 9c3e5a7d1f48
+Create Date: 2025-10-23 15:40:18.227319
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4c1f9a3d6'
+down_revision: Union[str, Sequence[str], None] = '9c3e5a7d1f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /counts/sheet: per-item last approved / pending lookups as index-only scans
+    create_index_concurrently(
+        'ix_counts_item_status_approved_at', 'counts',
+        ['item_id', 'status', sa.text('approved_at DESC')],
+        postgresql_include=['id', 'approved_count'],
+    )
+    # Redundant now: the new index leads with item_id
+    drop_index_concurrently('ix_counts_item_id', 'counts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    create_index_concurrently('ix_counts_item_id', 'counts', ['item_id'])
+    drop_index_concurrently('ix_counts_item_status_approved_at', 'counts')
@@ -0,0 +1,96 @@
+"""locations + location_id on items/users/counts, location-scoped indexes
+
+Revision ID: d5e8b3c17a20
+Revises: a41f0c7e2b96
+Create Date: 2025-10-21 09:48:22.615730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migration_ops import (
+    add_foreign_key_not_valid, backfill, create_index_concurrently, ddl, drop_index_concurrently,
+    set_not_null, validate_constraint,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8b3c17a20'
+down_revision: Union[str, Sequence[str], None] = 'a41f0c7e2b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOW_STOCK_WHERE = sa.text("is_active AND is_below_par")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('locations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=40), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    )
+    # Existing single-store data becomes location 1 (DEFAULT_LOCATION_ID)
+    op.execute("INSERT INTO locations (id, code, name, is_active) VALUES (1, 'default', 'Default', true)")
+    op.execute("SELECT setval(pg_get_serial_sequence('locations', 'id'), 1)")
+
+    # Expand: nullable column, FK enforced for new writes only
+    for table in ("items", "users", "counts"):
+        ddl(f"ALTER TABLE {table} ADD COLUMN location_id integer")
+        add_foreign_key_not_valid(f'{table}_location_id_fkey', table, 'locations', ['location_id'], ['id'])
+    op.create_index('ix_users_location_id', 'users', ['location_id'])
+
+    # items: names unique per location; low-stock indexes scoped by location
+    op.drop_index('ux_items_name_lower', table_name='items')
+    op.create_index('ux_items_location_name_lower', 'items',
+                    ['location_id', sa.text('lower(name)')], unique=True)
+    op.drop_index('ix_items_low_stock_name', table_name='items')
+    op.drop_index('ix_items_low_stock_deficit', table_name='items')
+    op.create_index('ix_items_low_stock_name', 'items', ['location_id', 'name', 'id'],
+                    postgresql_where=LOW_STOCK_WHERE)
+    op.create_index('ix_items_low_stock_deficit', 'items',
+                    ['location_id', sa.text('(par_level - current_qty) DESC'), 'id'],
+                    postgresql_where=LOW_STOCK_WHERE)
+
+    # Everything below commits as it goes (migration_ops), so it comes last and
+    # is safe to rerun. Backfill in batches, then tighten without long locks.
+    for table in ("items", "users", "counts"):
+        backfill(table, "location_id = 1", "location_id IS NULL")
+        validate_constraint(table, f'{table}_location_id_fkey')
+        set_not_null(table, 'location_id')
+
+    # counts: per-location review queue / listings, newest first
+    create_index_concurrently('ix_counts_location_status_submitted', 'counts',
+                              ['location_id', 'status', sa.text('submitted_at DESC')])
+    create_index_concurrently('ix_counts_location_submitted', 'counts',
+                              ['location_id', sa.text('submitted_at DESC')])
+    drop_index_concurrently('ix_counts_status', 'counts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    create_index_concurrently('ix_counts_status', 'counts', ['status'])
+    drop_index_concurrently('ix_counts_location_submitted', 'counts')
+    drop_index_concurrently('ix_counts_location_status_submitted', 'counts')
+
+    op.drop_index('ix_items_low_stock_deficit', table_name='items')
+    op.drop_index('ix_items_low_stock_name', table_name='items')
+    op.create_index('ix_items_low_stock_name', 'items', ['name', 'id'],
+                    postgresql_where=LOW_STOCK_WHERE)
+    op.create_index('ix_items_low_stock_deficit', 'items',
+                    [sa.text('(par_level - current_qty) DESC'), 'id'],
+                    postgresql_where=LOW_STOCK_WHERE)
+    # NOTE: fails if two locations share an item name
+    op.drop_index('ux_items_location_name_lower', table_name='items')
+    op.create_index('ux_items_name_lower', 'items', [sa.text('lower(name)')], unique=True)
+
+    op.drop_index('ix_users_location_id', table_name='users')
+    for table in ("counts", "users", "items"):
+        op.drop_constraint(f'{table}_location_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'location_id')
+    op.drop_table('locations')
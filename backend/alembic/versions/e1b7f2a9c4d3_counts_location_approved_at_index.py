@@ -0,0 +1,31 @@
+"""counts (location_id, approved_at) index for dashboard summary
+
+Revision ID: e1b7f2a9c4d3
+Revises: d5e8b3c17a20
+Create Date: 2025-10-21 16:05:51.344092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.migration_ops import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7f2a9c4d3'
+down_revision: Union[str, Sequence[str], None] = 'd5e8b3c17a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "reviewed today" range scan for /dash/summary
+    create_index_concurrently('ix_counts_location_approved_at', 'counts', ['location_id', 'approved_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_counts_location_approved_at', 'counts')
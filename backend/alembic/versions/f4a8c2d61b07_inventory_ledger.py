@@ -0,0 +1,90 @@
+"""inventory_movements ledger + inventory_snapshots checkpoints
+
+Revision ID: f4a8c2d61b07
+Revises: e1b7f2a9c4d3
+Create Date: 2025-10-22 10:14:37.508126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8c2d61b07'
+down_revision: Union[str, Sequence[str], None] = 'e1b7f2a9c4d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inventory_movements',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.Enum('opening', 'count', 'delivery', 'waste', 'adjustment', name='movement_kind'), nullable=False),
+    sa.Column('is_reset', sa.Boolean(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('count_id', sa.Integer(), nullable=True),
+    sa.Column('recorded_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id']),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id']),
+    sa.ForeignKeyConstraint(['count_id'], ['counts.id']),
+    sa.ForeignKeyConstraint(['recorded_by'], ['users.id']),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table('inventory_snapshots',
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('qty', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id']),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id']),
+    sa.PrimaryKeyConstraint('item_id', 'taken_at'),
+    )
+
+    # Backfill: approved counts become resets at the time they were taken, then
+    # today's current_qty becomes the opening balance, so as-of reads agree with
+    # the old column from here on and use count history before it. The opening
+    # is dated no later than the item's oldest pending count: when approved, that
+    # count is recorded at its submitted_at and must still set the stock (a tie
+    # goes to the later movement id).
+    op.execute("""
+        INSERT INTO inventory_movements
+            (location_id, item_id, kind, is_reset, quantity, occurred_at, recorded_at, count_id, recorded_by)
+        SELECT location_id, item_id, 'count', true, approved_count, submitted_at,
+               coalesce(approved_at, submitted_at), id, approved_by
+        FROM counts
+        WHERE status = 'approved' AND approved_count IS NOT NULL
+    """)
+    op.execute("""
+        INSERT INTO inventory_movements
+            (location_id, item_id, kind, is_reset, quantity, occurred_at, recorded_at)
+        SELECT i.location_id, i.id, 'opening', true, i.current_qty,
+               least(now(), (SELECT min(c.submitted_at) FROM counts c
+                             WHERE c.item_id = i.id AND c.status = 'pending')),
+               now()
+        FROM items i
+    """)
+
+    # Indexes after the bulk insert
+    op.create_index('ix_movements_item_occurred', 'inventory_movements', ['item_id', 'occurred_at'])
+    op.create_index('ix_movements_item_reset_occurred', 'inventory_movements',
+                    ['item_id', sa.text('occurred_at DESC')], postgresql_where=sa.text('is_reset'))
+    op.create_index('ix_movements_location_occurred', 'inventory_movements', ['location_id', 'occurred_at'])
+    op.create_index('ix_snapshots_location_taken', 'inventory_snapshots', ['location_id', 'taken_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_snapshots_location_taken', table_name='inventory_snapshots')
+    op.drop_index('ix_movements_location_occurred', table_name='inventory_movements')
+    op.drop_index('ix_movements_item_reset_occurred', table_name='inventory_movements')
+    op.drop_index('ix_movements_item_occurred', table_name='inventory_movements')
+    op.drop_table('inventory_snapshots')
+    op.drop_table('inventory_movements')
+    op.execute("DROP TYPE movement_kind")
@@ -0,0 +1,97 @@
+# app/core/cache.py
+"""
+Small in-process TTL cache with single-flight recomputation.
+
+When a key expires under load, only one caller recomputes it; concurrent
+callers for the same key wait for that result instead of stampeding the DB.
+A value whose computation overlapped an invalidation of its key is returned
+to its caller but not cached.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, name: str = "") -> None:
+        self.ttl = ttl_seconds
+        self.name = name
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}   # key -> (expires_at, value)
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._generations: Dict[Hashable, int] = {}   # per key, bumped by invalidation
+        self._epoch = 0                                 # bumped by invalidate() of everything
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        with self._key_lock(key):
+            # Someone else may have refreshed it while we waited
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            with self._guard:
+                started = self._generation(key)
+            value = compute()
+            self.computes += 1
+            with self._guard:
+                if self._generation(key) == started:
+                    self._data[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        # Caller holds the guard
+        return self._epoch, self._generations.get(key, 0)
+
+    def _bump(self, key: Hashable) -> None:
+        # Caller holds the guard
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when key is None."""
+        with self._guard:
+            if key is None:
+                self._data = {}
+                self._epoch += 1
+            else:
+                self._data.pop(key, None)
+                self._bump(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every key the predicate matches, including ones being computed."""
+        with self._guard:
+            self._data = {k: v for k, v in self._data.items() if not predicate(k)}
+            for key in self._locks:
+                if predicate(key):
+                    self._bump(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "computes": self.computes,
+        }
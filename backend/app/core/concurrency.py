@@ -0,0 +1,241 @@
+# app/core/concurrency.py
+"""
+Per-route-class concurrency limits with bounded queues (load shedding).
+
+Sync handlers all share AnyIO's thread pool and the DB pool, so under
+overload every request just queues there and everything gets slow. This
+middleware admits at most LIMIT requests per route class at once; up to
+QUEUE more wait (at most TIMEOUT seconds) and anything beyond that, or
+still waiting at the deadline, gets an immediate 503 with Retry-After.
+
+    CONCURRENCY_<CLASS>=LIMIT/QUEUE/TIMEOUT     e.g. CONCURRENCY_BULK=2/4/1
+
+Classes (classify()): auth (login: bcrypt), write (POST/PUT/DELETE),
+read (GET, plus body-carrying reads like /items/batch-get), bulk (CSV import/export, job output downloads). Probes and
+/metrics are never limited.
+
+Adaptive mode (CONCURRENCY_ADAPTIVE=1): the middleware sits inside
+MetricsMiddleware and reads each request's DB time per statement from the
+same holder. When the recent average rises above CONCURRENCY_ADAPT_TOLERANCE × a slowly
+drifting baseline, the limits of the sheddable classes (read, bulk) are cut
+multiplicatively; while it's healthy they grow back by one per interval up
+to their configured LIMIT. auth and write keep their fixed budgets, so
+approvals stay responsive while an export saturates the database.
+
+All state lives on the event loop thread; no locks.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+
+ADAPT_INTERVAL_SEC = 1.0
+ADAPT_DECREASE = 0.75
+ADAPT_MIN_LIMIT = 1
+EWMA_ALPHA = 0.2
+BASELINE_DRIFT = 1.01          # per interval: the baseline follows a real slowdown within a minute or so
+
+EXEMPT_PATHS = {"/", "/livez", "/readyz", "/health", "/metrics", "/docs", "/redoc", "/openapi.json",
+                "/docs/oauth2-redirect"}
+BULK_PATHS = {"/items/export", "/items/import"}
+READ_POSTS = {"/items/batch-get"}      # POST only because the id list is a body
+
+concurrency_limit = registry.register(Gauge(
+    "pantrypal_concurrency_limit", "Current concurrency limit per route class.", ("class",)))
+concurrency_in_flight = registry.register(Gauge(
+    "pantrypal_concurrency_in_flight", "Requests admitted and running, per route class.", ("class",)))
+concurrency_queued = registry.register(Gauge(
+    "pantrypal_concurrency_queued", "Requests waiting for a slot, per route class.", ("class",)))
+shed = registry.register(Counter(
+    "pantrypal_shed_total", "Requests refused with 503 by the concurrency limiter.", ("class", "reason")))
+
+
+class ClassBudget(NamedTuple):
+    limit: int
+    queue: int
+    timeout: float
+    adaptive: bool
+
+
+# Classes the adaptive mode may cut; auth and write keep their budgets
+ADAPTIVE_CLASSES = {"read", "bulk"}
+
+
+def parse_budget(spec: str, adaptive: bool) -> ClassBudget:
+    """'12/48/2' -> ClassBudget(12, 48, 2.0, adaptive)."""
+    try:
+        limit, queue, timeout = spec.strip().split("/")
+        budget = ClassBudget(int(limit), int(queue), float(timeout), adaptive)
+    except ValueError:
+        raise ValueError(f"Bad concurrency budget {spec!r} (expected LIMIT/QUEUE/TIMEOUT)") from None
+    if budget.limit < 1 or budget.queue < 0 or budget.timeout < 0:
+        raise ValueError(f"Bad concurrency budget {spec!r}")
+    return budget
+
+
+def load_budgets() -> Dict[str, ClassBudget]:
+    """The budgets from settings (defaults: app.core.config.DEFAULT_CONCURRENCY_BUDGETS)."""
+    return {name: parse_budget(spec, name in ADAPTIVE_CLASSES) for name, spec in settings.concurrency_budgets}
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class for a request, or None if it is never limited."""
+    if method == "OPTIONS" or path in EXEMPT_PATHS:
+        return None
+    if path == "/auth/login":
+        return "auth"
+    if path in BULK_PATHS or (path.startswith("/jobs/") and path.endswith("/output")):
+        return "bulk"
+    if method in ("GET", "HEAD") or path in READ_POSTS:
+        return "read"
+    return "write"
+
+
+class Shed(Exception):
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+
+
+class _Gate:
+    def __init__(self, name: str, budget: ClassBudget) -> None:
+        self.name = name
+        self.budget = budget
+        self.limit = budget.limit
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        concurrency_limit.set(name, value=self.limit)
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            concurrency_in_flight.inc(self.name)
+            return
+        if len(self.waiters) >= self.budget.queue:
+            raise Shed("queue_full")
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        concurrency_queued.inc(self.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.budget.timeout)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                return            # the slot was handed over just as we timed out
+            raise Shed("timeout")
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()    # _admit() gave us a slot we'll never use: pass it on
+            raise
+        finally:
+            concurrency_queued.dec(self.name)
+            if not fut.done():
+                fut.cancel()
+            try:
+                self.waiters.remove(fut)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        concurrency_in_flight.dec(self.name)
+        self._admit()
+
+    def _admit(self) -> None:
+        # Hand free slots straight to waiters (in_flight moves with them)
+        while self.waiters and self.in_flight < self.limit:
+            fut = self.waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            concurrency_in_flight.inc(self.name)
+            fut.set_result(None)
+
+    def set_limit(self, limit: int) -> None:
+        limit = max(ADAPT_MIN_LIMIT, min(self.budget.limit, limit))
+        if limit != self.limit:
+            self.limit = limit
+            concurrency_limit.set(self.name, value=limit)
+            self._admit()
+
+
+class ConcurrencyLimiter:
+    def __init__(self, budgets: Dict[str, ClassBudget], adaptive: bool = True) -> None:
+        self.gates = {name: _Gate(name, b) for name, b in budgets.items()}
+        self.adaptive = adaptive
+        self.latency: Optional[float] = None      # EWMA of seconds per statement
+        self.baseline: Optional[float] = None
+        self._next_adjust = 0.0
+
+    def observe(self, db_seconds: float, statements: int) -> None:
+        if not self.adaptive or not statements:
+            return
+        sample = db_seconds / statements
+        self.latency = sample if self.latency is None else \
+            self.latency + EWMA_ALPHA * (sample - self.latency)
+        now = time.monotonic()
+        if now >= self._next_adjust:
+            self._next_adjust = now + ADAPT_INTERVAL_SEC
+            self._adjust()
+
+    def _adjust(self) -> None:
+        self.baseline = self.latency if self.baseline is None else \
+            min(self.baseline * BASELINE_DRIFT, self.latency)
+        overloaded = self.latency > self.baseline * settings.concurrency_adapt_tolerance
+        for gate in self.gates.values():
+            if not gate.budget.adaptive:
+                continue
+            if overloaded:
+                gate.set_limit(math.floor(gate.limit * ADAPT_DECREASE))
+            elif gate.limit < gate.budget.limit:
+                gate.set_limit(gate.limit + 1)
+
+    def snapshot(self) -> dict:
+        return {
+            "latency_per_statement_sec": self.latency,
+            "baseline_sec": self.baseline,
+            "classes": {n: {"limit": g.limit, "max": g.budget.limit, "in_flight": g.in_flight,
+                            "queued": len(g.waiters)} for n, g in self.gates.items()},
+        }
+
+
+_BUSY_BODY = json.dumps({"detail": "Server busy; retry shortly"}).encode()
+
+
+class ConcurrencyLimitMiddleware:
+    """Plain ASGI middleware; add it inside MetricsMiddleware so it can read DB time."""
+
+    def __init__(self, app, limiter: ConcurrencyLimiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gate = self.limiter.gates.get(classify(scope.get("method", ""), scope.get("path", "")))
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await gate.acquire()
+        except Shed as e:
+            shed.inc(gate.name, e.reason)
+            await send({"type": "http.response.start", "status": 503,
+                        "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1"),
+                                    (b"content-length", str(len(_BUSY_BODY)).encode())]})
+            await send({"type": "http.response.body", "body": _BUSY_BODY})
+            return
+
+        usage = metrics._db_usage.get()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+            if usage is not None:
+                self.limiter.observe(usage[0], usage[1])
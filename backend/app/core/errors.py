@@ -0,0 +1,25 @@
+# app/core/errors.py
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+# Postgres SQLSTATE for unique_violation
+UNIQUE_VIOLATION = "23505"
+
+
+def is_unique_violation(exc: IntegrityError, constraint: Optional[str] = None) -> bool:
+    """
+    True if `exc` is a unique-constraint violation (optionally on a specific
+    constraint/index name). Lets routers map DB-enforced uniqueness to 409
+    instead of pre-checking with an extra SELECT.
+    """
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "sqlite_errorname", None) == "SQLITE_CONSTRAINT_UNIQUE":
+        # SQLite names the index only in the message: "... failed: index 'name'"
+        return constraint is None or f"index '{constraint}'" in str(orig)
+    if getattr(orig, "sqlstate", None) != UNIQUE_VIOLATION:
+        return False
+    if constraint is None:
+        return True
+    diag = getattr(orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == constraint
@@ -0,0 +1,178 @@
+# app/core/health.py
+"""
+Background DB probe behind /readyz.
+
+Load-balancer probes must not touch the database themselves: a SELECT 1 per
+probe competes with requests for pool checkouts, and when the DB is down every
+probe hangs until the connect timeout. Instead one asyncio task refreshes a
+snapshot every HEALTH_PROBE_INTERVAL_SEC (the blocking part runs in a worker
+thread) and /readyz just reads it.
+
+The probe uses its own single-connection engine with a connect timeout, so it
+neither takes a slot from the app pool nor queues behind a saturated one.
+
+Pool saturation only fails readiness when READYZ_MAX_POOL_SATURATION is set
+and every probe for READYZ_POOL_SATURATED_SEC saw the pool at or above it: a
+burst that fills the pool for a moment shouldn't take the instance out of
+rotation (that sends its traffic to the others and saturates them too).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.db import DATABASE_URL, create_db_engine, engine as app_engine, is_sqlite_url
+from app.core.metrics import Gauge, registry
+
+log = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+db_up = registry.register(Gauge("pantrypal_db_up", "1 if the last background DB probe succeeded."))
+db_probe_latency = registry.register(Gauge(
+    "pantrypal_db_probe_latency_seconds", "Round trip of the last background DB probe."))
+db_pool_checked_out = registry.register(Gauge(
+    "pantrypal_db_pool_checked_out", "App pool connections checked out at the last probe."))
+db_pool_saturation = registry.register(Gauge(
+    "pantrypal_db_pool_saturation", "Checked-out share of the app pool (size + max overflow)."))
+
+
+def expected_heads() -> Optional[Set[str]]:
+    """Alembic head revision(s) shipped with this build; None if unavailable."""
+    try:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+        return set(ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads())
+    except Exception as e:  # migrations not shipped with this deployment
+        log.warning("health: cannot read alembic heads: %s", e)
+        return None
+
+
+def pool_stats(engine: Engine = app_engine) -> Dict[str, Any]:
+    pool = engine.pool
+    size = pool.size() if hasattr(pool, "size") else 0
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    capacity = size + max(max_overflow, 0)
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    return {
+        "size": size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class HealthProbe:
+    def __init__(self, url: str = DATABASE_URL, interval: float = settings.health_probe_interval_sec,
+                 timeout: int = settings.health_probe_timeout_sec) -> None:
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.heads: Optional[Set[str]] = None
+        self.state: Optional[Dict[str, Any]] = None   # None until the first probe lands
+        self._engine: Optional[Engine] = None
+        self._task: Optional[asyncio.Task] = None
+        self._saturated_since: Optional[float] = None   # monotonic time of the first saturated probe
+
+    def _probe_engine(self) -> Engine:
+        if self._engine is None:
+            if is_sqlite_url(self.url):     # a local file/memory: nothing to time out on
+                self._engine = create_db_engine(self.url, pool_size=1, max_overflow=0)
+            else:
+                self._engine = create_engine(
+                    self.url, pool_size=1, max_overflow=0, pool_pre_ping=True,
+                    connect_args={"connect_timeout": self.timeout},
+                )
+        return self._engine
+
+    def check(self) -> Dict[str, Any]:
+        """One blocking probe round; never raises."""
+        state: Dict[str, Any] = {
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "db": "ok",
+            "latency_ms": None,
+            "migrations": {"expected": sorted(self.heads) if self.heads else None, "current": None},
+            "pool": pool_stats(),
+        }
+        try:
+            started = time.perf_counter()
+            with self._probe_engine().connect() as conn:
+                conn.execute(text("SELECT 1"))
+                state["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                if not is_sqlite_url(self.url):     # SQLite has no migrations to check
+                    try:
+                        current = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+                        state["migrations"]["current"] = sorted(current)
+                    except Exception as e:
+                        state["migrations"]["error"] = str(e).splitlines()[0]
+        except Exception as e:
+            state["db"] = f"error: {str(e).splitlines()[0] if str(e) else type(e).__name__}"
+
+        db_up.set(value=1 if state["db"] == "ok" else 0)
+        if state["latency_ms"] is not None:
+            db_probe_latency.set(value=state["latency_ms"] / 1000)
+        db_pool_checked_out.set(value=state["pool"]["checked_out"])
+        db_pool_saturation.set(value=state["pool"]["saturation"])
+        limit = settings.readyz_max_pool_saturation
+        if limit > 0 and state["pool"]["saturation"] >= limit:
+            if self._saturated_since is None:
+                self._saturated_since = time.monotonic()
+        else:
+            self._saturated_since = None
+        return state
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cached verdict; reasons lists everything that keeps us out of rotation."""
+        state = self.state
+        if state is None:
+            return {"ready": False, "reasons": ["starting"], "probe": None}
+
+        reasons = []
+        age = (datetime.now(timezone.utc) - datetime.fromisoformat(state["checked_at"])).total_seconds()
+        if age > 3 * self.interval + self.timeout:
+            reasons.append(f"probe stale ({age:.0f}s)")
+        if state["db"] != "ok":
+            reasons.append("db unreachable")
+        migrations = state["migrations"]
+        if migrations["expected"] is not None and migrations["current"] != migrations["expected"]:
+            reasons.append("migrations not at head")
+        if self._saturated_since is not None:
+            saturated = time.monotonic() - self._saturated_since
+            if saturated >= settings.readyz_pool_saturated_sec:
+                reasons.append(f"db pool saturated ({saturated:.0f}s)")
+        return {"ready": not reasons, "reasons": reasons, "probe": {**state, "age_sec": round(age, 1)}}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.state = await asyncio.to_thread(self.check)
+            except Exception:  # keep probing whatever happens
+                log.exception("health: probe round failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            # SQLite schemas come from the models, not Alembic
+            self.heads = None if is_sqlite_url(self.url) else expected_heads()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="health-probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+
+health_probe = HealthProbe()
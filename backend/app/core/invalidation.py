@@ -0,0 +1,269 @@
+# app/core/invalidation.py
+"""
+Cross-worker cache invalidation bus.
+
+Every uvicorn worker keeps its own in-process caches (item catalog, forecasts,
+dashboard summaries), so a write handled by worker A leaves B's copies stale.
+Writers publish "table/location/key changed" events inside their transaction;
+every other worker receives them and evicts.
+
+    publish(db, "items", location_id, item_id)     # before db.commit()
+
+Events are queued on the Session and only leave on commit (dropped on
+rollback):
+
+- postgres (default): one pg_notify() per commit, sent from before_commit, so
+  the NOTIFY is part of the writer's transaction and delivered iff it commits.
+  Each worker LISTENs on a dedicated connection in a background thread; after a
+  reconnect it evicts everything, since events may have been missed.
+- memory: delivered after commit to every bus attached to the same MemoryHub;
+  for single-process runs and for simulating several workers in one process.
+  The default when DATABASE_URL isn't Postgres.
+
+Caches plug in by implementing handle_invalidation() and subscribing to the
+tables they derive from. The writing worker also delivers its own events, in
+process right after the commit, to every subscriber except the write-through
+ones (subscribe(..., write_through=True)), which updated themselves in the
+handler; events that come back over the wire from itself are ignored.
+"""
+import json
+import logging
+import threading
+import uuid
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Protocol, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "pantrypal_invalidate"
+NOTIFY_MAX_BYTES = 7000               # Postgres caps a payload at 8000 bytes
+RECONNECT_BACKOFF_SEC = (0.5, 1, 2, 5)
+_PENDING = "pantrypal_invalidations"  # Session.info keys
+_SENT = "pantrypal_invalidations_sent"
+
+invalidations = registry.register(Counter(
+    "pantrypal_invalidations_total", "Cache invalidation events by table and direction.",
+    ("table", "direction")))
+
+
+class InvalidationEvent(NamedTuple):
+    table: str
+    location_id: Optional[int] = None   # None = every location
+    key: Optional[Hashable] = None      # None = whole table (within the location)
+
+
+class InvalidationListener(Protocol):
+    """A cache that can evict in response to another worker's write."""
+
+    def handle_invalidation(self, event: InvalidationEvent) -> None: ...
+
+
+# ----- backends --------------------------------------------------------------
+
+class MemoryHub:
+    """Stands in for the database channel: fans events out to attached buses."""
+
+    def __init__(self) -> None:
+        self.buses: List["InvalidationBus"] = []
+
+    def deliver(self, origin: str, events: List[InvalidationEvent]) -> None:
+        for bus in list(self.buses):
+            bus.receive(origin, events)
+
+
+class MemoryBackend:
+    transactional = False
+
+    def __init__(self, hub: Optional[MemoryHub] = None) -> None:
+        self.hub = hub or MemoryHub()
+
+    def attach(self, bus: "InvalidationBus") -> None:
+        self.hub.buses.append(bus)
+
+    def send(self, origin: str, events: List[InvalidationEvent], session: Optional[Session] = None) -> None:
+        self.hub.deliver(origin, events)
+
+    def start(self, bus: "InvalidationBus") -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+def _encode(origin: str, events: List[InvalidationEvent]) -> List[str]:
+    """JSON payloads, split so none exceeds NOTIFY_MAX_BYTES."""
+    payloads, chunk, size = [], [], 0
+    for e in events:
+        item = [e.table, e.location_id, e.key]
+        n = len(json.dumps(item)) + 1
+        if chunk and size + n > NOTIFY_MAX_BYTES:
+            payloads.append(json.dumps({"o": origin, "e": chunk}))
+            chunk, size = [], 0
+        chunk.append(item)
+        size += n
+    if chunk:
+        payloads.append(json.dumps({"o": origin, "e": chunk}))
+    return payloads
+
+
+def _decode(payload: str) -> Tuple[str, List[InvalidationEvent]]:
+    data = json.loads(payload)
+    return data["o"], [InvalidationEvent(t, loc, key) for t, loc, key in data["e"]]
+
+
+class PostgresBackend:
+    transactional = True
+
+    def __init__(self, url: str = settings.database_url) -> None:
+        # libpq URI for the dedicated LISTEN connection (not from the app pool)
+        self.conninfo = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def attach(self, bus: "InvalidationBus") -> None:
+        pass
+
+    def send(self, origin: str, events: List[InvalidationEvent], session: Optional[Session] = None) -> None:
+        for payload in _encode(origin, events):
+            session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    def start(self, bus: "InvalidationBus") -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, args=(bus,), name="invalidation-listener",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self, bus: "InvalidationBus") -> None:
+        import psycopg
+
+        attempt, connected_before = 0, False
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    if connected_before:
+                        bus.evict_all()   # anything sent while we were away is lost
+                    connected_before, attempt = True, 0
+                    while not self._stop.is_set():
+                        for n in conn.notifies(timeout=1.0):
+                            bus.receive(*_decode(n.payload))
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                delay = RECONNECT_BACKOFF_SEC[min(attempt, len(RECONNECT_BACKOFF_SEC) - 1)]
+                log.warning("invalidation: listener connection lost (%s); retrying in %ss", e, delay)
+                attempt += 1
+                self._stop.wait(delay)
+
+
+# ----- bus -------------------------------------------------------------------
+
+class InvalidationBus:
+    def __init__(self, backend) -> None:
+        self.origin = uuid.uuid4().hex[:12]
+        self.backend = backend
+        self._listeners: Dict[str, List[Tuple[InvalidationListener, bool]]] = {}
+        backend.attach(self)
+
+    def subscribe(self, tables: Iterable[str], listener: InvalidationListener,
+                  write_through: bool = False) -> None:
+        """write_through: the writer updates this cache itself; skip its own events."""
+        for table in tables:
+            self._listeners.setdefault(table, []).append((listener, write_through))
+
+    def publish(self, db: Session, table: str, location_id: Optional[int] = None,
+                key: Optional[Hashable] = None) -> None:
+        """Queue an event on the session; it is sent iff the transaction commits."""
+        pending: Set[InvalidationEvent] = db.info.setdefault(_PENDING, set())
+        pending.add(InvalidationEvent(table, location_id, key))
+
+    def receive(self, origin: str, events: List[InvalidationEvent]) -> None:
+        if origin == self.origin:
+            return            # delivered locally at commit
+        self._dispatch(events, local=False)
+
+    def _dispatch(self, events: List[InvalidationEvent], local: bool) -> None:
+        for e in events:
+            invalidations.inc(e.table, "local" if local else "received")
+            for listener, write_through in self._listeners.get(e.table, ()):
+                if local and write_through:
+                    continue
+                try:
+                    listener.handle_invalidation(e)
+                except Exception:
+                    log.exception("invalidation: %r failed on %s", listener, e)
+
+    def evict_all(self) -> None:
+        self.receive("", [InvalidationEvent(table) for table in self._listeners])
+
+    def start(self) -> None:
+        self.backend.start(self)
+
+    def stop(self) -> None:
+        self.backend.stop()
+
+    # ----- session hooks ---------------------------------------------------
+
+    def _flush(self, session: Session, transactional: bool) -> None:
+        if self.backend.transactional != transactional:
+            return
+        pending = session.info.pop(_PENDING, None)
+        if pending:
+            events = sorted(pending, key=repr)
+            self.backend.send(self.origin, events, session)
+            for e in events:
+                invalidations.inc(e.table, "published")
+            session.info.setdefault(_SENT, []).extend(events)
+
+    def _after_commit(self, session: Session) -> None:
+        self._flush(session, transactional=False)
+        sent = session.info.pop(_SENT, None)
+        if sent:
+            self._dispatch(sent, local=True)
+
+    def _discard(self, session: Session) -> None:
+        session.info.pop(_PENDING, None)
+        session.info.pop(_SENT, None)
+
+    def install(self, factory: sessionmaker) -> None:
+        """Hook the session factory so queued events ride on commit."""
+        event.listen(factory, "before_commit", lambda s: self._flush(s, transactional=True))
+        event.listen(factory, "after_commit", self._after_commit)
+        event.listen(factory, "after_rollback", self._discard)
+
+
+def make_backend(name: str = settings.invalidation_backend):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "postgres":
+        if not settings.database_url.startswith("postgresql"):
+            raise ValueError("INVALIDATION_BACKEND=postgres needs a PostgreSQL DATABASE_URL")
+        return PostgresBackend()
+    raise ValueError(f"Unknown INVALIDATION_BACKEND {name!r} (expected 'postgres' or 'memory')")
+
+
+def _install_default() -> InvalidationBus:
+    from app.core.orm import SessionLocal
+    b = InvalidationBus(make_backend())
+    b.install(SessionLocal)
+    return b
+
+
+bus = _install_default()
+
+
+def publish(db: Session, table: str, location_id: Optional[int] = None, key: Optional[Hashable] = None) -> None:
+    bus.publish(db, table, location_id, key)
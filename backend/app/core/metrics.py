@@ -0,0 +1,276 @@
+# app/core/metrics.py
+"""
+In-process metrics with Prometheus text exposition (GET /metrics).
+
+Deliberately tiny: counters, gauges and fixed-bucket histograms keyed by a
+label tuple, each behind its own lock. Labels are bounded by construction —
+requests are labelled with the matched route template ("/items/{item_id}"),
+never the raw path, and unknown methods collapse to "OTHER".
+
+Per-request DB time: the middleware puts a mutable [seconds, statements]
+holder in a contextvar; SQLAlchemy cursor events add to it. Sync endpoints
+run in the threadpool with a *copy* of the context, which still points at
+the same holder object, so the totals make it back to the middleware.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds); bcrypt sits around 0.2-0.3s at the default cost
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0)
+
+KNOWN_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, doc, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_fmt_labels(self.label_names, k)} {_fmt_value(v)}" for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def count(self, *labels: str) -> int:
+        s = self._series.get(labels)
+        return s[2] if s else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        out = self._header()
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="' + _fmt_value(bound) + '"'
+                out.append(f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.label_names, key)} {_fmt_value(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.label_names, key)} {n}")
+        return out
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ----- application metrics ---------------------------------------------------
+
+http_requests = registry.register(Counter(
+    "pantrypal_http_requests_total", "HTTP requests by route template, method and status.",
+    ("route", "method", "status")))
+http_latency = registry.register(Histogram(
+    "pantrypal_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("route", "method")))
+http_in_flight = registry.register(Gauge(
+    "pantrypal_http_requests_in_flight", "HTTP requests currently being served."))
+request_db_time = registry.register(Histogram(
+    "pantrypal_http_request_db_seconds", "Time spent in DB cursor execution per request.",
+    ("route", "method"), buckets=DB_BUCKETS))
+db_statements = registry.register(Counter(
+    "pantrypal_db_statements_total", "SQL statements executed, by route template.",
+    ("route", "method")))
+sql_compiled_cache = registry.register(Counter(
+    "pantrypal_sql_compiled_cache_total",
+    "Statements by SQLAlchemy compiled-cache outcome (cache_hit, cache_miss, no_cache_key, ...).",
+    ("result",)))
+
+login_attempts = registry.register(Counter(
+    "pantrypal_login_attempts_total", "Login attempts by outcome.", ("result",)))
+bcrypt_time = registry.register(Histogram(
+    "pantrypal_bcrypt_seconds", "bcrypt hash/verify time.", ("op",), buckets=BCRYPT_BUCKETS))
+
+count_transitions = registry.register(Counter(
+    "pantrypal_count_transitions_total",
+    "Counts entering a status (pending = submitted, approved/rejected = reviewed).", ("status",)))
+
+startup_phase = registry.register(Gauge(
+    "pantrypal_startup_phase_seconds", "Duration of each warm-up phase at startup.", ("phase",)))
+
+
+# ----- DB time ---------------------------------------------------------------
+
+_db_usage: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    "pantrypal_db_usage", default=None)
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("pantrypal_query_start", []).append(time.perf_counter())
+    if context is not None and context.compiled is not None:
+        sql_compiled_cache.inc(context.cache_hit.name.lower())
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["pantrypal_query_start"].pop()
+    usage = _db_usage.get()
+    if usage is not None:
+        usage[0] += time.perf_counter() - started
+        usage[1] += 1
+
+
+def _cursor_failed(exception_context):
+    # after_cursor_execute never fires for a failed statement
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("pantrypal_query_start"):
+        conn.info["pantrypal_query_start"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute cursor time/statement count to the current request (if any). Idempotent."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor)
+    event.listen(engine, "after_cursor_execute", _after_cursor)
+    event.listen(engine, "handle_error", _cursor_failed)
+
+
+# ----- ASGI middleware -------------------------------------------------------
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware body buffering/task overhead).
+    The route template is read from scope["route"], which FastAPI's router sets
+    on the shared scope dict once a route has matched.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+        usage = [0.0, 0]
+        token = _db_usage.set(usage)
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            _db_usage.reset(token)
+
+            method = scope.get("method", "OTHER")
+            if method not in KNOWN_METHODS:
+                method = "OTHER"
+            route = _route_template(scope)
+            http_requests.inc(route, method, str(status_holder[0]))
+            http_latency.observe(route, method, value=elapsed)
+            request_db_time.observe(route, method, value=usage[0])
+            if usage[1]:
+                db_statements.inc(route, method, amount=usage[1])
+
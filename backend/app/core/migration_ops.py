@@ -0,0 +1,235 @@
+# app/core/migration_ops.py
+"""
+Online (zero-downtime) operations for Alembic migrations on big tables.
+
+Plain Alembic DDL takes ACCESS EXCLUSIVE / SHARE locks for as long as it
+scans or rewrites a table, and while it waits for its lock every later query
+on the table queues behind it. On counts that is minutes of blocked writes.
+Use these instead, from a migration's upgrade()/downgrade():
+
+    create_index_concurrently / drop_index_concurrently
+        CREATE/DROP INDEX CONCURRENTLY (outside the migration transaction);
+        a half-built index left by an earlier failed attempt is dropped first.
+    ddl(sql)
+        Short metadata-only DDL under a lock_timeout, retried on timeout, so
+        it never sits in the lock queue blocking traffic. A (regular)
+        autovacuum in the way of an ALTER TABLE is cancelled.
+    add_check_not_valid / add_foreign_key_not_valid + validate_constraint
+        New constraints apply to new writes immediately; existing rows are
+        checked later by VALIDATE, which lets writes continue.
+    set_not_null(table, column)
+        NOT NULL without the full-table scan under ACCESS EXCLUSIVE: a
+        validated CHECK (col IS NOT NULL) lets SET NOT NULL skip the scan.
+    backfill(table, set_, where)
+        UPDATE in primary-key ranges, one short transaction per batch, with a
+        pause between batches and progress in the alembic log.
+
+Expand/contract for column changes (rename, retype, make required) spans
+releases, never one migration:
+
+    1. expand    add the new column nullable (or with a constant default:
+                 metadata-only since PG 11) via ddl(); app writes both
+    2. backfill  backfill() old -> new; then set_not_null() if required
+    3. switch    app reads the new column, stops writing the old one
+    4. contract  drop the old column (ddl()) in a later release
+
+Anything that runs in autocommit_block() commits its revision's transaction
+so far (env.py runs one transaction per revision), so put concurrent and
+backfill steps in a revision of their own, or last, and make them
+idempotent. bench/migration_harness.py runs migrations against a large
+synthetic counts table under write load.
+"""
+import logging
+import re
+import time
+from typing import Dict, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.exc import OperationalError
+
+log = logging.getLogger("alembic.online")
+
+# Every write on the table queues behind a waiting ACCESS EXCLUSIVE request,
+# so give up quickly and retry rather than wait: traffic flows in between.
+# An autovacuum only cancels itself for a waiter that holds out past
+# deadlock_timeout (1s), which ours never do, so ddl() cancels it instead
+# (never an anti-wraparound one; those wait until they finish).
+LOCK_TIMEOUT = "500ms"
+LOCK_RETRIES = 10
+LOCK_RETRY_PAUSE_SEC = 1.0
+LOCK_RETRY_PAUSE_MAX_SEC = 5.0
+BACKFILL_BATCH = 5_000
+BACKFILL_PAUSE_SEC = 0.05
+PROGRESS_EVERY_SEC = 5.0
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _ident(name: str) -> str:
+    # Names are interpolated into DDL; they come from migration code, but be strict
+    if not _IDENT.match(name):
+        raise ValueError(f"Unsafe SQL identifier {name!r}")
+    return name
+
+
+def _offline() -> bool:
+    # `alembic upgrade --sql`: no connection, just emit the SQL
+    return op.get_context().as_sql
+
+
+def _lock_not_available(e: OperationalError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == "55P03"
+
+
+_ALTER_TABLE = re.compile(r"^\s*ALTER\s+TABLE\s+(?:ONLY\s+)?([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+
+def _cancel_autovacuum(conn, sql: str) -> None:
+    # After a big backfill autovacuum can hold the table for minutes
+    m = _ALTER_TABLE.match(sql)
+    if not m:
+        return
+    pids = conn.execute(sa.text("""
+        SELECT a.pid FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid
+        WHERE l.relation = to_regclass(:table) AND l.granted
+          AND a.backend_type = 'autovacuum worker'
+          AND a.query NOT LIKE '%to prevent wraparound%'
+    """), {"table": m.group(1)}).scalars().all()
+    for pid in pids:
+        log.warning("cancelling autovacuum (pid %d) holding %s", pid, m.group(1))
+        conn.execute(sa.text("SELECT pg_cancel_backend(:pid)"), {"pid": pid})
+
+
+# ----- short DDL ------------------------------------------------------------
+
+def ddl(sql: str, timeout: str = LOCK_TIMEOUT, retries: int = LOCK_RETRIES) -> None:
+    """
+    Run a short DDL statement with SET LOCAL lock_timeout inside a savepoint.
+    On lock timeout the savepoint is rolled back and the statement retried
+    after a pause; the last failure propagates.
+    """
+    if _offline():
+        op.execute(f"SET LOCAL lock_timeout = '{timeout}'")
+        op.execute(sql)
+        op.execute("SET LOCAL lock_timeout = DEFAULT")
+        return
+    conn = op.get_bind()
+    for attempt in range(1, retries + 1):
+        try:
+            with conn.begin_nested():
+                conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{timeout}'")
+                conn.exec_driver_sql(sql)
+                conn.exec_driver_sql("SET LOCAL lock_timeout = DEFAULT")
+            return
+        except OperationalError as e:
+            if not _lock_not_available(e) or attempt == retries:
+                raise
+            log.warning("lock timeout (%s) on attempt %d/%d, retrying: %s", timeout, attempt, retries,
+                        sql.split("\n")[0][:120])
+            _cancel_autovacuum(conn, sql)
+            time.sleep(min(LOCK_RETRY_PAUSE_MAX_SEC, LOCK_RETRY_PAUSE_SEC * attempt))
+
+
+# ----- indexes --------------------------------------------------------------
+
+def _drop_invalid_index(index_name: str) -> None:
+    # A failed/cancelled CREATE INDEX CONCURRENTLY leaves an INVALID index behind
+    invalid = op.get_bind().execute(sa.text("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": index_name}).first()
+    if invalid:
+        log.warning("dropping invalid index %s left by an earlier attempt", index_name)
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_ident(index_name)}")
+
+
+def create_index_concurrently(index_name: str, table_name: str, columns: Sequence, **kw) -> None:
+    """op.create_index(..., postgresql_concurrently=True), outside the transaction; idempotent."""
+    with op.get_context().autocommit_block():
+        if not _offline():
+            _drop_invalid_index(index_name)
+        op.create_index(index_name, table_name, columns, postgresql_concurrently=True,
+                        if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+# ----- constraints ----------------------------------------------------------
+
+def add_check_not_valid(table_name: str, constraint_name: str, condition: str) -> None:
+    ddl(f"ALTER TABLE {_ident(table_name)} ADD CONSTRAINT {_ident(constraint_name)} "
+        f"CHECK ({condition}) NOT VALID")
+
+
+def add_foreign_key_not_valid(
+    constraint_name: str, source_table: str, referent_table: str,
+    local_cols: Sequence[str], remote_cols: Sequence[str], ondelete: Optional[str] = None,
+) -> None:
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    ddl(f"ALTER TABLE {_ident(source_table)} ADD CONSTRAINT {_ident(constraint_name)} "
+        f"FOREIGN KEY ({', '.join(map(_ident, local_cols))}) "
+        f"REFERENCES {_ident(referent_table)} ({', '.join(map(_ident, remote_cols))}){on_delete} NOT VALID")
+
+
+def validate_constraint(table_name: str, constraint_name: str) -> None:
+    """Scan existing rows under SHARE UPDATE EXCLUSIVE: reads and writes continue."""
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {_ident(table_name)} VALIDATE CONSTRAINT {_ident(constraint_name)}")
+
+
+def set_not_null(table_name: str, column_name: str) -> None:
+    """ALTER COLUMN ... SET NOT NULL without a long ACCESS EXCLUSIVE scan (PG 12+)."""
+    check = f"{table_name}_{column_name}_not_null"[:63]
+    add_check_not_valid(table_name, check, f"{_ident(column_name)} IS NOT NULL")
+    validate_constraint(table_name, check)
+    ddl(f"ALTER TABLE {_ident(table_name)} ALTER COLUMN {_ident(column_name)} SET NOT NULL")
+    ddl(f"ALTER TABLE {_ident(table_name)} DROP CONSTRAINT {_ident(check)}")
+
+
+# ----- data -----------------------------------------------------------------
+
+def backfill(
+    table_name: str,
+    set_: str,
+    where: str = "true",
+    params: Optional[Dict] = None,
+    key: str = "id",
+    batch_size: int = BACKFILL_BATCH,
+    pause: float = BACKFILL_PAUSE_SEC,
+) -> int:
+    """
+    UPDATE table SET <set_> WHERE <where>, walking `key` (an indexed integer
+    column) in ranges of batch_size. Each batch commits on its own, so row
+    locks are held for milliseconds and a crash loses at most one batch;
+    `where` must make the update idempotent (e.g. `new_col IS NULL`) so a
+    rerun resumes cheaply. Returns rows updated.
+    """
+    table, key = _ident(table_name), _ident(key)
+    if _offline():
+        op.execute(f"UPDATE {table} SET {set_} WHERE {where}")
+        return 0
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        lo, hi = conn.execute(sa.text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+        if lo is None:
+            return 0
+        stmt = sa.text(f"UPDATE {table} SET {set_} WHERE {key} >= :lo AND {key} < :hi AND ({where})")
+        updated, start = 0, lo
+        began = last_report = time.monotonic()
+        while start <= hi:
+            updated += conn.execute(stmt, {**(params or {}), "lo": start, "hi": start + batch_size}).rowcount
+            start += batch_size
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_EVERY_SEC or start > hi:
+                done = min(1.0, (start - lo) / (hi - lo + 1))
+                eta = (now - began) / done * (1 - done) if done else 0
+                log.info("backfill %s: %.1f%% of key range, %d rows updated, %.0fs elapsed, ETA %.0fs",
+                         table, done * 100, updated, now - began, eta)
+                last_report = now
+            if pause:
+                time.sleep(pause)
+    return updated
@@ -1,5 +1,14 @@
 # backend/app/core/orm.py
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Integer
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import TypeDecorator
+
 from app.core.db import engine
 
 class Base(DeclarativeBase):
@@ -11,4 +20,51 @@ class Base(DeclarativeBase):
 
 # Session factory you'll use later inside request handlers/services.
 # Note: we aren't using it yet; it's here for completeness.
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
\ No newline at end of file
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+# ----- portability (see app/core/db.py) ---------------------------------------
+
+class _SQLiteUTCDateTime(TypeDecorator):
+    """SQLite keeps no offset: store UTC, hand back aware UTC datetimes."""
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+# timestamptz on Postgres. Also the type to give timestamp columns of text()
+# statements run on SQLite, which otherwise come back as strings.
+UTCDateTime = DateTime(timezone=True).with_variant(_SQLiteUTCDateTime(), "sqlite")
+
+# bigint keys; SQLite only auto-increments an INTEGER PRIMARY KEY (64-bit anyway)
+BigIntegerKey = BigInteger().with_variant(Integer(), "sqlite")
+
+
+@compiles(CreateTable, "sqlite")
+def _create_table_sqlite(create, compiler, **kw):
+    # Table prefixes such as UNLOGGED (rate_limit_buckets) are Postgres-only
+    return compiler.visit_create_table(create, **kw).replace("CREATE UNLOGGED TABLE", "CREATE TABLE", 1)
+
+
+def create_schema(bind: Engine = engine) -> None:
+    """
+    Every table from the models, plus the default location the tenancy
+    migration seeds, for SQLite/test databases (Postgres uses Alembic).
+    Idempotent.
+    """
+    from app.models import counts, inventory, items, jobs, outbox, ratelimit, users  # noqa: F401
+    from app.models.locations import DEFAULT_LOCATION_ID, Location
+
+    Base.metadata.create_all(bind)
+    with Session(bind) as db, db.begin():
+        if db.get(Location, DEFAULT_LOCATION_ID) is None:
+            db.add(Location(id=DEFAULT_LOCATION_ID, code="default", name="Default", is_active=True))
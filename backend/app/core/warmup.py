@@ -0,0 +1,81 @@
+# app/core/warmup.py
+"""
+Startup warm-up: pay the one-off costs before the instance takes traffic.
+
+Without it the first requests after a deploy/scale-out absorb SQLAlchemy
+mapper configuration, OpenAPI/Pydantic schema generation, the pool's TCP+auth
+handshakes, passlib's bcrypt backend detection and jose's first sign/verify.
+Runs from the app lifespan (in a worker thread), so uvicorn only starts
+accepting connections once it is done. Each phase is timed and failures are
+logged, not raised — a DB outage at boot is /readyz's business.
+"""
+import logging
+import time
+from typing import Callable, Dict
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from app.core.config import Settings
+from app.core.db import engine
+from app.core.metrics import startup_phase
+
+log = logging.getLogger(__name__)
+
+
+def _mappers(app: FastAPI, settings: Settings) -> None:
+    configure_mappers()
+
+
+def _schemas(app: FastAPI, settings: Settings) -> None:
+    # Generates (and caches) every request/response model's JSON schema
+    app.openapi()
+
+
+def _db_pool(app: FastAPI, settings: Settings) -> None:
+    # Hold N connections at once so the pool actually grows to N
+    n = min(settings.warmup_pool_connections, settings.db_pool_size)
+    conns = []
+    try:
+        for _ in range(n):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def _bcrypt(app: FastAPI, settings: Settings) -> None:
+    from app.security.passwords import hash_password
+    hash_password("warm-up")
+
+
+def _jwt(app: FastAPI, settings: Settings) -> None:
+    from app.security.jwt import create_access_token, decode_token
+    decode_token(create_access_token({"sub": "0"}))
+
+
+PHASES: Dict[str, Callable[[FastAPI, Settings], None]] = {
+    "mappers": _mappers,
+    "schemas": _schemas,
+    "db_pool": _db_pool,
+    "bcrypt": _bcrypt,
+    "jwt": _jwt,
+}
+
+
+def warm_up(app: FastAPI, settings: Settings) -> Dict[str, float]:
+    """Run every phase; returns {phase: seconds} (failed phases included)."""
+    timings: Dict[str, float] = {}
+    for name, phase in PHASES.items():
+        started = time.perf_counter()
+        try:
+            phase(app, settings)
+        except Exception as e:
+            log.warning("warm-up: %s failed: %s", name, e)
+        timings[name] = round(time.perf_counter() - started, 4)
+        startup_phase.set(name, value=timings[name])
+    log.info("warm-up done in %.3fs: %s", sum(timings.values()), timings)
+    return timings
@@ -0,0 +1,262 @@
+# app/gen_data.py
+"""
+Synthetic dataset generator for production-scale local testing.
+
+Creates N locations, their users and items, and M historical counts with
+realistic status mixes, closing-time timestamps and per-item consumption
+(usage rate, weekend bump, periodic restocks), loaded with COPY. A fixed
+--seed makes the data deterministic.
+
+    python -m app.gen_data --locations 40 --items 500 --counts 10000000 --reset
+
+--reset TRUNCATEs locations/users/items/counts first, makes location 1 the
+"default" location and recreates the demo accounts
+(admin/manager/counter@pantrypal.dev) there, so the seeds, the CSV CLI,
+bench/load.py and the UI keep working against the generated data.
+Generated users all share the password "password123".
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.orm import SessionLocal
+from app.security.passwords import hash_password
+
+GENERATED_PASSWORD = "password123"
+DEMO_ACCOUNTS = [
+    ("admin@pantrypal.dev", "Admin User", "admin", "admin123"),
+    ("manager@pantrypal.dev", "Manager User", "manager", "manager123"),
+    ("counter@pantrypal.dev", "Counter User", "counter", "counter123"),
+]
+
+UNITS = np.array(["g", "ml", "pcs"])
+PRODUCE = ["Tomatoes", "Onions", "Garlic", "Lettuce", "Basil", "Lemons", "Limes", "Carrots",
+           "Potatoes", "Peppers", "Mushrooms", "Spinach", "Cilantro", "Ginger", "Cucumbers"]
+PANTRY = ["Rice", "Flour", "Sugar", "Olive Oil", "Cooking Oil", "Salt", "Vinegar", "Soy Sauce",
+          "Pasta", "Beans", "Lentils", "Chickpeas", "Tomato Paste", "Stock", "Honey"]
+PROTEIN = ["Chicken Thighs", "Chicken Breast", "Beef Mince", "Pork Belly", "Salmon", "Shrimp",
+           "Tofu", "Eggs", "Paneer", "Lamb Shoulder"]
+BASE_NAMES = PRODUCE + PANTRY + PROTEIN
+
+# Status mix for historical counts; the newest count of some items stays pending
+REJECT_RATE = 0.05
+PENDING_ITEM_RATE = 0.03
+
+
+def _next_id(db: Session, table: str) -> int:
+    return int(db.execute(text(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")).scalar())
+
+
+def _sync_sequence(db: Session, table: str) -> None:
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"
+    ))
+
+
+def _copy(db: Session, table: str, columns, rows) -> int:
+    """COPY an iterable of tuples into table(columns); returns rows written."""
+    raw = db.connection().connection.driver_connection
+    n = 0
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                n += 1
+    return n
+
+
+def simulate_location(rng: np.random.Generator, n_items: int, per_item: int, days: int, end: datetime):
+    """
+    Count history for one location's items, as flat arrays sorted by (item, time).
+
+    Each item gets a usage rate (gamma), a restock cycle (every 2-7 counts) and a
+    +30% weekend bump; on-hand at count k is restock_level - usage since restock.
+    """
+    interval_days = days / per_item
+    rate = rng.gamma(2.0, 4.0, n_items) + 0.2                          # units/day
+    cycle = rng.integers(2, 8, n_items)                                # counts per restock
+    level = np.ceil(rate * interval_days * (cycle + 1) * rng.uniform(1.0, 1.4, n_items))
+
+    k = np.arange(per_item)
+    # Evening counts (~21:00 +- 1.5h) every interval_days; squeezed into the
+    # interval when items are counted more than once a day
+    start = (end - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    time_of_day = np.clip(rng.normal(21 / 24, 1.5 / 24, (n_items, per_item)), 0.0, 0.999)
+    offsets = k[None, :] * interval_days + time_of_day * min(interval_days, 1.0)   # in days
+    weekday = ((start.weekday() + np.floor(offsets)) % 7).astype(np.int64)
+    bump = np.where(weekday >= 4, 1.3, 1.0)                            # Fri-Sun busier
+    used = rng.poisson(rate[:, None] * interval_days * bump).astype(np.float64)
+
+    # Usage since the last restock: cumsum minus cumsum at the restock index
+    cum = np.cumsum(used, axis=1)
+    restock_at = (k[None, :] // cycle[:, None]) * cycle[:, None]
+    since = cum - np.take_along_axis(cum, restock_at, axis=1) + np.take_along_axis(used, restock_at, axis=1)
+    on_hand = np.clip(level[:, None] - since, 0, None)
+
+    status = np.where(rng.random((n_items, per_item)) < REJECT_RATE, 2, 1)   # 1=approved 2=rejected
+    pending_items = rng.random(n_items) < PENDING_ITEM_RATE
+    status[pending_items, -1] = 0                                            # 0=pending
+    # Counter error: small for approved, large for rejected (why they were rejected)
+    noise = rng.normal(0, np.where(status == 2, 0.35, 0.03)) * on_hand
+    counted = np.clip(np.rint(on_hand + noise), 0, None).astype(np.int64)
+
+    review_lag_h = rng.exponential(2.0, (n_items, per_item))
+    return offsets, counted, status, review_lag_h, start, level
+
+
+def generate(db: Session, args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) if args.end is None \
+        else datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc)
+    db.execute(text("SET TIME ZONE 'UTC'"))
+
+    if args.reset:
+        db.execute(text("TRUNCATE inventory_snapshots, inventory_movements, counts, items, users, locations "
+                        "RESTART IDENTITY CASCADE"))
+
+    stats = {"locations": 0, "users": 0, "items": 0, "counts": 0}
+    shared_hash = hash_password(GENERATED_PASSWORD)  # one bcrypt for every generated user
+
+    loc0 = _next_id(db, "locations")
+    loc_ids = list(range(loc0, loc0 + args.locations))
+    loc_rows = [(lid, f"gen-{lid:03d}", f"Kitchen {lid:03d}", True) for lid in loc_ids]
+    if args.reset:
+        loc_rows[0] = (loc_ids[0], "default", "Default", True)   # same as the tenancy migration
+    stats["locations"] = _copy(db, "locations", ("id", "code", "name", "is_active"), loc_rows)
+
+    # Users: demo accounts (on reset), then one manager + N counters per location
+    user_rows = []
+    uid = _next_id(db, "users")
+    if args.reset:
+        for email, name, role, password in DEMO_ACCOUNTS:
+            user_rows.append((uid, email, name, loc_ids[0], role, hash_password(password), True))
+            uid += 1
+    managers, counters = {}, {}
+    for lid in loc_ids:
+        managers[lid] = uid
+        user_rows.append((uid, f"manager@gen-{lid:03d}.pantrypal.dev", f"Manager {lid:03d}",
+                          lid, "manager", shared_hash, True))
+        uid += 1
+        counters[lid] = list(range(uid, uid + args.counters))
+        for j in range(args.counters):
+            user_rows.append((uid, f"counter{j + 1}@gen-{lid:03d}.pantrypal.dev", f"Counter {lid:03d}-{j + 1}",
+                              lid, "counter", shared_hash, True))
+            uid += 1
+    stats["users"] = _copy(db, "users",
+                           ("id", "email", "name", "location_id", "role", "password_hash", "is_active"),
+                           user_rows)
+
+    per_item = max(1, args.counts // max(1, args.locations * args.items))
+    item_id = _next_id(db, "items")
+    count_id = first_count_id = _next_id(db, "counts")
+    status_names = np.array(["pending", "approved", "rejected"], dtype=object)
+
+    for lid in loc_ids:
+        t0 = time.perf_counter()
+        offsets, counted, status, lag_h, start, level = simulate_location(
+            rng, args.items, per_item, args.days, end)
+        ids = np.arange(item_id, item_id + args.items)
+        item_id += args.items
+
+        # Current on-hand = newest approved count per item
+        approved = status == 1
+        last_idx = np.where(approved.any(axis=1),
+                            per_item - 1 - np.argmax(approved[:, ::-1], axis=1), -1)
+        current = np.where(last_idx >= 0, counted[np.arange(args.items), np.maximum(last_idx, 0)], 0)
+        par = np.ceil(level * rng.uniform(0.5, 0.8, args.items)).astype(np.int64)
+        units = UNITS[rng.integers(0, 3, args.items)]
+        inactive = rng.random(args.items) < 0.02
+
+        stats["items"] += _copy(
+            db, "items", ("id", "location_id", "name", "base_unit", "par_level", "is_active", "current_qty"),
+            ((int(ids[i]), lid, f"{BASE_NAMES[i % len(BASE_NAMES)]} #{i // len(BASE_NAMES) + 1:04d}",
+              str(units[i]), int(par[i]), not bool(inactive[i]), int(current[i]))
+             for i in range(args.items)),
+        )
+
+        # Flatten counts (item-major, time-ordered within item)
+        start64 = np.datetime64(start.replace(tzinfo=None), "us")
+        submitted = start64 + (offsets.ravel() * 86400e6).astype("timedelta64[us]")
+        reviewed = submitted + (lag_h.ravel() * 3600e6).astype("timedelta64[us]")
+        flat_status = status.ravel()
+        n = flat_status.size
+        submitters = np.array(counters[lid] or [managers[lid]])[rng.integers(0, max(1, len(counters[lid])), n)]
+        row_ids = np.arange(count_id, count_id + n)
+        count_id += n
+
+        is_pending = flat_status == 0
+        cols = zip(
+            row_ids.tolist(),
+            [lid] * n,
+            np.repeat(ids, per_item).tolist(),
+            counted.ravel().tolist(),
+            status_names[flat_status].tolist(),
+            submitters.tolist(),
+            submitted.astype(object).tolist(),
+            np.where(is_pending, None, managers[lid]).tolist(),
+            np.where(is_pending, None, reviewed.astype(object)).tolist(),
+            np.where(flat_status == 1, counted.ravel(), None).tolist(),
+        )
+        stats["counts"] += _copy(
+            db, "counts",
+            ("id", "location_id", "item_id", "count", "status", "submitted_by", "submitted_at",
+             "approved_by", "approved_at", "approved_count"),
+            cols,
+        )
+        if not args.quiet:
+            print(f"  location {lid}: {args.items} items, {n} counts in {time.perf_counter() - t0:.1f}s",
+                  file=sys.stderr)
+
+    for table in ("locations", "users", "items", "counts"):
+        _sync_sequence(db, table)
+
+    # Approved counts go on the inventory ledger as resets (current_qty already matches)
+    stats["movements"] = db.execute(text("""
+        INSERT INTO inventory_movements
+            (location_id, item_id, kind, is_reset, quantity, occurred_at, recorded_at, count_id, recorded_by)
+        SELECT location_id, item_id, 'count', true, approved_count, submitted_at, approved_at, id, approved_by
+        FROM counts
+        WHERE status = 'approved' AND id >= :first_id
+    """), {"first_id": first_count_id}).rowcount
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.gen_data", description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--counters", type=int, default=4, help="counter users per location")
+    parser.add_argument("--items", type=int, default=200, help="items per location")
+    parser.add_argument("--counts", type=int, default=100_000, help="total historical counts")
+    parser.add_argument("--days", type=int, default=365, help="history span")
+    parser.add_argument("--end", default=None,
+                        help="history end (ISO date, UTC); default now — pass it for fully reproducible data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="TRUNCATE locations/users/items/counts first")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    db: Session = SessionLocal()
+    try:
+        stats = generate(db, args)
+        db.commit()
+    finally:
+        db.close()
+
+    # Fresh planner stats so EXPLAIN/benchmarks see the real distribution
+    from app.core.db import engine
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE locations, users, items, counts, inventory_movements"))
+
+    print(f"✅ Generated {stats['locations']} locations, {stats['users']} users, {stats['items']} items, "
+          f"{stats['counts']} counts, {stats['movements']} ledger movements in {time.perf_counter() - t0:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# app/inventory_snapshots.py
+"""
+Checkpoint inventory ledger balances (run from cron, e.g. nightly).
+
+    python -m app.inventory_snapshots [--location CODE]
+
+Only items that moved since their last snapshot get a new row, so frequent
+runs are cheap.
+"""
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+
+from app.core.orm import SessionLocal
+from app.items_csv import resolve_location
+from app.services.inventory import take_snapshots
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.inventory_snapshots",
+                                     description=__doc__.splitlines()[1])
+    parser.add_argument("--location", default=None, help="location code (default: all locations)")
+    args = parser.parse_args(argv)
+
+    db: Session = SessionLocal()
+    try:
+        location_id = resolve_location(db, args.location) if args.location else None
+        written = take_snapshots(db, location_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"✅ Wrote {written} inventory snapshots.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# app/items_csv.py
+"""
+CLI for bulk item CSV import/export (COPY-based).
+
+    python -m app.items_csv import items.csv [--dry-run] [--location CODE]
+    python -m app.items_csv export items.csv [--location CODE]
+"""
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+from app.core.invalidation import publish
+from app.core.orm import SessionLocal
+from app.models.locations import Location
+from app.services import item_csv
+
+
+def resolve_location(db: Session, code: str) -> int:
+    loc = db.query(Location).filter(Location.code == code).first()
+    if not loc:
+        raise SystemExit(f"⚠️ Unknown location code {code!r}")
+    return loc.id
+
+
+def run_import(path: str, location: str, dry_run: bool) -> int:
+    db: Session = SessionLocal()
+    try:
+        location_id = resolve_location(db, location)
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            result = item_csv.import_items_csv(db, location_id, f, dry_run=dry_run)
+        if dry_run:
+            db.rollback()
+        else:
+            publish(db, "items", location_id)   # running API workers reload their catalog
+            db.commit()
+    finally:
+        db.close()
+
+    for e in result.errors:
+        print(f"line {e.line}: {e.name!r}: {e.error}")
+    verb = "Would apply" if dry_run else "Applied"
+    print(f"✅ {verb}: {result.inserted} inserted, {result.updated} updated, {len(result.errors)} skipped.")
+    return 1 if result.errors else 0
+
+
+def run_export(path: str, location: str) -> int:
+    db: Session = SessionLocal()
+    try:
+        location_id = resolve_location(db, location)
+    finally:
+        db.close()
+    with open(path, "wb") as f:
+        written = item_csv.export_items_csv(location_id, f)
+    print(f"✅ Exported items to {path} ({written} bytes).")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.items_csv", description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_imp = sub.add_parser("import", help="upsert items from a CSV file")
+    p_imp.add_argument("path")
+    p_imp.add_argument("--location", default="default", help="location code (default: %(default)s)")
+    p_imp.add_argument("--dry-run", action="store_true", help="validate only; write nothing")
+
+    p_exp = sub.add_parser("export", help="write all items to a CSV file")
+    p_exp.add_argument("path")
+    p_exp.add_argument("--location", default="default", help="location code (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "import":
+        return run_import(args.path, args.location, args.dry_run)
+    return run_export(args.path, args.location)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
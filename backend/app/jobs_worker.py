@@ -0,0 +1,44 @@
+# app/jobs_worker.py
+"""
+Run the background job runner without the API.
+
+    python -m app.jobs_worker [--workers N]
+
+For deployments that set JOBS_ENABLED=0 on the API processes and run heavy
+jobs on separate machines; both claim from the same `jobs` table.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from app.core.config import settings
+from app.services.jobs import JobRunner
+
+
+async def _serve(workers: int) -> None:
+    runner = JobRunner(workers=workers)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    runner.start()
+    print(f"🛠  Job worker {runner.worker_id} running {workers} slot(s); Ctrl-C to stop.")
+    await stop.wait()
+    await runner.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.jobs_worker",
+                                     description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=settings.job_workers,
+                        help=f"concurrent jobs (default JOB_WORKERS={settings.job_workers})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_serve(args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
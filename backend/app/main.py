@@ -1,42 +1,130 @@
 # app/main.py
-from fastapi import FastAPI
+"""
+App factory.
+
+    uvicorn app.main:app                      # module attribute, built on first access
+    uvicorn --factory app.main:create_app
+
+Routers (and the models/services/numpy behind them) are imported inside
+create_app(), not when this module is imported, and the lifespan runs the
+warm-up (app.core.warmup) before the instance accepts traffic.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from app.core.db import engine
-from app.routers import auth as auth_router
-from app.routers import items as items_router
-from app.routers import counts as counts_router
-from app.routers import dashboard as dashboard_router  # if you added commit 15
-import os
-
-app = FastAPI(title="Pantrypal API", version="0.1.0")
-
-# CORS — allow your frontend (adjust or load from env)
-ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[o.strip() for o in ALLOWED_ORIGINS],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/", tags=["Root"], include_in_schema=False)
-def root():
-    return {"app": "Pantrypal API", "docs": "/docs", "health": "/health"}
-
-@app.get("/health", tags=["Health"])
-def read_health():
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        db_status = "ok"
-    except Exception as e:
-        db_status = f"error: {e}"
-    return {"ok": True, "db": db_status}
-
-# Routers
-app.include_router(auth_router.router)
-app.include_router(items_router.router)
-app.include_router(counts_router.router)
-app.include_router(dashboard_router.router)
+from fastapi.responses import JSONResponse
+
+from app.core.config import Settings, get_settings
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or get_settings()
+
+    from app.core import metrics
+    from app.core.concurrency import ConcurrencyLimiter, ConcurrencyLimitMiddleware, load_budgets
+    from app.core.db import dialect_name, engine
+    from app.core.health import health_probe
+    from app.core.invalidation import bus
+    from app.services.jobs import job_runner
+    from app.services.outbox import dispatcher as outbox_dispatcher
+    from app.core.warmup import warm_up
+    from app.routers import auth as auth_router
+    from app.routers import items as items_router
+    from app.routers import counts as counts_router
+    from app.routers import dashboard as dashboard_router
+    from app.routers import jobs as jobs_router
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if dialect_name(engine) == "sqlite":
+            # No migrations on SQLite: the schema comes from the models
+            from app.core.orm import create_schema
+            await asyncio.to_thread(create_schema)
+        if settings.warmup:
+            app.state.warmup = await asyncio.to_thread(warm_up, app, settings)
+        health_probe.start()
+        bus.start()
+        if settings.jobs_enabled:
+            job_runner.start()
+        if settings.outbox_enabled:
+            outbox_dispatcher.start()
+        yield
+        await outbox_dispatcher.stop()
+        await job_runner.stop()
+        bus.stop()
+        await health_probe.stop()
+
+    app = FastAPI(title="Pantrypal API", version="0.1.0", lifespan=lifespan)
+    app.state.settings = settings
+    app.state.warmup = None
+    app.state.concurrency = None
+
+    # Innermost: sheds per route class; inside CORS so 503s still carry CORS headers
+    if settings.concurrency_enabled:
+        app.state.concurrency = ConcurrencyLimiter(load_budgets(), adaptive=settings.concurrency_adaptive)
+        app.add_middleware(ConcurrencyLimitMiddleware, limiter=app.state.concurrency)
+
+    # CORS — allow your frontend (CORS_ORIGINS, comma separated)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # Added last so it is outermost and also times CORS preflights
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+
+    @app.get("/", tags=["Root"], include_in_schema=False)
+    def root():
+        return {"app": "Pantrypal API", "docs": "/docs", "livez": "/livez", "readyz": "/readyz"}
+
+    # Probes are async and never touch the DB: they run on the event loop even when
+    # the threadpool is exhausted, and /readyz reads the background probe's snapshot.
+
+    @app.get("/livez", tags=["Health"])
+    async def read_livez():
+        """Liveness: the process is up and serving. No I/O."""
+        return {"ok": True}
+
+    @app.get("/readyz", tags=["Health"])
+    async def read_readyz():
+        """Readiness from cached probe state: DB reachable, migrations at head, pool not saturated."""
+        verdict = health_probe.readiness()
+        return JSONResponse(verdict, status_code=200 if verdict["ready"] else 503)
+
+    @app.get("/health", tags=["Health"])
+    async def read_health():
+        """Legacy shape, now served from the cached probe state."""
+        state = health_probe.state
+        return {"ok": True, "db": state["db"] if state else "unknown"}
+
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    async def read_metrics():
+        """Prometheus text exposition of the in-process collectors."""
+        return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+    # Routers
+    app.include_router(auth_router.router)
+    app.include_router(items_router.router)
+    app.include_router(counts_router.router)
+    app.include_router(dashboard_router.router)
+    app.include_router(jobs_router.router)
+    return app
+
+
+_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str):
+    # `from app.main import app` / `uvicorn app.main:app` keep working
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
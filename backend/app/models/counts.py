@@ -2,10 +2,10 @@
 from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, Enum, Index  # <-- add Enum, Index
+from sqlalchemy import ForeignKey, Integer, String, Text, Enum, Index  # <-- add Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.core.orm import Base
+from app.core.orm import Base, UTCDateTime
 
 # NEW: canonical enum definition in the model (mirrors your Pydantic Literal)
 StatusEnum = Enum("pending", "approved", "rejected", name="count_status")
@@ -15,6 +15,9 @@ class Count(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # Denormalized from items.location_id so per-store queries never join items
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+
     item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=False)
     count: Mapped[int] = mapped_column(Integer, nullable=False)
 
@@ -23,22 +26,30 @@ class Count(Base):
 
     submitted_by: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     submitted_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False,
+        UTCDateTime, nullable=False,
         default=lambda: datetime.now(timezone.utc)
     )
 
     notes: Mapped[Optional[str]] = mapped_column(Text)
     approved_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
-    approved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    approved_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime)
     approved_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     item = relationship("Item", backref="count_rows")
     submitter = relationship("User", foreign_keys=[submitted_by], backref="submitted_counts")
     approver = relationship("User", foreign_keys=[approved_by], backref="approved_counts")
 
-    # NEW: helpful indexes for common filters
+    # Hot filters are per-location, newest first: lead with location_id
     __table_args__ = (
-        Index("ix_counts_status", "status"),
-        Index("ix_counts_item_id", "item_id"),
+        Index("ix_counts_location_status_submitted", "location_id", "status", submitted_at.desc()),
+        Index("ix_counts_location_submitted", "location_id", submitted_at.desc()),
+        Index("ix_counts_location_approved_at", "location_id", "approved_at"),
+        # Per-item history, newest first, keyset-paginated on (submitted_at, id)
+        Index("ix_counts_item_submitted", "item_id", submitted_at.desc(), id.desc(),
+              postgresql_include=["status", "approved_count"]),
+        # Count sheet's per-item "last approved" / "pending" probes (index-only);
+        # also serves every item_id lookup, so no separate ix_counts_item_id
+        Index("ix_counts_item_status_approved_at", "item_id", "status", approved_at.desc(),
+              postgresql_include=["id", "approved_count"]),
         Index("ix_counts_submitted_by", "submitted_by"),
     )
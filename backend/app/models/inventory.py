@@ -0,0 +1,62 @@
+# app/models/inventory.py
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Boolean, Enum, ForeignKey, Index, Integer, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.orm import Base, BigIntegerKey, UTCDateTime
+
+# Append-only stock ledger. Two kinds of rows:
+# - resets (is_reset): an observed absolute on-hand quantity — an approved
+#   count, or the opening balance backfilled when the ledger was introduced
+# - deltas: signed changes (deliveries +, waste -, manual adjustments)
+# On-hand at T = latest reset/snapshot at or before T + deltas after it up to T.
+# Writers only INSERT; nothing reads the previous balance to write the next one.
+MovementKind = Enum("opening", "count", "delivery", "waste", "adjustment", name="movement_kind")
+RESET_KINDS = ("opening", "count")
+
+
+class InventoryMovement(Base):
+    __tablename__ = "inventory_movements"
+
+    id: Mapped[int] = mapped_column(BigIntegerKey, primary_key=True)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), nullable=False)
+
+    kind: Mapped[str] = mapped_column(MovementKind, nullable=False)
+    is_reset: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)   # absolute if is_reset, else signed delta
+
+    # When it happened on the floor (a count's submitted_at), not when it was recorded
+    occurred_at: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    count_id: Mapped[Optional[int]] = mapped_column(ForeignKey("counts.id"))
+    recorded_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
+
+    __table_args__ = (
+        # delta range sums and the "latest reset before T" probe
+        Index("ix_movements_item_occurred", "item_id", "occurred_at"),
+        Index("ix_movements_item_reset_occurred", "item_id", occurred_at.desc(),
+              postgresql_where=is_reset, sqlite_where=text("is_reset")),
+        Index("ix_movements_location_occurred", "location_id", "occurred_at"),
+    )
+
+
+class InventorySnapshot(Base):
+    """
+    Checkpoint of an item's ledger balance, so as-of reads never scan far back.
+    Derived data: rows at/after a backdated reset are deleted and re-taken.
+    """
+    __tablename__ = "inventory_snapshots"
+
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), primary_key=True)
+    taken_at: Mapped[datetime] = mapped_column(UTCDateTime, primary_key=True)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_snapshots_location_taken", "location_id", "taken_at"),
+    )
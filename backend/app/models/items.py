@@ -1,6 +1,6 @@
 # backend/app/models/items.py
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Boolean
+from sqlalchemy import String, Integer, Boolean, ForeignKey, Index, Computed, and_, func
 from app.core.orm import Base
 
 class Item(Base):
@@ -8,8 +8,12 @@ class Item(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
-    # Friendly, unique name for the ingredient
-    name: Mapped[str] = mapped_column(String(120), unique=True, index=True)
+    # Store that owns this item (see app/models/locations.py)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+
+    # Friendly name for the ingredient, unique per location
+    # (uniqueness is case-insensitive — see ux_items_location_name_lower below)
+    name: Mapped[str] = mapped_column(String(120))
 
     # Base unit for stock counts and PAR math: "g" | "ml" | "pcs"
     base_unit: Mapped[str] = mapped_column(String(10))
@@ -21,4 +25,28 @@ class Item(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     # NEW: live on-hand quantity (in base_unit)
-    current_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
\ No newline at end of file
+    current_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Stored generated flag so low-stock lookups can use a partial index
+    # (no index can serve the column-to-column `current_qty < par_level`)
+    is_below_par: Mapped[bool] = mapped_column(
+        Boolean, Computed("current_qty < par_level", persisted=True)
+    )
+
+
+# Case-insensitive uniqueness lives in the DB: "Tomatoes" and "tomatoes" collide
+# within a location, so create/rename can be a single INSERT/UPDATE (no pre-check
+# race). Also serves per-location ORDER BY lower(name) and
+# `ON CONFLICT (location_id, lower(name))` upserts.
+ITEM_NAME_KEY = (Item.location_id, func.lower(Item.name))
+UX_ITEMS_NAME_LOWER = "ux_items_location_name_lower"
+Index(UX_ITEMS_NAME_LOWER, *ITEM_NAME_KEY, unique=True)
+
+# Low-stock dashboard: only active, below-par rows are indexed, so the
+# partial indexes stay tiny and serve both sort orders with LIMIT/OFFSET.
+ITEM_DEFICIT = Item.par_level - Item.current_qty
+LOW_STOCK_WHERE = and_(Item.is_active, Item.is_below_par)
+Index("ix_items_low_stock_name", Item.location_id, Item.name, Item.id,
+      postgresql_where=LOW_STOCK_WHERE, sqlite_where=LOW_STOCK_WHERE)
+Index("ix_items_low_stock_deficit", Item.location_id, ITEM_DEFICIT.self_group().desc(), Item.id,
+      postgresql_where=LOW_STOCK_WHERE, sqlite_where=LOW_STOCK_WHERE)
@@ -0,0 +1,62 @@
+# app/models/jobs.py
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import (
+    JSON, Enum, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.orm import Base, BigIntegerKey, UTCDateTime
+
+JobStatusEnum = Enum("queued", "running", "succeeded", "failed", name="job_status")
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+# Partial-index predicates (SQLite has partial indexes too)
+QUEUED, RUNNING = text("status = 'queued'"), text("status = 'running'")
+
+
+class Job(Base):
+    """
+    Durable background job. Workers claim queued rows with FOR UPDATE SKIP LOCKED,
+    so any number of API processes (or python -m app.jobs_worker) can share the queue.
+    """
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(BigIntegerKey, primary_key=True)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(60), nullable=False)
+    params: Mapped[dict] = mapped_column(JSONType, nullable=False, server_default=text("'{}'"))
+
+    status: Mapped[str] = mapped_column(JobStatusEnum, nullable=False, server_default="queued")
+    progress: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    message: Mapped[Optional[str]] = mapped_column(String(200))
+    result: Mapped[Optional[dict]] = mapped_column(JSONType)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+
+    # Optional file produced by the job (e.g. a CSV export), served by GET /jobs/{id}/output
+    output: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True)
+    output_type: Mapped[Optional[str]] = mapped_column(String(100))
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    worker: Mapped[Optional[str]] = mapped_column(String(80))
+
+    created_by: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    run_after: Mapped[datetime] = mapped_column(
+        UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime)
+
+    __table_args__ = (
+        # The claim query: oldest runnable queued job
+        Index("ix_jobs_queued", "run_after", "id", postgresql_where=QUEUED, sqlite_where=QUEUED),
+        # Stale-claim sweep
+        Index("ix_jobs_running_heartbeat", "heartbeat_at", postgresql_where=RUNNING, sqlite_where=RUNNING),
+        Index("ix_jobs_location_created", "location_id", created_at.desc()),
+    )
@@ -0,0 +1,24 @@
+# backend/app/models/locations.py
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean
+from app.core.orm import Base
+
+# Tenancy: every store is a location. items/counts/users carry location_id and
+# every hot index leads with it, so per-store queries touch only that store's
+# slice of each index. The same key is what a large store would later be split
+# on (PARTITION BY LIST (location_id), or its own database).
+DEFAULT_LOCATION_ID = 1
+
+class Location(Base):
+    __tablename__ = "locations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Short unique code used in CLIs/seeds, e.g. "downtown"
+    code: Mapped[str] = mapped_column(String(40), unique=True)
+
+    # Display name
+    name: Mapped[str] = mapped_column(String(120))
+
+    # Closed stores stay for history
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -0,0 +1,46 @@
+# app/models/outbox.py
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Enum, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.orm import Base, BigIntegerKey, UTCDateTime
+from app.models.jobs import JSONType
+
+OutboxStatusEnum = Enum("pending", "delivered", "dead", name="outbox_status")
+PENDING = text("status = 'pending'")
+
+
+class OutboxEvent(Base):
+    """
+    A side effect (notification) recorded in the same transaction as the write
+    that caused it; app.services.outbox delivers it after commit, at least once.
+    """
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigIntegerKey, primary_key=True)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False)
+    topic: Mapped[str] = mapped_column(String(60), nullable=False)      # e.g. "item.below_par"
+    payload: Mapped[dict] = mapped_column(JSONType, nullable=False, server_default=text("'{}'"))
+
+    status: Mapped[str] = mapped_column(OutboxStatusEnum, nullable=False, server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    # Next delivery attempt; a claim pushes it out by the lease, a failure by the backoff
+    available_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    delivered_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime)
+
+    __table_args__ = (
+        # The claim query: oldest deliverable pending events
+        Index("ix_outbox_pending", "available_at", "id", postgresql_where=PENDING, sqlite_where=PENDING),
+        # Retention sweep of delivered rows
+        Index("ix_outbox_delivered_at", "delivered_at", postgresql_where=text("status = 'delivered'"),
+              sqlite_where=text("status = 'delivered'")),
+    )
@@ -0,0 +1,20 @@
+# app/models/ratelimit.py
+from datetime import datetime
+
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.orm import Base, UTCDateTime
+
+
+class RateLimitBucket(Base):
+    """
+    Shared token-bucket state for RATE_LIMIT_BACKEND=postgres. UNLOGGED: losing
+    it in a crash just refills everyone's buckets, and it skips the WAL.
+    """
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)   # "<rule>:<ip|email|user id>"
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
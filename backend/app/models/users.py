@@ -1,6 +1,6 @@
 # backend/app/models/users.py
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Boolean
+from sqlalchemy import String, Boolean, ForeignKey
 from app.core.orm import Base
 
 class User(Base):
@@ -15,6 +15,9 @@ class User(Base):
     # Display name
     name: Mapped[str] = mapped_column(String(120))
 
+    # Home store; scopes everything the user sees (admins may switch via X-Location-Id)
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=False, index=True)
+
     # Role for RBAC (admin | manager | counter)
     role: Mapped[str] = mapped_column(String(20), default="counter")
 
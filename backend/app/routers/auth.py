@@ -2,12 +2,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from app.schemas.auth import LoginRequest, TokenResponse
+from app.core.metrics import login_attempts
 from app.security.passwords import verify_password
 from app.security.jwt import create_access_token
 from app.core.orm import SessionLocal
-from app.models.users import User
+from app.services import queries
 from pydantic import BaseModel
 from app.security.deps import get_current_user
+from app.security.ratelimit import limit_by_ip, limiter
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -21,29 +23,38 @@ def get_db():
     finally:
         db.close()
 
-@router.post("/login", response_model=TokenResponse)
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(limit_by_ip("login_ip"))])
 def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
     """
     Verify email & password; return a JWT with user id & role.
+    Throttled per client IP and per email (429 + Retry-After) before any bcrypt work.
     """
+    limiter.check("login_email", payload.email.lower())
+
     # 1) Find user by email
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = queries.user_by_email(db, payload.email)
     if not user or not user.is_active:
+        login_attempts.inc("unknown_user")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     # 2) Verify password hash
     if not verify_password(payload.password, user.password_hash):
+        login_attempts.inc("bad_password")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     # 3) Build token payload — minimal & useful
-    token = create_access_token({"sub": str(user.id), "role": user.role, "email": user.email})
+    token = create_access_token({
+        "sub": str(user.id), "role": user.role, "email": user.email, "loc": user.location_id,
+    })
 
+    login_attempts.inc("success")
     return TokenResponse(access_token=token)
 
 class WhoAmI(BaseModel):
     id: int
     email: str
     role: str
+    location_id: int
 
 @router.get("/whoami", response_model=WhoAmI)
 def whoami(current_user = Depends(get_current_user)) -> WhoAmI:
@@ -51,5 +62,8 @@ def whoami(current_user = Depends(get_current_user)) -> WhoAmI:
     Simple sanity check: returns the authenticated user's identity.
     Requires a valid Bearer token.
     """
-    return WhoAmI(id=current_user.id, email=current_user.email, role=current_user.role)
+    return WhoAmI(
+        id=current_user.id, email=current_user.email, role=current_user.role,
+        location_id=current_user.location_id,
+    )
 
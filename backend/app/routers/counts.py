@@ -3,30 +3,50 @@ from typing import Optional, List, Union
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.security.deps import get_current_user, require_roles, get_db
+from app.core.invalidation import publish
+from app.core.metrics import count_transitions
+from app.security.deps import get_current_user, get_location_id, require_roles, get_db
+from app.security.ratelimit import limit_by_user
 from app.models.counts import Count
 from app.models.items import Item
 from app.models.users import User
-from app.schemas.counts import CountSubmit, CountOut, PendingListResponse, CountBatchSubmit
+from app.schemas.counts import CountSubmit, CountOut, PendingListResponse, CountBatchSubmit, CountSheet
+from app.services.catalog import catalog, CachedItem
+from app.services.count_sheet import iter_count_sheet
+from app.services.inventory import record_reset
+from app.services import outbox, queries
 
 
 router = APIRouter(prefix="/counts", tags=["Counts"])
 
 
-def _item_active_or_404(db: Session, item_id: int) -> Item:
-    item = db.query(Item).get(item_id)
+def _item_active_or_404(db: Session, location_id: int, item_id: int) -> CachedItem:
+    """
+    Validate against the location's in-memory catalog (no SQL once warm).
+    """
+    item = catalog.get(db, location_id, item_id)
     if not item or not item.is_active:
-        raise HTTPException(status_code=404, detail="Item not found or inactive")
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found or inactive")
     return item
 
 
-def _count_to_out(row: Count) -> CountOut:
+def _count_in_location_or_404(db: Session, location_id: int, count_id: int) -> Count:
+    row = db.get(Count, count_id)
+    if not row or row.location_id != location_id:
+        raise HTTPException(status_code=404, detail="Count not found")
+    return row
+
+
+def _count_to_out(row: Count, item_name: Optional[str] = None) -> CountOut:
+    if item_name is None:
+        item_name = row.item.name if row.item else ""
     return CountOut(
         id=row.id,
         item_id=row.item_id,
-        item_name=row.item.name if row.item else "",
+        item_name=item_name,
         count=row.count,
         status=row.status,  # type: ignore
         submitted_by_id=row.submitted_by,
@@ -44,37 +64,36 @@ def _count_to_out(row: Count) -> CountOut:
     "/submit",
     response_model=Union[CountOut, List[CountOut]],
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_user("counts_submit"))],
 )
 def submit_count(
     payload: Union[CountSubmit, CountBatchSubmit],
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
 ):
     """
     Accept either a single CountSubmit or a CountBatchSubmit (list of counts).
     Creates one or many 'pending' count rows.
     """
 
-    existing_pending = (
-    db.query(Count)
-    .filter(Count.item_id == item.id, Count.status == "pending")
-    .first()
-    )
-    if existing_pending:
+    payload_list = payload.counts if isinstance(payload, CountBatchSubmit) else [payload]
+
+    # Item validation is served by the catalog cache
+    items = [_item_active_or_404(db, location_id, entry.item_id) for entry in payload_list]
+
+    # One query for the whole batch instead of one per entry
+    pending_item_id = queries.pending_item_among(db, location_id, sorted({i.id for i in items}))
+    if pending_item_id is not None:
         raise HTTPException(
             status_code=409,
-            detail=f"Pending count already exists for item_id={item.id}. Please approve/reject it first."
+            detail=f"Pending count already exists for item_id={pending_item_id}. Please approve/reject it first."
         )
 
-    payload_list = payload.counts if isinstance(payload, CountBatchSubmit) else [payload]
-
     results: List[CountOut] = []
-    for entry in payload_list:
-        item = db.query(Item).get(entry.item_id)
-        if not item or not item.is_active:
-            raise HTTPException(status_code=404, detail=f"Item {entry.item_id} not found or inactive")
-
+    for entry, item in zip(payload_list, items):
         row = Count(
+            location_id=location_id,
             item_id=item.id,
             count=entry.count,
             status="pending",
@@ -84,13 +103,29 @@ def submit_count(
         )
         db.add(row)
         db.flush()  # assign ID
-        db.refresh(row)
-        results.append(_count_to_out(row))
+        results.append(_count_to_out(row, item_name=item.name))
 
+    publish(db, "counts", location_id)
     db.commit()
+    count_transitions.inc("pending", amount=len(results))
     return results[0] if len(results) == 1 else results
 
 
+@router.get(
+    "/sheet",
+    response_class=StreamingResponse,
+    responses={200: {"model": CountSheet, "content": {"application/json": {}}}},
+    dependencies=[Depends(get_current_user)],
+)
+def count_sheet(location_id: int = Depends(get_location_id)) -> StreamingResponse:
+    """
+    Everything needed to run a count, in one round trip: each active item with
+    its current qty, par level, last approved count/time and pending count id.
+    Streamed; ordered by name.
+    """
+    return StreamingResponse(iter_count_sheet(location_id), media_type="application/json")
+
+
 @router.get(
     "/pending",
     response_model=PendingListResponse,
@@ -98,6 +133,7 @@ def submit_count(
 )
 def list_pending_counts(
     db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
     item_id: Optional[int] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
@@ -105,16 +141,8 @@ def list_pending_counts(
     """
     Manager/Admin: review queue of pending counts (with pagination and optional filter by item).
     """
-    q = db.query(Count).filter(Count.status == "pending")
-    if item_id is not None:
-        q = q.filter(Count.item_id == item_id)
-
-    total = q.count()
-    rows = (
-        q.order_by(Count.submitted_at.desc())
-         .limit(limit)
-         .offset(offset)
-         .all()
+    total, rows = queries.count_page(
+        db, location_id=location_id, status="pending", item_id=item_id, limit=limit, offset=offset,
     )
     return PendingListResponse(
         items=[_count_to_out(r) for r in rows],
@@ -128,6 +156,7 @@ def list_pending_counts(
 def list_counts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
     item_id: Optional[int] = Query(None),
     mine: bool = Query(False, description="If true, return only my submissions"),
@@ -139,17 +168,15 @@ def list_counts(
     - Any authenticated user can view.
     - 'mine=true' restricts to own submissions.
     """
-    q = db.query(Count)
-
-    if status_filter:
-        q = q.filter(Count.status == status_filter)
-    if item_id:
-        q = q.filter(Count.item_id == item_id)
-    if mine:
-        q = q.filter(Count.submitted_by == current_user.id)
-
-    total = q.count()
-    rows = q.order_by(Count.submitted_at.desc()).limit(limit).offset(offset).all()
+    total, rows = queries.count_page(
+        db,
+        location_id=location_id,
+        status=status_filter or None,
+        item_id=item_id or None,
+        submitted_by=current_user.id if mine else None,
+        limit=limit,
+        offset=offset,
+    )
     return PendingListResponse(
         items=[_count_to_out(r) for r in rows],
         total=total,
@@ -161,32 +188,49 @@ def list_counts(
 @router.post(
     "/{count_id}/approve",
     response_model=CountOut,
-    dependencies=[Depends(require_roles("admin", "manager"))],
+    dependencies=[Depends(require_roles("admin", "manager")), Depends(limit_by_user("counts_review"))],
 )
 def approve_count(
     count_id: int,
     db: Session = Depends(get_db),
     reviewer: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
 ) -> CountOut:
-    row = db.query(Count).get(count_id)
-    if not row:
-        raise HTTPException(status_code=404, detail="Count not found")
+    row = _count_in_location_or_404(db, location_id, count_id)
+
+    # Lock the count, then the item (reject takes the count lock too): a racing
+    # approve/reject of this count waits here and then sees our status, and
+    # approvals of the same item serialize, so qty_before (and the below-par
+    # check on it) is the previous approval's result
+    db.refresh(row, with_for_update=True)
+    item = db.get(Item, row.item_id, with_for_update=True)
     if row.status != "pending":
         raise HTTPException(status_code=409, detail="Only pending counts can be approved")
 
     # Ensure the item still exists and is active
-    item = db.query(Item).get(row.item_id)
     if not item or not item.is_active:
         raise HTTPException(status_code=404, detail="Item not found or inactive")
 
-    # Snapshot approved value + update item live quantity
+    # Snapshot approved value; the count goes on the ledger as a reset at the
+    # time it was taken, and current_qty is recomputed from the ledger
     row.status = "approved"
     row.approved_by = reviewer.id
     row.approved_at = datetime.now(timezone.utc)
     row.approved_count = row.count                     # NEW snapshot
-    item.current_qty = row.count                       # LIVE INVENTORY SYNC
+    qty_before = item.current_qty
+    current_qty = record_reset(
+        db, location_id, item.id, "count", row.count,
+        occurred_at=row.submitted_at, count_id=row.id, user_id=reviewer.id,
+    )
+    synced = (item.location_id, item.id, current_qty)
+    # Notifications go out after commit (app.services.outbox), not on this request
+    outbox.count_approved(db, row, item, qty_before, current_qty)
 
+    publish(db, "counts", location_id, count_id)
+    publish(db, "items", location_id, item.id)          # current_qty changed
     db.commit()
+    catalog.set_qty(*synced)                           # write-through to catalog cache
+    count_transitions.inc("approved")
     db.refresh(row)
     return _count_to_out(row)
 
@@ -194,19 +238,19 @@ def approve_count(
 @router.post(
     "/{count_id}/reject",
     response_model=CountOut,
-    dependencies=[Depends(require_roles("admin", "manager"))],
+    dependencies=[Depends(require_roles("admin", "manager")), Depends(limit_by_user("counts_review"))],
 )
 def reject_count(
     count_id: int,
     db: Session = Depends(get_db),
     reviewer: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
 ) -> CountOut:
     """
     Manager/Admin: reject a pending count.
     """
-    row = db.query(Count).get(count_id)
-    if not row:
-        raise HTTPException(status_code=404, detail="Count not found")
+    row = _count_in_location_or_404(db, location_id, count_id)
+    db.refresh(row, with_for_update=True)              # serializes with approve_count
     if row.status != "pending":
         raise HTTPException(status_code=409, detail="Only pending counts can be rejected")
 
@@ -214,6 +258,8 @@ def reject_count(
     row.approved_by = reviewer.id
     row.approved_at = datetime.now(timezone.utc)
 
+    publish(db, "counts", location_id, count_id)
     db.commit()
+    count_transitions.inc("rejected")
     db.refresh(row)
     return _count_to_out(row)
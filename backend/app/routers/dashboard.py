@@ -1,35 +1,49 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Literal
 
-from app.security.deps import get_current_user, require_roles, get_db
-from app.models.items import Item
-from app.models.counts import Count
+from app.security.deps import get_current_user, get_location_id, require_roles, get_db
 from app.models.users import User
 from app.schemas.counts import CountOut
-from app.schemas.items import ItemOut
+from app.schemas.items import ItemListResponse
 from app.routers.items import _to_item_out   # reuse serializer
+from app.services.catalog import catalog
+from app.services import queries
+from app.core.db import compiled_cache_stats
+from app.services.forecast import forecasts
+from app.schemas.forecast import ForecastResponse, ItemForecastOut
+from app.schemas.dashboard import DashSummary
+from app.services.summary import get_summary, summary_cache
 
 router = APIRouter(prefix="/dash", tags=["Dashboard"])
 
 
+@router.get("/summary", response_model=DashSummary)
+def summary(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
+    top: int = Query(5, ge=0, le=50, description="How many top-deficit items to include"),
+):
+    """
+    Home-screen numbers in one query: pending, low-stock, today's approvals/
+    rejections (manager/admin only) and the top-N items by deficit.
+    Cached for a few seconds per location/role; concurrent misses share one query.
+    """
+    return get_summary(db, location_id, current_user.role, top)
+
+
 @router.get("/pending-approvals",
             response_model=List[CountOut],
             dependencies=[Depends(require_roles("admin", "manager"))])
 def pending_approvals(
     db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
 ):
     """Manager/Admin: view all pending counts needing approval."""
-    rows = (
-        db.query(Count)
-        .filter(Count.status == "pending")
-        .order_by(Count.submitted_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+    rows = queries.count_rows(db, location_id=location_id, status="pending", limit=limit, offset=offset)
     return [
         CountOut(
             id=r.id,
@@ -50,32 +64,81 @@ def pending_approvals(
     ]
 
 
-@router.get("/low-stock", response_model=List[ItemOut])
+@router.get("/low-stock", response_model=ItemListResponse)
 def low_stock(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
+    sort: Literal["name", "deficit"] = Query("name", description="name, or deficit (par_level - current_qty, largest first)"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
 ):
-    """Show all active items currently below par level."""
-    rows = (
-        db.query(Item)
-        .filter(Item.is_active == True, Item.current_qty < Item.par_level)
-        .order_by(Item.name)
-        .all()
+    """Show active items currently below par level (paginated, with the total)."""
+    # Predicate matches the partial indexes' WHERE, so both orders are index scans
+    rows = queries.low_stock_items(db, location_id, sort, limit, offset)
+    return ItemListResponse(
+        items=[_to_item_out(i) for i in rows],
+        total=queries.low_stock_total(db, location_id),
+        limit=limit,
+        offset=offset,
+    )
+
+
+@router.get("/forecast",
+            response_model=ForecastResponse,
+            dependencies=[Depends(require_roles("admin", "manager"))])
+def forecast(
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+    horizon_days: Optional[float] = Query(None, gt=0, description="Only items running out within N days"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Manager/Admin: usage forecast + suggested par levels, soonest stockout first.
+    Computed for the whole catalog in one batch and cached until the next approval.
+    """
+    snap = forecasts.get(db, location_id)
+    rows = snap.rows
+    if horizon_days is not None:
+        rows = [r for r in rows if r.days_until_stockout is not None and r.days_until_stockout <= horizon_days]
+    rows = sorted(
+        rows,
+        key=lambda r: (r.days_until_stockout is None, r.days_until_stockout or 0.0, r.item_id),
+    )
+    page = rows[offset:offset + limit]
+    return ForecastResponse(
+        generated_at=snap.generated_at,
+        window_days=snap.window_days,
+        items=[
+            ItemForecastOut(
+                item_id=r.item_id,
+                item_name=r.item_name,
+                current_qty=r.current_qty,
+                par_level=r.par_level,
+                daily_usage=r.daily_usage,
+                days_until_stockout=r.days_until_stockout,
+                suggested_par_level=r.suggested_par_level,
+                samples=r.samples,
+            )
+            for r in page
+        ],
+        total=len(rows),
+        limit=limit,
+        offset=offset,
     )
-    return [_to_item_out(i) for i in rows]
 
 
 @router.get("/my-submissions", response_model=List[CountOut])
 def my_submissions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
 ):
-    """Show counts submitted by the current user, optionally filtered by status."""
-    q = db.query(Count).filter(Count.submitted_by == current_user.id)
-    if status_filter:
-        q = q.filter(Count.status == status_filter)
-    rows = q.order_by(Count.submitted_at.desc()).all()
+    """Show counts the current user submitted at this location, optionally filtered by status."""
+    rows = queries.count_rows(db, location_id=location_id, submitted_by=current_user.id,
+                              status=status_filter or None)
 
     return [
         CountOut(
@@ -95,3 +158,11 @@ def my_submissions(
         )
         for r in rows
     ]
+
+
+@router.get("/cache-stats",
+            dependencies=[Depends(require_roles("admin"))])
+def cache_stats():
+    """Admin: hit-rate and size of the in-process caches (incl. SQLAlchemy's compiled-SQL cache)."""
+    return {"catalog": catalog.stats(), "dash_summary": summary_cache.stats(),
+            "sql_compiled": compiled_cache_stats()}
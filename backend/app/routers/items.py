@@ -1,31 +1,50 @@
 # app/routers/items.py
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Union
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 
-from app.security.deps import get_current_user, require_roles, get_db
-from app.models.items import Item
-from app.schemas.items import ItemCreate, ItemUpdate, ItemOut, ItemListResponse
+from app.core.errors import is_unique_violation
+from app.core.invalidation import publish
+from app.security.deps import get_current_user, get_location_id, require_roles, get_db
+from app.models.items import Item, UX_ITEMS_NAME_LOWER
+from app.models.users import User
+from app.services.catalog import catalog
+from app.schemas.items import (
+    ItemCreate, ItemUpdate, ItemOut, ItemListResponse, ItemImportReport, ItemImportError, ItemAsOf,
+    ItemBatchRequest, ItemBatchResponse, ITEM_BATCH_MAX,
+)
+from app.schemas.counts import CountHistoryEntry, CountHistoryPage
+from app.schemas.jobs import JobOut
+from app.routers.jobs import submit_job
+from app.services import count_history, item_csv, inventory, outbox, queries
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
 # ----- helpers ---------------------------------------------------------------
 
-def _ensure_unique_name(db: Session, name: str, exclude_id: Optional[int] = None) -> None:
+@contextmanager
+def _unique_name_guard(db: Session):
     """
-    Enforce case-insensitive uniqueness for item.name.
-    If exclude_id is provided, ignore that row (for updates).
+    Map a clash on the case-insensitive name index to 409.
+    Uniqueness is enforced by ux_items_name_lower, so there is no pre-check
+    query (and no race between two concurrent creates/renames).
     """
-    q = db.query(Item).filter(func.lower(Item.name) == func.lower(name))
-    if exclude_id is not None:
-        q = q.filter(Item.id != exclude_id)
-    if db.query(q.exists()).scalar():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Item name already exists")
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        if is_unique_violation(e, UX_ITEMS_NAME_LOWER):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Item name already exists")
+        raise
 
-def _get_item_or_404(db: Session, item_id: int) -> Item:
-    item = db.query(Item).get(item_id)
-    if not item:
+def _get_item_or_404(db: Session, item_id: int, location_id: int) -> Item:
+    item = db.get(Item, item_id)
+    if not item or item.location_id != location_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
     return item
 
@@ -35,6 +54,7 @@ def _to_item_out(item: Item) -> ItemOut:
     """
     return ItemOut(
         id=item.id,
+        location_id=item.location_id,
         name=item.name,
         base_unit=item.base_unit,
         par_level=item.par_level,
@@ -43,6 +63,26 @@ def _to_item_out(item: Item) -> ItemOut:
         is_below_par=(item.current_qty < item.par_level) if item.par_level is not None else None,
     )
 
+def _batch_get(db: Session, location_id: int, item_ids: List[int]) -> ItemBatchResponse:
+    """Many items in one go: request order kept, duplicates collapsed, misses reported."""
+    ordered = list(dict.fromkeys(item_ids))
+    found = catalog.get_many(db, location_id, ordered)
+    return ItemBatchResponse(
+        items=[_to_item_out(found[i]) for i in ordered if i in found],
+        missing=[i for i in ordered if i not in found],
+    )
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="ids must be a comma-separated list of integers")
+    if not ids or len(ids) > ITEM_BATCH_MAX:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"ids must list between 1 and {ITEM_BATCH_MAX} items")
+    return ids
+
 # ----- routes ----------------------------------------------------------------
 
 @router.post(
@@ -51,48 +91,56 @@ def _to_item_out(item: Item) -> ItemOut:
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_roles("admin", "manager"))],
 )
-def create_item(payload: ItemCreate, db: Session = Depends(get_db)) -> ItemOut:
+def create_item(
+    payload: ItemCreate,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+) -> ItemOut:
     """
     Create a new item. Admin/Manager only.
-    - Enforces case-insensitive unique name
+    - Enforces case-insensitive unique name within the location
     - Validates base_unit & par_level (handled by Pydantic)
     """
-    _ensure_unique_name(db, payload.name)
-
-    item = Item(
-        name=payload.name.strip(),
-        base_unit=payload.base_unit,
-        par_level=payload.par_level or 0,
-        is_active=True,
-        # current_qty is defaulted at DB level; setting explicitly is fine too:
-        # current_qty=0,
-    )
-    db.add(item)
-    db.commit()
-    db.refresh(item)
-    return _to_item_out(item)
+    # Single INSERT ... RETURNING; duplicate names surface as IntegrityError
+    with _unique_name_guard(db):
+        item = db.scalars(
+            insert(Item)
+            .values(
+                location_id=location_id,
+                name=payload.name.strip(),
+                base_unit=payload.base_unit,
+                par_level=payload.par_level or 0,
+                is_active=True,
+                current_qty=0,
+            )
+            .returning(Item)
+        ).one()
+        out = _to_item_out(item)  # serialize before commit expires the row
+        publish(db, "items", location_id, out.id)
+        db.commit()
+    catalog.put(out)
+    return out
 
-@router.get("", response_model=ItemListResponse)
+@router.get("", response_model=Union[ItemListResponse, ItemBatchResponse])
 def list_items(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),  # any authenticated user
+    location_id: int = Depends(get_location_id),
     q: Optional[str] = Query(None, description="Search by name (case-insensitive substring)"),
     active: Optional[bool] = Query(None, description="Filter by active status"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
-) -> ItemListResponse:
+    ids: Optional[str] = Query(None, description=f"Comma-separated ids (max {ITEM_BATCH_MAX}); "
+                                                 "returns a batch response and ignores the other filters"),
+) -> Union[ItemListResponse, ItemBatchResponse]:
     """
     List items with optional search, active filter, and pagination.
+    Served from the in-memory catalog (no SQL once warm).
+    With ?ids=1,2,3 this is the GET form of POST /items/batch-get.
     """
-    query = db.query(Item)
-
-    if q:
-        query = query.filter(func.lower(Item.name).like(f"%{q.lower()}%"))
-    if active is not None:
-        query = query.filter(Item.is_active == active)
-
-    total = query.count()
-    rows = query.order_by(func.lower(Item.name)).limit(limit).offset(offset).all()
+    if ids is not None:
+        return _batch_get(db, location_id, _parse_ids(ids))
+    total, rows = catalog.list(db, location_id, q=q, active=active, limit=limit, offset=offset)
 
     return ItemListResponse(
         items=[_to_item_out(i) for i in rows],
@@ -101,18 +149,156 @@ def list_items(
         offset=offset,
     )
 
+@router.post("/batch-get", response_model=ItemBatchResponse)
+def batch_get_items(
+    payload: ItemBatchRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
+) -> ItemBatchResponse:
+    """
+    Fetch up to ITEM_BATCH_MAX items by id in one request (count sheets
+    resolving their item list). Items come back in request order; ids that
+    don't exist in this location are listed under `missing`.
+    """
+    return _batch_get(db, location_id, payload.ids)
+
+# ----- bulk CSV (declared before /{item_id} so the paths don't collide) ------
+
+@router.post(
+    "/import",
+    response_model=Union[ItemImportReport, JobOut],
+)
+def import_items(
+    response: Response,
+    body: bytes = Body(..., media_type="text/csv"),
+    dry_run: bool = Query(False, description="Validate only; write nothing"),
+    background: bool = Query(False, description="Queue as a job; 202 + Location: /jobs/{id}"),
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+    current_user: User = Depends(require_roles("admin")),
+) -> Union[ItemImportReport, JobOut]:
+    """
+    Bulk create/update the location's items from a CSV body (Content-Type: text/csv). Admin only.
+    - Header row required: name, base_unit[, par_level, is_active]
+    - Upserts case-insensitively on name; invalid rows are skipped and reported
+    - background=true: returns 202 with the job; the report lands in the job's result
+    """
+    if background:
+        try:
+            csv_text = body.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return submit_job(db, response, location_id, current_user, "items.import",
+                          {"csv": csv_text, "dry_run": dry_run})
+
+    try:
+        result = item_csv.import_items_csv(
+            db, location_id, item_csv.decode_csv_bytes(body), dry_run=dry_run
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if dry_run:
+        db.rollback()
+    else:
+        publish(db, "items", location_id)
+        db.commit()
+        catalog.invalidate(location_id)
+
+    return ItemImportReport(
+        inserted=result.inserted,
+        updated=result.updated,
+        skipped=len(result.errors),
+        dry_run=result.dry_run,
+        errors=[ItemImportError(line=e.line, name=e.name, error=e.error) for e in result.errors],
+    )
+
+@router.get(
+    "/export",
+    dependencies=[Depends(require_roles("admin"))],
+)
+def export_items(location_id: int = Depends(get_location_id)) -> StreamingResponse:
+    """
+    Stream the location's catalog as CSV (COPY TO STDOUT). Admin only.
+    """
+    return StreamingResponse(
+        item_csv.iter_items_csv(location_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="items.csv"'},
+    )
+
 @router.get("/{item_id}", response_model=ItemOut)
 def get_item(
     item_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
 ) -> ItemOut:
     """
     Get a single item by id. Any authenticated user.
     """
-    item = _get_item_or_404(db, item_id)
+    item = catalog.get(db, location_id, item_id)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
     return _to_item_out(item)
 
+@router.get("/{item_id}/as-of", response_model=ItemAsOf)
+def get_item_as_of(
+    item_id: int,
+    ts: datetime = Query(..., description="Point in time (ISO 8601; naive = UTC)"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
+) -> ItemAsOf:
+    """
+    On-hand quantity at a past moment: nearest snapshot/count at or before ts
+    plus the ledger movements between it and ts. Any authenticated user.
+    """
+    if catalog.get(db, location_id, item_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    r = inventory.as_of(db, item_id, ts)
+    return ItemAsOf(
+        item_id=r.item_id, ts=r.ts, qty=r.qty, anchor_source=r.anchor_source,
+        anchor_at=r.anchor_at, movements_applied=r.movements,
+    )
+
+@router.get("/{item_id}/history", response_model=CountHistoryPage)
+def get_item_history(
+    item_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+    location_id: int = Depends(get_location_id),
+) -> CountHistoryPage:
+    """
+    The item's counts, newest first, each with its variance against the
+    previous approved count. Any authenticated user.
+    """
+    if catalog.get(db, location_id, item_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    try:
+        before = count_history.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor")
+    rows, next_cursor = count_history.item_history(db, item_id, limit, before)
+    return CountHistoryPage(
+        item_id=item_id,
+        items=[
+            CountHistoryEntry(
+                id=r.id, count=r.count, status=r.status, submitted_at=r.submitted_at,
+                submitted_by_name=r.submitted_by_name, notes=r.notes, approved_at=r.approved_at,
+                approved_by_name=r.approved_by_name, approved_count=r.approved_count,
+                previous_approved_count=r.previous_approved_count,
+                variance=None if r.previous_approved_count is None else r.count - r.previous_approved_count,
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
 @router.put(
     "/{item_id}",
     response_model=ItemOut,
@@ -122,47 +308,74 @@ def update_item(
     item_id: int,
     payload: ItemUpdate,
     db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
 ) -> ItemOut:
     """
     Update an item. Admin/Manager only.
     - Optional fields; only provided ones are applied.
     - Name uniqueness is enforced when name changes.
     """
-    item = _get_item_or_404(db, item_id)
-
+    changes = {}
     if payload.name is not None:
-        new_name = payload.name.strip()
-        if new_name != item.name:
-            _ensure_unique_name(db, new_name, exclude_id=item.id)
-        item.name = new_name
-
+        changes["name"] = payload.name.strip()
     if payload.base_unit is not None:
-        item.base_unit = payload.base_unit
-
+        changes["base_unit"] = payload.base_unit
     if payload.par_level is not None:
-        item.par_level = payload.par_level
-
+        changes["par_level"] = payload.par_level
     if payload.is_active is not None:
-        item.is_active = payload.is_active
+        changes["is_active"] = payload.is_active
 
-    db.commit()
-    db.refresh(item)
-    return _to_item_out(item)
+    if not changes:
+        return _to_item_out(_get_item_or_404(db, item_id, location_id))
+
+    # Par edits can put the item below par (outbox event): lock and read the old values first
+    before = None
+    if "par_level" in changes:
+        before = db.execute(
+            select(Item.current_qty, Item.par_level)
+            .where(Item.id == item_id, Item.location_id == location_id)
+            .with_for_update()
+        ).one_or_none()
+
+    # Single UPDATE ... RETURNING: no row -> 404, name clash -> 409
+    with _unique_name_guard(db):
+        item = db.scalars(
+            update(Item)
+            .where(Item.id == item_id, Item.location_id == location_id)
+            .values(**changes)
+            .returning(Item)
+        ).one_or_none()
+        if item is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+        out = _to_item_out(item)
+        if before is not None:
+            outbox.par_changed(db, item, before.current_qty, before.par_level)
+        publish(db, "items", location_id, item_id)
+        db.commit()
+    catalog.put(out)
+    return out
 
 @router.delete(
     "/{item_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[Depends(require_roles("admin", "manager"))],
 )
-def soft_delete_item(item_id: int, db: Session = Depends(get_db)) -> None:
+def soft_delete_item(
+    item_id: int,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+) -> None:
     """
     Soft-delete an item by setting is_active=False. Idempotent.
     Admin/Manager only.
     """
-    item = _get_item_or_404(db, item_id)
+    item = _get_item_or_404(db, item_id, location_id)
     if item.is_active:
         item.is_active = False
+        out = _to_item_out(item)
+        publish(db, "items", location_id, item_id)
         db.commit()
+        catalog.put(out)
     # 204 No Content (nothing to return)
 
 @router.post(
@@ -170,16 +383,23 @@ def soft_delete_item(item_id: int, db: Session = Depends(get_db)) -> None:
     response_model=ItemOut,
     dependencies=[Depends(require_roles("admin", "manager"))],
 )
-def restore_item(item_id: int, db: Session = Depends(get_db)) -> ItemOut:
+def restore_item(
+    item_id: int,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+) -> ItemOut:
     """
     Restore a soft-deleted item by setting is_active=True.
     Admin/Manager only.
     """
-    item = _get_item_or_404(db, item_id)
+    item = _get_item_or_404(db, item_id, location_id)
     if not item.is_active:
         item.is_active = True
+        out = _to_item_out(item)
+        publish(db, "items", location_id, item_id)
         db.commit()
-        db.refresh(item)
+        catalog.put(out)
+        return out
     return _to_item_out(item)
 
 # HARD DELETE (admin only): permanently remove an item if it has no history.
@@ -197,23 +417,32 @@ except Exception:
 def hard_delete_item(
     item_id: int,
     db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
 ):
     """
     Permanently delete an item **only if** it has no dependent history.
     - Admin only.
     - If the `counts` table exists and any row references this item -> 409 Conflict.
-    - Otherwise, the row is removed from the DB (no soft-delete).
+    - Any ledger movement beyond the opening balance -> 409 Conflict.
+    - Otherwise the opening balance, its snapshots and the row are removed (no soft-delete).
     """
-    item = _get_item_or_404(db, item_id)
+    item = _get_item_or_404(db, item_id, location_id)
 
     if HAS_COUNTS:
-        exists = db.query(Count).filter(Count.item_id == item.id).first() is not None
-        if exists:
+        if queries.item_has_counts(db, item.id):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Cannot hard-delete: item has historical counts. Use soft delete instead.",
             )
+    if inventory.has_movements(db, item.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cannot hard-delete: item has stock movements. Use soft delete instead.",
+        )
 
+    inventory.purge_item(db, item.id)
     db.delete(item)
+    publish(db, "items", location_id, item_id)
     db.commit()
+    catalog.discard(location_id, item_id)
     # 204 No Content
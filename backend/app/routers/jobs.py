@@ -0,0 +1,107 @@
+# app/routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, undefer
+
+from app.models.jobs import Job
+from app.models.users import User
+from app.schemas.jobs import JobCreate, JobOut
+from app.security.deps import get_current_user, get_location_id, get_db
+from app.services.jobs import enqueue, get_kind, job_runner
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# ----- helpers ---------------------------------------------------------------
+
+def _job_to_out(job: Job) -> JobOut:
+    return JobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,  # type: ignore
+        progress=job.progress,
+        message=job.message,
+        result=job.result,
+        error=job.error,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        has_output=job.output_type is not None,
+    )
+
+def _job_visible_or_404(db: Session, job_id: int, location_id: int, user: User, *options) -> Job:
+    """Same location, and either the creator or an admin/manager."""
+    job = db.get(Job, job_id, options=list(options))
+    if (
+        not job
+        or job.location_id != location_id
+        or (job.created_by != user.id and user.role not in ("admin", "manager"))
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+def submit_job(db: Session, response: Response, location_id: int, user: User, kind: str,
+               params: dict) -> JobOut:
+    """Enqueue + commit + wake the runner; sets 202 and Location. Shared with 202 flows elsewhere."""
+    spec = get_kind(kind)
+    if spec is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown job kind {kind!r}")
+    if user.role not in spec.roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient privileges")
+    try:
+        job = enqueue(db, location_id, kind, params, created_by=user.id)
+    except ValidationError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=e.errors(include_url=False, include_context=False))
+    db.commit()
+    job_runner.wake()
+    response.status_code = status.HTTP_202_ACCEPTED
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return _job_to_out(job)
+
+# ----- routes ----------------------------------------------------------------
+
+@router.post("", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    payload: JobCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+    current_user: User = Depends(get_current_user),
+) -> JobOut:
+    """
+    Queue a background job and return immediately (202 + Location: /jobs/{id}).
+    Allowed roles depend on the kind; poll GET /jobs/{id} for progress.
+    """
+    return submit_job(db, response, location_id, current_user, payload.kind, payload.params)
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+    current_user: User = Depends(get_current_user),
+) -> JobOut:
+    """Status, progress and (once finished) result or error of a job."""
+    return _job_to_out(_job_visible_or_404(db, job_id, location_id, current_user))
+
+@router.get("/{job_id}/output")
+def get_job_output(
+    job_id: int,
+    db: Session = Depends(get_db),
+    location_id: int = Depends(get_location_id),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    """Download a finished job's file output (e.g. items.export CSV)."""
+    job = _job_visible_or_404(db, job_id, location_id, current_user, undefer(Job.output))
+    if job.status != "succeeded":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+    if job.output_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job has no output")
+    return Response(
+        content=job.output,
+        media_type=job.output_type,
+        headers={"Content-Disposition": f'attachment; filename="job-{job.id}"'},
+    )
@@ -38,3 +38,40 @@ class PendingListResponse(BaseModel):
 
 class CountBatchSubmit(BaseModel):
     counts: List[CountSubmit]
+
+
+class CountSheetLine(BaseModel):
+    item_id: int
+    name: str
+    base_unit: str
+    par_level: int
+    current_qty: int
+    last_count: Optional[int] = None            # most recent approved count
+    last_counted_at: Optional[datetime] = None  # when it was approved
+    pending_count_id: Optional[int] = None      # open count awaiting review, if any
+
+
+class CountSheet(BaseModel):
+    location_id: int
+    generated_at: datetime
+    items: List[CountSheetLine]
+
+
+class CountHistoryEntry(BaseModel):
+    id: int
+    count: int
+    status: Status
+    submitted_at: datetime
+    submitted_by_name: str
+    notes: Optional[str] = None
+    approved_at: Optional[datetime] = None
+    approved_by_name: Optional[str] = None
+    approved_count: Optional[int] = None
+    previous_approved_count: Optional[int] = None  # last approved count submitted before this one
+    variance: Optional[int] = None                 # count - previous_approved_count
+
+
+class CountHistoryPage(BaseModel):
+    item_id: int
+    items: List[CountHistoryEntry]                 # newest first
+    next_cursor: Optional[str] = None              # pass as ?cursor= for older entries
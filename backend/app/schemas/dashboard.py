@@ -0,0 +1,25 @@
+# app/schemas/dashboard.py
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.schemas.items import BaseUnit
+
+
+class DeficitItem(BaseModel):
+    id: int
+    name: str
+    base_unit: BaseUnit
+    par_level: int
+    current_qty: int
+    deficit: int                              # par_level - current_qty
+
+
+class DashSummary(BaseModel):
+    generated_at: datetime
+    pending: Optional[int] = None             # manager/admin only
+    approved_today: Optional[int] = None      # manager/admin only
+    rejected_today: Optional[int] = None      # manager/admin only
+    low_stock: int
+    top_deficit: List[DeficitItem]
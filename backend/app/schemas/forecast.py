@@ -0,0 +1,25 @@
+# app/schemas/forecast.py
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ItemForecastOut(BaseModel):
+    item_id: int
+    item_name: str
+    current_qty: int
+    par_level: int
+    daily_usage: float                           # base units per day
+    days_until_stockout: Optional[float] = None  # None = no measurable usage
+    suggested_par_level: Optional[int] = None    # None = not enough history
+    samples: int                                 # approved counts in the window
+
+
+class ForecastResponse(BaseModel):
+    generated_at: datetime
+    window_days: int
+    items: List[ItemForecastOut]
+    total: int
+    limit: int
+    offset: int
@@ -1,10 +1,14 @@
 # app/schemas/items.py
+from datetime import datetime
 from typing import Optional, List, Literal
 from pydantic import BaseModel, Field
 
 # Allowed base units for MVP
 BaseUnit = Literal["g", "ml", "pcs"]
 
+# Most ids one batch fetch may ask for
+ITEM_BATCH_MAX = 200
+
 class ItemBase(BaseModel):
     name: str = Field(min_length=1, max_length=120)
     base_unit: BaseUnit
@@ -26,6 +30,7 @@ class ItemUpdate(BaseModel):
 
 class ItemOut(BaseModel):
     id: int
+    location_id: int
     name: str
     base_unit: BaseUnit
     par_level: int
@@ -41,3 +46,30 @@ class ItemListResponse(BaseModel):
     total: int
     limit: int
     offset: int
+
+class ItemBatchRequest(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=ITEM_BATCH_MAX)
+
+class ItemBatchResponse(BaseModel):
+    items: List[ItemOut]                 # in request order, duplicates collapsed
+    missing: List[int]                   # requested ids not found in this location
+
+class ItemImportError(BaseModel):
+    line: int                            # 1-based line in the uploaded CSV
+    name: Optional[str] = None
+    error: str
+
+class ItemImportReport(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
+    dry_run: bool
+    errors: List[ItemImportError]
+
+class ItemAsOf(BaseModel):
+    item_id: int
+    ts: datetime
+    qty: int                             # on hand at ts, from the inventory ledger
+    anchor_source: Optional[Literal["snapshot", "count", "opening"]] = None
+    anchor_at: Optional[datetime] = None
+    movements_applied: int               # ledger deltas added on top of the anchor
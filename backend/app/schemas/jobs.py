@@ -0,0 +1,28 @@
+# app/schemas/jobs.py
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobCreate(BaseModel):
+    kind: str = Field(min_length=1, max_length=60)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    progress: float                      # 0..1
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    has_output: bool                     # GET /jobs/{id}/output once succeeded
@@ -1,10 +1,11 @@
 # app/security/deps.py
 from typing import Callable, Iterable, List, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from app.core.orm import SessionLocal
 from app.models.users import User
+from app.models.locations import Location
 from app.security.jwt import decode_token
 
 # Re-usable HTTP Bearer parser (looks for Authorization: Bearer <token>)
@@ -65,8 +66,37 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # 'loc' pins the token to the user's store; a moved user must log in again
+    if payload.get("loc") is not None and payload.get("loc") != user.location_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return user
 
+def get_location_id(
+    x_location_id: Optional[int] = Header(None, description="Admin only: act on another location"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> int:
+    """
+    Location scoping every items/counts/dash query.
+    Defaults to the user's own location; admins may switch with X-Location-Id.
+    """
+    if x_location_id is None or x_location_id == current_user.location_id:
+        return current_user.location_id
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient privileges for this location",
+        )
+    loc = db.get(Location, x_location_id)
+    if not loc or not loc.is_active:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Location not found")
+    return loc.id
+
 def require_roles(*allowed_roles: str) -> Callable[[User], User]:
     """
     Factory that returns a dependency enforcing that current_user.role is allowed.
@@ -75,7 +105,10 @@ def require_roles(*allowed_roles: str) -> Callable[[User], User]:
         def handler(current_user: User = Depends(require_roles("admin","manager"))):
             ...
     """
-    def _dep(current_user: User = Depends(get_current_user)) -> User:
+    def _dep(
+        current_user: User = Depends(get_current_user),
+        location_id: int = Depends(get_location_id),  # also rejects foreign X-Location-Id
+    ) -> User:
         if current_user.role not in allowed_roles:
             # Authenticated but not permitted
             raise HTTPException(
@@ -1,15 +1,13 @@
 # app/security/jwt.py
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any, Dict
-import os
 from jose import jwt, JWTError
-from dotenv import load_dotenv
 
-load_dotenv()  # take environment variables from .env file
+from app.core.config import settings
 
-SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret-change-me") 
-ALGORITHM = os.getenv("JWT_ALG", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MIN", "60"))
+SECRET_KEY = settings.jwt_secret
+ALGORITHM = settings.jwt_alg
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.jwt_expire_min
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -1,10 +1,22 @@
 # app/security/passwords.py
+import time
+
 from passlib.context import CryptContext
 
+from app.core.metrics import bcrypt_time
+
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(plain_password: str) -> str:
-    return _pwd_context.hash(plain_password)
+    started = time.perf_counter()
+    try:
+        return _pwd_context.hash(plain_password)
+    finally:
+        bcrypt_time.observe("hash", value=time.perf_counter() - started)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return _pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return _pwd_context.verify(plain_password, hashed_password)
+    finally:
+        bcrypt_time.observe("verify", value=time.perf_counter() - started)
@@ -0,0 +1,208 @@
+# app/security/ratelimit.py
+"""
+Token-bucket rate limits for login and write endpoints.
+
+Each rule is "BURST/SECONDS": up to BURST requests at once, refilling at
+BURST per SECONDS. Buckets are keyed by rule plus client IP, email or user
+id. A refused request gets 429 with Retry-After (seconds until a token is
+available) and does not spend a token.
+
+    RATE_LIMIT_LOGIN_IP=30/60          # override a rule; "off" disables it
+    RATE_LIMIT_BACKEND=memory|postgres
+
+- memory (default): per-process dict under a lock; a check is a dict lookup
+  and a little arithmetic. With N workers the effective limit is up to N×.
+- postgres: one UPSERT per check on the UNLOGGED rate_limit_buckets table,
+  shared by every worker. If the database can't answer, requests are let
+  through (logged): the limiter must not turn a DB blip into a login outage.
+
+Client IP is the socket peer; set RATE_LIMIT_TRUST_PROXY=1 behind a reverse
+proxy to use the last X-Forwarded-For hop (the one the proxy appended).
+"""
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+from app.models.users import User
+from app.security.deps import get_current_user
+
+log = logging.getLogger(__name__)
+
+MEMORY_MAX_KEYS = 100_000
+PRUNE_INTERVAL_SEC = 300
+
+rate_limited = registry.register(Counter(
+    "pantrypal_rate_limited_total", "Requests refused by a rate limit rule.", ("rule",)))
+
+
+class Limit(NamedTuple):
+    burst: float
+    per_sec: float      # refill rate
+
+
+def parse_limit(spec: str) -> Optional[Limit]:
+    """'30/60' -> Limit(30, 0.5); 'off' / '0' -> None."""
+    spec = spec.strip().lower()
+    if spec in ("", "0", "off", "none"):
+        return None
+    burst, _, period = spec.partition("/")
+    burst, period = float(burst), float(period or 1)
+    if burst <= 0 or period <= 0:
+        raise ValueError(f"Bad rate limit {spec!r} (expected BURST/SECONDS)")
+    return Limit(burst, burst / period)
+
+
+def load_rules() -> Dict[str, Optional[Limit]]:
+    """The rules from settings (defaults: app.core.config.DEFAULT_RATE_LIMITS)."""
+    return {name: parse_limit(spec) for name, spec in settings.rate_limits}
+
+
+# ----- stores ----------------------------------------------------------------
+
+class MemoryStore:
+    def __init__(self, max_keys: int = MEMORY_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        self._buckets: Dict[str, tuple] = {}    # key -> (tokens, monotonic stamp, limit)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit, cost: float = 1) -> float:
+        """Spend `cost` tokens; returns 0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                tokens = limit.burst
+            else:
+                tokens = min(limit.burst, b[0] + (now - b[1]) * limit.per_sec)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now, limit)
+                return 0.0
+            self._buckets[key] = (tokens, now, limit)
+            return (cost - tokens) / limit.per_sec
+
+    def _prune(self, now: float) -> None:
+        # Full buckets carry no state; if that isn't enough, drop the oldest half
+        full = [k for k, (t, at, lim) in self._buckets.items()
+                if t + (now - at) * lim.per_sec >= lim.burst]
+        for k in full:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            for k in sorted(self._buckets, key=lambda k: self._buckets[k][1])[: self.max_keys // 2]:
+                del self._buckets[k]
+
+
+_TAKE_SQL = text("""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (:key, :burst - :cost, now())
+    ON CONFLICT (key) DO UPDATE
+    SET tokens = least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate) - :cost,
+        updated_at = now()
+    WHERE least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate) >= :cost
+    RETURNING tokens
+""")
+
+_TOKENS_SQL = text("""
+    SELECT least(:burst, tokens + extract(epoch FROM now() - updated_at) * :rate)
+    FROM rate_limit_buckets WHERE key = :key
+""")
+
+_PRUNE_SQL = text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(secs => :age)")
+
+
+class PostgresStore:
+    def __init__(self, engine=None) -> None:
+        if engine is None:
+            from app.core.db import engine
+        self.engine = engine
+        self._next_prune = 0.0
+
+    def take(self, key: str, limit: Limit, cost: float = 1) -> float:
+        params = {"key": key, "burst": limit.burst, "rate": limit.per_sec, "cost": cost}
+        try:
+            with self.engine.connect() as conn:
+                if conn.execute(_TAKE_SQL, params).first() is not None:
+                    conn.commit()
+                    self._maybe_prune(conn)
+                    return 0.0
+                tokens = conn.execute(_TOKENS_SQL, params).scalar() or 0.0
+                conn.commit()
+        except Exception as e:
+            log.warning("ratelimit: shared store unavailable, allowing %s (%s)", key, e)
+            return 0.0
+        return max((cost - tokens) / limit.per_sec, 0.001)
+
+    def _maybe_prune(self, conn) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + PRUNE_INTERVAL_SEC
+        # Older than any rule's full refill: indistinguishable from a fresh bucket
+        conn.execute(_PRUNE_SQL, {"age": 86400})
+        conn.commit()
+
+
+def make_store(name: str = settings.rate_limit_backend):
+    if name == "memory":
+        return MemoryStore()
+    if name == "postgres":
+        if not settings.database_url.startswith("postgresql"):
+            raise ValueError("RATE_LIMIT_BACKEND=postgres needs a PostgreSQL DATABASE_URL")
+        return PostgresStore()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {name!r} (expected 'memory' or 'postgres')")
+
+
+# ----- limiter ---------------------------------------------------------------
+
+class RateLimiter:
+    def __init__(self, store, rules: Dict[str, Optional[Limit]], enabled: bool = True) -> None:
+        self.store = store
+        self.rules = rules
+        self.enabled = enabled
+
+    def check(self, rule: str, key, cost: float = 1) -> None:
+        """Spend from the rule's bucket for `key`; raises 429 with Retry-After when empty."""
+        limit = self.rules[rule]
+        if not self.enabled or limit is None:
+            return
+        wait = self.store.take(f"{rule}:{key}", limit, cost)
+        if wait:
+            rate_limited.inc(rule)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests; slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+limiter = RateLimiter(make_store(), load_rules(), enabled=settings.rate_limit_enabled)
+
+
+def client_ip(request: Request) -> str:
+    if settings.rate_limit_trust_proxy:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def limit_by_ip(rule: str) -> Callable[[Request], None]:
+    """Dependency: spend from `rule` keyed by client IP (runs before the body is used)."""
+    def _dep(request: Request) -> None:
+        limiter.check(rule, client_ip(request))
+    return _dep
+
+
+def limit_by_user(rule: str) -> Callable[..., None]:
+    """Dependency: spend from `rule` keyed by the authenticated user's id."""
+    def _dep(current_user: User = Depends(get_current_user)) -> None:
+        limiter.check(rule, current_user.id)
+    return _dep
@@ -6,12 +6,17 @@ from app.core.orm import SessionLocal
 from app.models.users import User
 from app.models.items import Item
 from app.models.counts import Count
+from app.models.locations import DEFAULT_LOCATION_ID
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(func.lower(User.email) == func.lower(email)).first()
 
 def get_item(db: Session, name: str) -> Item | None:
-    return db.query(Item).filter(func.lower(Item.name) == func.lower(name)).first()
+    return (
+        db.query(Item)
+        .filter(Item.location_id == DEFAULT_LOCATION_ID, func.lower(Item.name) == func.lower(name))
+        .first()
+    )
 
 def run():
     db: Session = SessionLocal()
@@ -35,15 +40,15 @@ def run():
         # Create a few historical counts:
         demo_counts = [
             # pending
-            Count(item_id=oil.id, count=1400, status="pending",
+            Count(location_id=oil.location_id, item_id=oil.id, count=1400, status="pending",
                   submitted_by=counter.id, submitted_at=now - timedelta(hours=2), notes="closing shift"),
             # approved (snapshot + inventory sync is done by router in real flow, but we set here for demo)
-            Count(item_id=tomatoes.id, count=10, status="approved", approved_count=10,
+            Count(location_id=tomatoes.location_id, item_id=tomatoes.id, count=10, status="approved", approved_count=10,
                   submitted_by=counter.id, approved_by=manager.id,
                   submitted_at=now - timedelta(days=1, hours=3), approved_at=now - timedelta(days=1, hours=2),
                   notes="prep"),
             # rejected
-            Count(item_id=rice.id, count=2500, status="rejected",
+            Count(location_id=rice.location_id, item_id=rice.id, count=2500, status="rejected",
                   submitted_by=counter.id, submitted_at=now - timedelta(days=2), notes="inaccurate"),
         ]
 
@@ -1,8 +1,11 @@
 # app/seed_items.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.core.db import dialect_name
 from app.core.orm import SessionLocal
-from app.models.items import Item
+from app.models.items import Item, ITEM_NAME_KEY
+from app.models.locations import DEFAULT_LOCATION_ID
+from app.services.inventory import record_reset
 
 DEMO_ITEMS = [
     {"name": "Tomatoes",        "base_unit": "pcs", "par_level": 15, "current_qty": 8},
@@ -12,29 +15,33 @@ DEMO_ITEMS = [
     {"name": "Onions",          "base_unit": "pcs", "par_level": 20, "current_qty": 18},
 ]
 
-def upsert_item(db: Session, data: dict):
-    existing = (
-        db.query(Item)
-        .filter(func.lower(Item.name) == func.lower(data["name"]))
-        .first()
-    )
-    if existing:
-        # update only fields we control in seed
-        existing.base_unit = data["base_unit"]
-        existing.par_level = data["par_level"]
-        existing.current_qty = data["current_qty"]
-        existing.is_active = True
-        return existing
-
-    new_item = Item(
+def upsert_item(db: Session, data: dict, location_id: int = DEFAULT_LOCATION_ID):
+    """
+    Single-statement upsert keyed on the case-insensitive name index
+    (`ON CONFLICT (location_id, lower(name))`), so re-running the seed never SELECTs first.
+    The seeded on-hand quantity goes on the inventory ledger as an opening balance.
+    """
+    insert = sqlite.insert if dialect_name(db) == "sqlite" else postgresql.insert
+    stmt = insert(Item).values(
+        location_id=location_id,
         name=data["name"],
         base_unit=data["base_unit"],
         par_level=data["par_level"],
         current_qty=data["current_qty"],
         is_active=True,
     )
-    db.add(new_item)
-    return new_item
+    # update only fields we control in seed
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ITEM_NAME_KEY),
+        set_={
+            "base_unit": stmt.excluded.base_unit,
+            "par_level": stmt.excluded.par_level,
+            "current_qty": stmt.excluded.current_qty,
+            "is_active": True,
+        },
+    )
+    item_id = db.execute(stmt.returning(Item.id)).scalar_one()
+    record_reset(db, location_id, item_id, "opening", data["current_qty"])
 
 def run():
     db: Session = SessionLocal()
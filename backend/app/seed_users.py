@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from app.core.orm import SessionLocal, Base
 from app.models.users import User
+from app.models.locations import DEFAULT_LOCATION_ID
 from app.security.passwords import hash_password
 
 def seed_users():
@@ -27,6 +28,7 @@ def seed_users():
             email=user["email"],
             name=user["name"],
             role=user["role"],
+            location_id=DEFAULT_LOCATION_ID,
             password_hash=hash_password(user["password"]),
             is_active=True,
         )
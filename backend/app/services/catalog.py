@@ -0,0 +1,269 @@
+# app/services/catalog.py
+"""
+Process-local item catalog cache.
+
+The items table is small and read far more often than it is written, so we
+keep the catalog in memory and serve reads (get/list, item validation on count
+submit) without SQL. It is partitioned by location: each store's slice loads
+lazily with one SELECT and is sized by that store alone. Writers call
+put()/set_qty()/discard() after their commit succeeds (write-through), or
+invalidate() to force a reload; other workers hear about it over the
+invalidation bus and drop the location's slice.
+
+A slice loads outside the lock, so every write bumps its location's
+generation: a load that saw a write land while its SELECT ran (possibly
+before the write committed) serves its rows once but doesn't install them.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.invalidation import InvalidationEvent, bus
+from app.models.items import Item
+from app.services import queries
+
+
+class CachedItem:
+    """
+    Compact, immutable-by-convention snapshot of one items row.
+    Duck-types as Item for serializers (_to_item_out).
+    """
+    __slots__ = ("id", "location_id", "name", "base_unit", "par_level", "is_active",
+                 "current_qty", "name_key")
+
+    def __init__(self, id: int, location_id: int, name: str, base_unit: str, par_level: int,
+                 is_active: bool, current_qty: int):
+        self.id = id
+        self.location_id = location_id
+        self.name = name
+        self.base_unit = base_unit
+        self.par_level = par_level
+        self.is_active = is_active
+        self.current_qty = current_qty
+        self.name_key = name.lower()
+
+    @classmethod
+    def from_row(cls, row) -> "CachedItem":
+        """Build from anything with Item's attributes (ORM Item, ItemOut, Row)."""
+        return cls(row.id, row.location_id, row.name, row.base_unit, row.par_level or 0,
+                   bool(row.is_active), row.current_qty or 0)
+
+
+class _LocationSlice:
+    """One store's catalog: indexes by id and lowercased name."""
+    __slots__ = ("by_id", "by_name", "sorted")
+
+    def __init__(self) -> None:
+        self.by_id: Dict[int, CachedItem] = {}
+        self.by_name: Dict[str, int] = {}
+        self.sorted: Optional[List[CachedItem]] = None  # ordered by lower(name), rebuilt on demand
+
+
+class CatalogCache:
+    """
+    Per-location catalog cache indexed by id and lowercased name.
+    Each location loads lazily on first use with a single SELECT.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._slices: Dict[int, _LocationSlice] = {}
+        self._generations: Dict[int, int] = {}    # per location, bumped by every write
+        self._epoch = 0                           # bumped by invalidate() of everything
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    # ----- loading ---------------------------------------------------------
+
+    def _slice(self, db: Session, location_id: int) -> _LocationSlice:
+        sl = self._slices.get(location_id)
+        if sl is not None:
+            return sl
+        with self._lock:
+            started = self._generation(location_id)
+        rows = db.execute(
+            select(Item.id, Item.location_id, Item.name, Item.base_unit, Item.par_level,
+                   Item.is_active, Item.current_qty)
+            .where(Item.location_id == location_id)
+        ).all()
+        with self._lock:
+            sl = self._slices.get(location_id)
+            if sl is not None:
+                return sl
+            sl = _LocationSlice()
+            for r in rows:
+                entry = CachedItem.from_row(r)
+                sl.by_id[entry.id] = entry
+                sl.by_name[entry.name_key] = entry.id
+            if self._generation(location_id) == started:
+                self._slices[location_id] = sl
+                self.loads += 1
+        return sl
+
+    def _generation(self, location_id: int) -> Tuple[int, int]:
+        # Caller holds the lock
+        return self._epoch, self._generations.get(location_id, 0)
+
+    def _bump(self, location_id: int) -> None:
+        # Caller holds the lock
+        self._generations[location_id] = self._generations.get(location_id, 0) + 1
+
+    # ----- reads -----------------------------------------------------------
+
+    def get(self, db: Session, location_id: int, item_id: int) -> Optional[CachedItem]:
+        """
+        Item by id within a location. A miss falls back to the DB (the row may
+        have been created by another process) and populates the cache if found.
+        """
+        sl = self._slice(db, location_id)
+        entry = sl.by_id.get(item_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        row = db.get(Item, item_id)
+        if row is None or row.location_id != location_id:
+            return None
+        return self.put(row)
+
+    def get_many(self, db: Session, location_id: int, item_ids: List[int]) -> Dict[int, CachedItem]:
+        """
+        Items by id within a location, keyed by id; ids not found are absent.
+        All misses are resolved with a single query.
+        """
+        sl = self._slice(db, location_id)
+        found: Dict[int, CachedItem] = {}
+        missing = []
+        for item_id in item_ids:
+            entry = sl.by_id.get(item_id)
+            if entry is not None:
+                found[item_id] = entry
+            else:
+                missing.append(item_id)
+        self.hits += len(found)
+        if missing:
+            self.misses += len(missing)
+            for row in queries.items_by_ids(db, location_id, missing):
+                found[row.id] = self.put(row)
+        return found
+
+    def get_by_name(self, db: Session, location_id: int, name: str) -> Optional[CachedItem]:
+        sl = self._slice(db, location_id)
+        item_id = sl.by_name.get(name.strip().lower())
+        if item_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return sl.by_id.get(item_id)
+
+    def list(
+        self,
+        db: Session,
+        location_id: int,
+        q: Optional[str] = None,
+        active: Optional[bool] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[int, List[CachedItem]]:
+        """
+        Same semantics as the SQL listing: case-insensitive substring search,
+        optional active filter, ordered by lower(name). Returns (total, page).
+        """
+        sl = self._slice(db, location_id)
+        ordered = sl.sorted
+        if ordered is None:
+            with self._lock:
+                ordered = sorted(sl.by_id.values(), key=lambda e: e.name_key)
+                sl.sorted = ordered
+        self.hits += 1
+
+        if q or active is not None:
+            needle = q.lower() if q else None
+            ordered = [
+                e for e in ordered
+                if (needle is None or needle in e.name_key)
+                and (active is None or e.is_active == active)
+            ]
+        return len(ordered), ordered[offset:offset + limit]
+
+    # ----- writes (call after commit) -------------------------------------
+
+    def put(self, row) -> CachedItem:
+        """
+        Write-through a committed row (ORM Item, ItemOut, ...). A location
+        that isn't loaded yet is left alone; it will load fresh.
+        """
+        entry = CachedItem.from_row(row)
+        with self._lock:
+            self._bump(entry.location_id)
+            sl = self._slices.get(entry.location_id)
+            if sl is None:
+                return entry
+            old = sl.by_id.get(entry.id)
+            if old is not None and old.name_key != entry.name_key:
+                sl.by_name.pop(old.name_key, None)
+            sl.by_id[entry.id] = entry
+            sl.by_name[entry.name_key] = entry.id
+            sl.sorted = None
+        return entry
+
+    def set_qty(self, location_id: int, item_id: int, current_qty: int) -> None:
+        """Write-through for approve_count's live inventory sync."""
+        with self._lock:
+            self._bump(location_id)
+            sl = self._slices.get(location_id)
+            old = sl.by_id.get(item_id) if sl is not None else None
+            if old is None:
+                return
+            sl.by_id[item_id] = CachedItem(
+                old.id, old.location_id, old.name, old.base_unit, old.par_level,
+                old.is_active, current_qty,
+            )
+            sl.sorted = None
+
+    def discard(self, location_id: int, item_id: int) -> None:
+        with self._lock:
+            self._bump(location_id)
+            sl = self._slices.get(location_id)
+            old = sl.by_id.pop(item_id, None) if sl is not None else None
+            if old is not None:
+                sl.by_name.pop(old.name_key, None)
+                sl.sorted = None
+
+    def invalidate(self, location_id: Optional[int] = None) -> None:
+        """Drop one location (or everything); the next read reloads from the DB."""
+        with self._lock:
+            if location_id is None:
+                self._slices = {}
+                self._epoch += 1
+            else:
+                self._slices.pop(location_id, None)
+                self._bump(location_id)
+            self.invalidations += 1
+
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        """Another worker wrote items: reload the location on next read."""
+        self.invalidate(event.location_id)
+
+    # ----- metrics ---------------------------------------------------------
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "locations": len(self._slices),
+            "size": sum(len(sl.by_id) for sl in list(self._slices.values())),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+        }
+
+
+# Single per-process instance used by the routers
+catalog = CatalogCache()
+bus.subscribe(["items"], catalog, write_through=True)
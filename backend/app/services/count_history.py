@@ -0,0 +1,135 @@
+# app/services/count_history.py
+"""
+One item's count history, newest first, keyset-paginated.
+
+The page is an index range scan of ix_counts_item_submitted
+(item_id, submitted_at DESC, id DESC) starting just below the cursor, so its
+cost depends on the page size, not on how many years of counts the item has.
+OFFSET would walk every skipped row.
+
+Variance is each count minus the previous approved count in submission
+order. A window over the page supplies it for all but the oldest rows; the
+approved count just before the page comes from one more probe of the same
+index (status/approved_count are INCLUDEd, so it's index-only).
+
+SQLite has no arrays: there each row's previous approved count is a
+correlated probe of the same index.
+"""
+import base64
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_name
+from app.core.orm import UTCDateTime
+
+# Postgres has no lag(... IGNORE NULLS); take the last element of the array
+# of approved counts seen so far instead (pages are small).
+_HISTORY_SQL = """
+    WITH page AS (
+        SELECT c.id, c.count, c.status, c.submitted_at, c.submitted_by, c.notes,
+               c.approved_at, c.approved_by, c.approved_count
+        FROM counts c
+        WHERE c.item_id = :item_id {keyset}
+        ORDER BY c.submitted_at DESC, c.id DESC
+        LIMIT :limit
+    ),
+    seed AS (
+        SELECT c.approved_count
+        FROM counts c
+        WHERE c.item_id = :item_id AND c.status = 'approved'
+          AND (c.submitted_at, c.id) < (SELECT submitted_at, id FROM page
+                                        ORDER BY submitted_at, id LIMIT 1)
+        ORDER BY c.submitted_at DESC, c.id DESC
+        LIMIT 1
+    ),
+    windowed AS (
+        SELECT p.*,
+               array_agg(p.approved_count) FILTER (WHERE p.status = 'approved') OVER (
+                   ORDER BY p.submitted_at, p.id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS approved_before
+        FROM page p
+    )
+    SELECT w.id, w.count, w.status, w.submitted_at, w.notes, w.approved_at, w.approved_count,
+           su.name AS submitted_by_name, ap.name AS approved_by_name,
+           coalesce(w.approved_before[cardinality(w.approved_before)],
+                    (SELECT approved_count FROM seed)) AS previous_approved_count
+    FROM windowed w
+    JOIN users su ON su.id = w.submitted_by
+    LEFT JOIN users ap ON ap.id = w.approved_by
+    ORDER BY w.submitted_at DESC, w.id DESC
+"""
+_HISTORY_SQL_SQLITE = """
+    WITH page AS (
+        SELECT c.id, c.count, c.status, c.submitted_at, c.submitted_by, c.notes,
+               c.approved_at, c.approved_by, c.approved_count
+        FROM counts c
+        WHERE c.item_id = :item_id {keyset}
+        ORDER BY c.submitted_at DESC, c.id DESC
+        LIMIT :limit
+    )
+    SELECT p.id, p.count, p.status, p.submitted_at, p.notes, p.approved_at, p.approved_count,
+           su.name AS submitted_by_name, ap.name AS approved_by_name,
+           (SELECT c.approved_count
+              FROM counts c
+             WHERE c.item_id = :item_id AND c.status = 'approved'
+               AND (c.submitted_at, c.id) < (p.submitted_at, p.id)
+             ORDER BY c.submitted_at DESC, c.id DESC
+             LIMIT 1) AS previous_approved_count
+    FROM page p
+    JOIN users su ON su.id = p.submitted_by
+    LEFT JOIN users ap ON ap.id = p.approved_by
+    ORDER BY p.submitted_at DESC, p.id DESC
+"""
+_KEYSET = "AND (c.submitted_at, c.id) < (:before_ts, :before_id)"
+
+# Separate statements rather than `:before IS NULL OR ...`, which a generic
+# (prepared) plan could not turn into an index bound
+FIRST_PAGE_SQL = text(_HISTORY_SQL.format(keyset=""))
+NEXT_PAGE_SQL = text(_HISTORY_SQL.format(keyset=_KEYSET))
+_PAGES = {
+    "postgresql": (FIRST_PAGE_SQL, NEXT_PAGE_SQL),
+    "sqlite": tuple(
+        text(_HISTORY_SQL_SQLITE.format(keyset=k)).columns(submitted_at=UTCDateTime, approved_at=UTCDateTime)
+        for k in ("", _KEYSET)
+    ),
+}
+
+
+class Cursor(NamedTuple):
+    submitted_at: datetime
+    id: int
+
+
+def encode_cursor(submitted_at: datetime, count_id: int) -> str:
+    raw = f"{submitted_at.isoformat()}|{count_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Raises ValueError for anything encode_cursor() didn't produce."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, count_id = raw.split("|")
+        return Cursor(datetime.fromisoformat(ts), int(count_id))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+def item_history(
+    db: Session, item_id: int, limit: int, before: Optional[Cursor] = None,
+) -> Tuple[List, Optional[str]]:
+    """(rows newest first, cursor for the next page or None)."""
+    params = {"item_id": item_id, "limit": limit + 1}     # one extra row tells us whether there's more
+    first_page, next_page = _PAGES[dialect_name(db)]
+    if before is None:
+        rows = db.execute(first_page, params).all()
+    else:
+        rows = db.execute(next_page, {**params, "before_ts": before.submitted_at,
+                                      "before_id": before.id}).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].submitted_at, rows[-1].id)
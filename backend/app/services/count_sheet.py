@@ -0,0 +1,102 @@
+# app/services/count_sheet.py
+"""
+Daily count sheet: every active item of a location with what a counter needs
+next to it (on hand, par, last approved count, open pending count).
+
+One statement instead of a catalog fetch plus a /counts lookup per item. Two
+LATERAL probes per item, each a short index-only scan of
+ix_counts_item_status_approved_at (item_id, status, approved_at DESC)
+INCLUDE (id, approved_count); a DISTINCT ON over the location's counts would
+read its whole history instead.
+
+Streamed as one JSON document from a server-side cursor on its own connection
+(like the CSV export), so memory stays flat for large catalogs.
+
+SQLite has no LATERAL: there the latest approved count is joined by the id a
+correlated subquery picks (so its count and time come from the same row), and
+the pending probe is a scalar subquery.
+"""
+from datetime import datetime, timezone
+from typing import Iterator
+
+from pydantic_core import to_json
+from sqlalchemy import text
+
+from app.core.db import dialect_name, stream_connection
+from app.core.orm import UTCDateTime
+
+SHEET_SQL = text("""
+    SELECT i.id, i.name, i.base_unit, i.par_level, i.current_qty,
+           last.approved_count AS last_count, last.approved_at AS last_counted_at,
+           pending.id AS pending_count_id
+    FROM items i
+    LEFT JOIN LATERAL (
+        SELECT c.approved_count, c.approved_at
+        FROM counts c
+        WHERE c.item_id = i.id AND c.status = 'approved'
+        ORDER BY c.approved_at DESC
+        LIMIT 1
+    ) last ON true
+    LEFT JOIN LATERAL (
+        SELECT c.id
+        FROM counts c
+        WHERE c.item_id = i.id AND c.status = 'pending'
+        ORDER BY c.id DESC
+        LIMIT 1
+    ) pending ON true
+    WHERE i.location_id = :location_id AND i.is_active
+    ORDER BY lower(i.name)
+""")
+
+_SHEET_SQL_SQLITE = text("""
+    SELECT i.id, i.name, i.base_unit, i.par_level, i.current_qty,
+           last.approved_count AS last_count, last.approved_at AS last_counted_at,
+           (SELECT max(c.id) FROM counts c
+             WHERE c.item_id = i.id AND c.status = 'pending') AS pending_count_id
+    FROM items i
+    LEFT JOIN counts last ON last.id = (
+        SELECT c.id FROM counts c
+        WHERE c.item_id = i.id AND c.status = 'approved'
+        ORDER BY c.approved_at DESC
+        LIMIT 1
+    )
+    WHERE i.location_id = :location_id AND i.is_active
+    ORDER BY lower(i.name)
+""").columns(last_counted_at=UTCDateTime)
+
+_SHEET = {"postgresql": SHEET_SQL, "sqlite": _SHEET_SQL_SQLITE}
+
+FETCH_ROWS = 500
+
+
+def _line(row) -> dict:
+    return {
+        "item_id": row.id,
+        "name": row.name,
+        "base_unit": row.base_unit,
+        "par_level": row.par_level,
+        "current_qty": row.current_qty,
+        "last_count": row.last_count,
+        "last_counted_at": row.last_counted_at,
+        "pending_count_id": row.pending_count_id,
+    }
+
+
+def iter_count_sheet(location_id: int) -> Iterator[bytes]:
+    """
+    The sheet as JSON, in chunks of FETCH_ROWS lines:
+    {"location_id": .., "generated_at": .., "items": [{..CountSheetLine..}, ...]}
+    """
+    # Same JSON encoding as the regular (pydantic) responses, datetimes included
+    header = to_json({"location_id": location_id, "generated_at": datetime.now(timezone.utc)})
+    yield header[:-1] + b',"items":['
+    first = True
+    with stream_connection() as conn:
+        # Per statement: Connection.execution_options() would stick to a shared connection
+        result = conn.execute(_SHEET[dialect_name(conn)], {"location_id": location_id},
+                              execution_options={"stream_results": True, "yield_per": FETCH_ROWS})
+        for rows in result.partitions():
+            chunk = b",".join(to_json(_line(r)) for r in rows)
+            yield chunk if first else b"," + chunk
+            first = False
+    yield b"]}"
@@ -0,0 +1,210 @@
+# app/services/forecast.py
+"""
+Batch consumption forecasting over a location's whole catalog.
+
+Loads approved count history for every item in one query, then computes
+per-item usage rates, days-until-stockout and a suggested par level with
+NumPy array ops (bincount/segment sums) — no per-item Python loops.
+
+Results are cached in-process per location until the next items write there
+(approvals and par edits publish an items invalidation).
+"""
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.invalidation import InvalidationEvent, bus
+from app.models.counts import Count
+from app.models.items import Item
+
+SECONDS_PER_DAY = 86400.0
+
+
+def compute_usage(
+    idx: np.ndarray,
+    t_days: np.ndarray,
+    qty: np.ndarray,
+    n_items: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized per-item usage from count history.
+
+    idx     dense item index (0..n_items-1) per observation, sorted by (idx, t)
+    t_days  observation time in days (any epoch)
+    qty     approved on-hand quantity at that time
+
+    Usage between consecutive counts of the same item is the drop in on-hand
+    quantity; increases are deliveries and count as zero usage. Returns arrays
+    of length n_items: rate (units/day), sd (units/day), samples, span_days.
+    """
+    same = idx[1:] == idx[:-1]
+    dt = np.where(same, t_days[1:] - t_days[:-1], 0.0)
+    drop = np.where(same, qty[:-1] - qty[1:], 0.0)
+    used = np.clip(drop, 0.0, None)
+
+    seg = idx[1:]
+    span = np.bincount(seg, weights=dt, minlength=n_items)
+    total_used = np.bincount(seg, weights=used, minlength=n_items)
+    samples = np.bincount(idx, minlength=n_items)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(span > 0, total_used / span, 0.0)
+        # Time-weighted spread of interval rates around the item's mean rate
+        interval_rate = np.where(dt > 0, used / dt, 0.0)
+        dev2 = dt * (interval_rate - rate[seg]) ** 2
+        var = np.where(span > 0, np.bincount(seg, weights=dev2, minlength=n_items) / span, 0.0)
+
+    return {"rate": rate, "sd": np.sqrt(var), "samples": samples, "span_days": span}
+
+
+def suggest_par(rate: np.ndarray, sd: np.ndarray,
+                cover_days: float = settings.forecast_cover_days,
+                z: float = settings.forecast_safety_z) -> np.ndarray:
+    """Cover `cover_days` of mean usage plus z-sigma safety stock, rounded up."""
+    return np.ceil(rate * cover_days + z * sd * math.sqrt(cover_days)).astype(np.int64)
+
+
+class ItemForecast:
+    __slots__ = ("item_id", "item_name", "current_qty", "par_level",
+                 "daily_usage", "days_until_stockout", "suggested_par_level", "samples")
+
+    def __init__(self, item_id, item_name, current_qty, par_level,
+                 daily_usage, days_until_stockout, suggested_par_level, samples):
+        self.item_id = item_id
+        self.item_name = item_name
+        self.current_qty = current_qty
+        self.par_level = par_level
+        self.daily_usage = daily_usage
+        self.days_until_stockout = days_until_stockout
+        self.suggested_par_level = suggested_par_level
+        self.samples = samples
+
+
+class ForecastSnapshot:
+    def __init__(self, generated_at: datetime, window_days: int, rows: List[ItemForecast]):
+        self.generated_at = generated_at
+        self.window_days = window_days
+        self.rows = rows
+
+
+def build_forecast(db: Session, location_id: int,
+                   window_days: int = settings.forecast_window_days) -> ForecastSnapshot:
+    """
+    Two queries total (active items + all approved history in the window),
+    then array math for the whole catalog at once.
+    """
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=window_days)
+
+    items = db.execute(
+        select(Item.id, Item.name, Item.current_qty, Item.par_level)
+        .where(Item.location_id == location_id, Item.is_active)
+        .order_by(Item.id)
+    ).all()
+    if not items:
+        return ForecastSnapshot(now, window_days, [])
+
+    hist = db.execute(
+        select(Count.item_id, Count.approved_at, Count.approved_count)
+        .where(
+            Count.location_id == location_id,
+            Count.status == "approved",
+            Count.approved_at >= since,
+        )
+        .order_by(Count.item_id, Count.approved_at)
+    ).all()
+
+    item_ids = np.fromiter((r.id for r in items), dtype=np.int64, count=len(items))
+    current = np.fromiter((r.current_qty for r in items), dtype=np.float64, count=len(items))
+
+    n = len(hist)
+    h_item = np.fromiter((r.item_id for r in hist), dtype=np.int64, count=n)
+    h_t = np.fromiter(((r.approved_at - since).total_seconds() / SECONDS_PER_DAY for r in hist),
+                      dtype=np.float64, count=n)
+    h_qty = np.fromiter((r.approved_count or 0 for r in hist), dtype=np.float64, count=n)
+
+    # Map item ids -> dense indices; drop history of inactive/unknown items
+    pos = np.searchsorted(item_ids, h_item)
+    pos = np.clip(pos, 0, len(item_ids) - 1)
+    keep = item_ids[pos] == h_item
+    usage = compute_usage(pos[keep], h_t[keep], h_qty[keep], len(item_ids))
+
+    rate = usage["rate"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stockout = np.where(rate > 0, current / rate, np.inf)
+    suggested = suggest_par(rate, usage["sd"])
+
+    rows = [
+        ItemForecast(
+            item_id=r.id,
+            item_name=r.name,
+            current_qty=r.current_qty,
+            par_level=r.par_level,
+            daily_usage=float(rate[i]),
+            days_until_stockout=None if math.isinf(stockout[i]) else float(stockout[i]),
+            suggested_par_level=int(suggested[i]) if usage["samples"][i] > 1 else None,
+            samples=int(usage["samples"][i]),
+        )
+        for i, r in enumerate(items)
+    ]
+    return ForecastSnapshot(now, window_days, rows)
+
+
+class ForecastCache:
+    """
+    Holds the latest snapshot per location; recomputed lazily after invalidate().
+    Readers of one location share one recomputation (a lock per location), and
+    a snapshot whose build overlapped an invalidate() of its location is
+    returned to its reader but not cached.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshots: Dict[int, ForecastSnapshot] = {}
+        self._build_locks: Dict[int, threading.Lock] = {}
+        self._generations: Dict[int, int] = {}    # per location, bumped by invalidate()
+        self._epoch = 0                           # bumped by invalidate() of everything
+
+    def get(self, db: Session, location_id: int) -> ForecastSnapshot:
+        snap = self._snapshots.get(location_id)
+        if snap is not None:
+            return snap
+        with self._lock:
+            build_lock = self._build_locks.setdefault(location_id, threading.Lock())
+        with build_lock:
+            snap = self._snapshots.get(location_id)
+            if snap is not None:
+                return snap
+            with self._lock:
+                started = self._generation(location_id)
+            snap = build_forecast(db, location_id)
+            with self._lock:
+                if self._generation(location_id) == started:
+                    self._snapshots[location_id] = snap
+            return snap
+
+    def _generation(self, location_id: int) -> Tuple[int, int]:
+        # Caller holds the lock
+        return self._epoch, self._generations.get(location_id, 0)
+
+    def invalidate(self, location_id: Optional[int] = None) -> None:
+        with self._lock:
+            if location_id is None:
+                self._snapshots = {}
+                self._epoch += 1
+            else:
+                self._snapshots.pop(location_id, None)
+                self._generations[location_id] = self._generations.get(location_id, 0) + 1
+
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        self.invalidate(event.location_id)
+
+
+forecasts = ForecastCache()
+bus.subscribe(["items"], forecasts)   # approvals publish an items event (current_qty)
@@ -0,0 +1,320 @@
+# app/services/inventory.py
+"""
+Inventory ledger: record movements, keep items.current_qty in sync, answer
+"what was on hand at T".
+
+items.current_qty stays as the projection the hot read paths (catalog, the
+low-stock indexes, is_below_par) are built on, but it is now recomputed from
+the ledger inside the writer's transaction by a single UPDATE, never written
+from a value read earlier in Python.
+
+As-of reads start at the nearest anchor at or before T — a snapshot
+checkpoint or a reset movement (approved count / opening balance), whichever
+is newer — and add the deltas between it and T. take_snapshots() lays down
+checkpoints (python -m app.inventory_snapshots, e.g. nightly) so that range
+stays short for items that go a long time without a count.
+
+A movement dated in the past deletes the checkpoints after it. Writers and
+take_snapshots() both lock the items row first, so a checkpoint can't be
+computed without a backdated movement and then outlive its deletion.
+
+SQLite (tests, local runs) has no LATERAL: the balance there is written with
+scalar subqueries, and the set-based snapshot/reconcile statements become a
+loop over items.
+"""
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_name
+from app.core.orm import UTCDateTime
+from app.models.inventory import InventoryMovement, InventorySnapshot, RESET_KINDS
+from app.models.items import Item
+
+# Balance of one item at :ts. {item} is the item id expression (":item_id", or
+# a column when used in a LATERAL over items).
+_BALANCE_SQL = """
+    SELECT a.at AS anchor_at,
+           a.source AS anchor_source,
+           coalesce(a.qty, 0) + coalesce(d.delta, 0) AS qty,
+           d.n AS movements
+    FROM (SELECT 1) one
+    LEFT JOIN (
+        SELECT at, qty, source FROM (
+            (SELECT taken_at AS at, qty, 'snapshot' AS source
+               FROM inventory_snapshots
+              WHERE item_id = {item} AND taken_at <= :ts
+              ORDER BY taken_at DESC LIMIT 1)
+            UNION ALL
+            (SELECT occurred_at, quantity, kind::text
+               FROM inventory_movements
+              WHERE item_id = {item} AND is_reset AND occurred_at <= :ts
+              ORDER BY occurred_at DESC, id DESC LIMIT 1)
+        ) c
+        ORDER BY at DESC, (source = 'snapshot') DESC
+        LIMIT 1
+    ) a ON true
+    CROSS JOIN LATERAL (
+        SELECT sum(m.quantity) AS delta, count(*) AS n
+        FROM inventory_movements m
+        WHERE m.item_id = {item} AND NOT m.is_reset AND m.occurred_at <= :ts
+          AND (a.at IS NULL OR m.occurred_at > a.at)
+    ) d
+"""
+
+# Same, one item (:item_id) only. Timestamps are text on SQLite.
+_BALANCE_SQL_SQLITE = """
+    SELECT a.at AS anchor_at,
+           a.source AS anchor_source,
+           coalesce(a.qty, 0) + coalesce((SELECT sum(m.quantity) {deltas}), 0) AS qty,
+           (SELECT count(*) {deltas}) AS movements
+    FROM (SELECT 1) one
+    LEFT JOIN (
+        SELECT at, qty, source FROM (
+            SELECT * FROM (
+                SELECT taken_at AS at, qty, 'snapshot' AS source
+                  FROM inventory_snapshots
+                 WHERE item_id = :item_id AND taken_at <= :ts
+                 ORDER BY taken_at DESC LIMIT 1)
+            UNION ALL
+            SELECT * FROM (
+                SELECT occurred_at, quantity, kind
+                  FROM inventory_movements
+                 WHERE item_id = :item_id AND is_reset AND occurred_at <= :ts
+                 ORDER BY occurred_at DESC, id DESC LIMIT 1)
+        ) c
+        ORDER BY at DESC, (source = 'snapshot') DESC
+        LIMIT 1
+    ) a ON true
+""".format(deltas="""
+        FROM inventory_movements m
+        WHERE m.item_id = :item_id AND NOT m.is_reset AND m.occurred_at <= :ts
+          AND (a.at IS NULL OR m.occurred_at > a.at)""")
+
+_AS_OF_SQL = text(_BALANCE_SQL.format(item=":item_id"))
+
+_SYNC_SQL = text(f"""
+    WITH balance AS ({_BALANCE_SQL.format(item=":item_id")})
+    UPDATE items SET current_qty = balance.qty
+    FROM balance
+    WHERE items.id = :item_id
+    RETURNING items.current_qty
+""")
+
+_AS_OF = {
+    "postgresql": _AS_OF_SQL,
+    "sqlite": text(_BALANCE_SQL_SQLITE).columns(anchor_at=UTCDateTime),
+}
+_SYNC = {
+    "postgresql": _SYNC_SQL,
+    "sqlite": text(f"""
+        UPDATE items SET current_qty = (SELECT qty FROM ({_BALANCE_SQL_SQLITE}))
+        WHERE id = :item_id
+        RETURNING current_qty
+    """),
+}
+
+# Items that moved since their last snapshot, locked against movement writers
+_SNAPSHOT_DUE_SQL = text("""
+    SELECT i.id FROM items i
+    WHERE (CAST(:location_id AS integer) IS NULL OR i.location_id = :location_id)
+      AND EXISTS (
+          SELECT 1 FROM inventory_movements m
+          WHERE m.item_id = i.id
+            AND m.occurred_at <= :ts
+            AND m.occurred_at > coalesce(
+                (SELECT max(s.taken_at) FROM inventory_snapshots s WHERE s.item_id = i.id),
+                '-infinity')
+      )
+    ORDER BY i.id
+    FOR UPDATE OF i
+""")
+
+# Checkpoint them; a new statement, so it sees movements committed while we waited
+_SNAPSHOT_SQL = text(f"""
+    INSERT INTO inventory_snapshots (item_id, taken_at, location_id, qty)
+    SELECT i.id, :ts, i.location_id, b.qty
+    FROM items i
+    CROSS JOIN LATERAL ({_BALANCE_SQL.format(item="i.id")}) b
+    WHERE i.id = ANY(:ids)
+    ON CONFLICT DO NOTHING
+""")
+
+# SQLite: the items due a checkpoint, then one INSERT each
+_SNAPSHOT_DUE_SQLITE = text("""
+    SELECT i.id, i.location_id FROM items i
+    WHERE (:location_id IS NULL OR i.location_id = :location_id)
+      AND EXISTS (
+          SELECT 1 FROM inventory_movements m
+          WHERE m.item_id = i.id
+            AND m.occurred_at <= :ts
+            AND m.occurred_at > coalesce(
+                (SELECT max(s.taken_at) FROM inventory_snapshots s WHERE s.item_id = i.id), '')
+      )
+""")
+_SNAPSHOT_ONE_SQLITE = text(f"""
+    INSERT INTO inventory_snapshots (item_id, taken_at, location_id, qty)
+    SELECT :item_id, :ts, :location_id, b.qty FROM ({_BALANCE_SQL_SQLITE}) b
+    WHERE true                     -- SQLite needs a WHERE before ON CONFLICT after a SELECT
+    ON CONFLICT DO NOTHING
+""")
+
+
+class AsOf(NamedTuple):
+    item_id: int
+    ts: datetime
+    qty: int
+    anchor_source: Optional[str]     # "snapshot" | "count" | "opening" | None (no anchor: base 0)
+    anchor_at: Optional[datetime]
+    movements: int                   # deltas applied on top of the anchor
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def as_of(db: Session, item_id: int, ts: datetime) -> AsOf:
+    ts = _utc(ts)
+    r = db.execute(_AS_OF[dialect_name(db)], {"item_id": item_id, "ts": ts}).one()
+    return AsOf(item_id, ts, int(r.qty), r.anchor_source, r.anchor_at, int(r.movements))
+
+
+def _sync_current_qty(db: Session, item_id: int) -> int:
+    return db.execute(
+        _SYNC[dialect_name(db)], {"item_id": item_id, "ts": datetime.now(timezone.utc)}
+    ).scalar_one()
+
+
+def _lock_item(db: Session, item_id: int) -> None:
+    # Serializes movement writers with take_snapshots() per item (no-op on SQLite)
+    db.execute(select(Item.id).where(Item.id == item_id).with_for_update())
+
+
+def _drop_snapshots_from(db: Session, item_id: int, occurred_at: datetime) -> None:
+    # A backdated movement makes later checkpoints wrong; they are re-taken next run
+    db.execute(
+        delete(InventorySnapshot)
+        .where(InventorySnapshot.item_id == item_id, InventorySnapshot.taken_at >= occurred_at)
+    )
+
+
+def record_reset(
+    db: Session,
+    location_id: int,
+    item_id: int,
+    kind: str,
+    qty: int,
+    occurred_at: Optional[datetime] = None,
+    count_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> int:
+    """
+    Record an observed absolute quantity (approved count, opening balance).
+    Returns the item's new current_qty. Caller commits.
+    """
+    if kind not in RESET_KINDS:
+        raise ValueError(f"{kind!r} is not a reset kind")
+    occurred_at = _utc(occurred_at or datetime.now(timezone.utc))
+    _lock_item(db, item_id)
+    db.execute(insert(InventoryMovement).values(
+        location_id=location_id, item_id=item_id, kind=kind, is_reset=True, quantity=qty,
+        occurred_at=occurred_at, count_id=count_id, recorded_by=user_id,
+    ))
+    _drop_snapshots_from(db, item_id, occurred_at)
+    return _sync_current_qty(db, item_id)
+
+
+def record_delta(
+    db: Session,
+    location_id: int,
+    item_id: int,
+    kind: str,
+    delta: int,
+    occurred_at: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+) -> int:
+    """
+    Record a signed change (delivery +, waste -, adjustment ±).
+    Returns the item's new current_qty. Caller commits.
+    """
+    if kind in RESET_KINDS:
+        raise ValueError(f"{kind!r} is a reset kind; use record_reset()")
+    occurred_at = _utc(occurred_at or datetime.now(timezone.utc))
+    _lock_item(db, item_id)
+    db.execute(insert(InventoryMovement).values(
+        location_id=location_id, item_id=item_id, kind=kind, is_reset=False, quantity=delta,
+        occurred_at=occurred_at, recorded_by=user_id,
+    ))
+    _drop_snapshots_from(db, item_id, occurred_at)
+    return _sync_current_qty(db, item_id)
+
+
+def has_movements(db: Session, item_id: int) -> bool:
+    """True if anything beyond the opening balance is on the item's ledger."""
+    return db.execute(
+        select(InventoryMovement.id)
+        .where(InventoryMovement.item_id == item_id, InventoryMovement.kind != "opening")
+        .limit(1)
+    ).first() is not None
+
+
+def purge_item(db: Session, item_id: int) -> None:
+    """
+    Remove an item's ledger rows ahead of a hard delete: its opening balance
+    and the checkpoints derived from it. Only for items without has_movements().
+    Caller deletes the item and commits.
+    """
+    db.execute(delete(InventorySnapshot).where(InventorySnapshot.item_id == item_id))
+    db.execute(delete(InventoryMovement)
+               .where(InventoryMovement.item_id == item_id, InventoryMovement.kind == "opening"))
+
+
+def take_snapshots(db: Session, location_id: Optional[int] = None, ts: Optional[datetime] = None) -> int:
+    """Checkpoint items that moved since their last snapshot; returns rows written. Caller commits."""
+    ts = _utc(ts or datetime.now(timezone.utc))
+    if dialect_name(db) == "sqlite":
+        due = db.execute(_SNAPSHOT_DUE_SQLITE, {"ts": ts, "location_id": location_id}).all()
+        return sum(db.execute(_SNAPSHOT_ONE_SQLITE, {"item_id": r.id, "location_id": r.location_id,
+                                                     "ts": ts}).rowcount for r in due)
+    ids: List[int] = db.execute(_SNAPSHOT_DUE_SQL, {"ts": ts, "location_id": location_id}).scalars().all()
+    if not ids:
+        return 0
+    return db.execute(_SNAPSHOT_SQL, {"ts": ts, "ids": ids}).rowcount
+
+
+_RECONCILE_SQL = text(f"""
+    UPDATE items SET current_qty = b.qty
+    FROM items i
+    CROSS JOIN LATERAL ({_BALANCE_SQL.format(item="i.id")}) b
+    WHERE items.id = i.id AND i.id = ANY(:ids) AND items.current_qty IS DISTINCT FROM b.qty
+""")
+
+_RECONCILE_ONE_SQLITE = text(f"""
+    UPDATE items SET current_qty = b.qty
+    FROM ({_BALANCE_SQL_SQLITE}) b
+    WHERE items.id = :item_id AND items.current_qty IS NOT b.qty
+""")
+
+
+def reconcile_current_qty(db: Session, location_id: int, chunk_size: int = 500,
+                          progress=None) -> dict:
+    """
+    Recompute items.current_qty from the ledger for a location, in id chunks.
+    Returns {"checked": n, "fixed": m}. Caller commits.
+    """
+    ids = db.execute(text("SELECT id FROM items WHERE location_id = :loc ORDER BY id"),
+                     {"loc": location_id}).scalars().all()
+    ts = datetime.now(timezone.utc)
+    sqlite = dialect_name(db) == "sqlite"
+    fixed = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        if sqlite:
+            fixed += sum(db.execute(_RECONCILE_ONE_SQLITE, {"item_id": i, "ts": ts}).rowcount for i in chunk)
+        else:
+            fixed += db.execute(_RECONCILE_SQL, {"ids": chunk, "ts": ts}).rowcount
+        if progress is not None:
+            progress((start + len(chunk)) / len(ids), f"{start + len(chunk)}/{len(ids)} items")
+    return {"checked": len(ids), "fixed": fixed}
@@ -0,0 +1,386 @@
+# app/services/item_csv.py
+"""
+Bulk CSV import/export of the item catalog using Postgres COPY.
+
+Import:  CSV -> COPY into a temp staging table -> validate in SQL ->
+         one set-based upsert keyed on (location_id, lower(name))
+         (ux_items_location_name_lower).
+Export:  COPY (SELECT ...) TO STDOUT, streamed in chunks.
+
+Both are scoped to one location.
+
+Both work on the psycopg connection underneath a SQLAlchemy Session/Connection,
+so they share the caller's transaction.
+
+A blank or missing is_active makes new items active and leaves existing ones
+as they are.
+
+Raising par_level can put an existing item below par: the import emits
+item.below_par for those rows (app.services.outbox), like a par edit does.
+
+SQLite (tests, local runs) has no COPY: rows reach the same staging table by
+executemany, get the same checks in SQLite's dialect, and the export is a
+SELECT written out with csv.writer in COPY's format.
+"""
+import csv
+import io
+from typing import IO, Dict, Iterator, List, Optional
+
+from psycopg import sql
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_name, engine, stream_connection
+from app.models.items import Item
+from app.services import outbox
+
+# Columns we read from an import file. Extra columns (e.g. id, current_qty
+# from an export) are ignored so an export can be re-imported as-is.
+REQUIRED_COLUMNS = ("name", "base_unit")
+OPTIONAL_COLUMNS = ("par_level", "is_active")
+
+EXPORT_SQL = sql.SQL("""
+    COPY (
+        SELECT id, name, base_unit, par_level, is_active, current_qty
+        FROM items
+        WHERE location_id = {location_id}
+        ORDER BY lower(name)
+    ) TO STDOUT WITH (FORMAT csv, HEADER true)
+""")
+
+_STAGING_DDL = """
+    CREATE TEMP TABLE items_import (
+        line       integer PRIMARY KEY,
+        name       text,
+        base_unit  text,
+        par_level  text,
+        is_active  text,
+        error      text
+    ) ON COMMIT DROP
+"""
+
+# Row-level validation, mirroring ItemCreate (name 1..120, BaseUnit, par_level >= 0).
+# First failing rule wins.
+_VALIDATE_SQL = """
+    UPDATE items_import SET error = CASE
+        WHEN coalesce(btrim(name), '') = '' THEN 'name is required'
+        WHEN length(btrim(name)) > 120 THEN 'name longer than 120 characters'
+        WHEN coalesce(base_unit, '') NOT IN ('g', 'ml', 'pcs') THEN 'base_unit must be one of g, ml, pcs'
+        WHEN coalesce(par_level, '') !~ '^[0-9]{0,9}$' THEN 'par_level must be a non-negative integer'
+        WHEN lower(coalesce(is_active, '')) NOT IN ('', 'true', 'false', 't', 'f', '1', '0', 'yes', 'no')
+            THEN 'is_active must be true/false'
+    END
+"""
+
+# Same name (case-insensitive) twice in one file: last line wins
+_DEDUPE_SQL = """
+    UPDATE items_import s
+    SET error = 'duplicate name in file; line ' || d.last_line || ' wins'
+    FROM (
+        SELECT line, max(line) OVER (PARTITION BY lower(btrim(name))) AS last_line
+        FROM items_import
+        WHERE error IS NULL
+    ) d
+    WHERE s.line = d.line AND d.line <> d.last_line
+"""
+
+# Blank is_active on an existing item: stage its current value so the upsert keeps it
+_KEEP_ACTIVE_SQL = """
+    UPDATE items_import s
+    SET is_active = i.is_active::text
+    FROM items i
+    WHERE s.error IS NULL AND coalesce(s.is_active, '') = ''
+      AND i.location_id = %(location_id)s AND lower(i.name) = lower(btrim(s.name))
+"""
+
+# Existing items the file takes from at/above par to below it (item.below_par),
+# locked so an approval can't move current_qty under us. Their old par_level.
+_PAR_RAISES_SQL = """
+    SELECT i.id, i.par_level
+    FROM items i
+    JOIN items_import s ON s.error IS NULL AND lower(i.name) = lower(btrim(s.name))
+    WHERE i.location_id = %(location_id)s
+      AND i.current_qty >= i.par_level
+      AND i.current_qty < coalesce(nullif(s.par_level, '')::integer, 0)
+    FOR UPDATE OF i
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO items (location_id, name, base_unit, par_level, is_active, current_qty)
+    SELECT %(location_id)s,
+           btrim(name),
+           base_unit,
+           coalesce(nullif(par_level, '')::integer, 0),
+           coalesce(nullif(is_active, '')::boolean, true),
+           0
+    FROM items_import
+    WHERE error IS NULL
+    ON CONFLICT (location_id, (lower(name))) DO UPDATE
+        SET base_unit = EXCLUDED.base_unit,
+            par_level = EXCLUDED.par_level,
+            is_active = EXCLUDED.is_active
+    RETURNING (xmax = 0) AS inserted
+"""
+
+
+# ----- SQLite -----------------------------------------------------------------
+
+_EXPORT_COLUMNS = ("id", "name", "base_unit", "par_level", "is_active", "current_qty")
+
+_EXPORT_SQL_SQLITE = text("""
+    SELECT id, name, base_unit, par_level, is_active, current_qty
+    FROM items
+    WHERE location_id = :location_id
+    ORDER BY lower(name)
+""")
+
+_SQLITE_IMPORT = [text(stmt) for stmt in (
+    "DROP TABLE IF EXISTS temp.items_import",
+    """
+    CREATE TEMP TABLE items_import (
+        line       integer PRIMARY KEY,
+        name       text,
+        base_unit  text,
+        par_level  text,
+        is_active  text,
+        error      text
+    )
+    """,
+)]
+
+_STAGE_SQL_SQLITE = text("""
+    INSERT INTO items_import (line, name, base_unit, par_level, is_active)
+    VALUES (:line, :name, :base_unit, :par_level, :is_active)
+""")
+
+_VALIDATE_SQL_SQLITE = text("""
+    UPDATE items_import SET error = CASE
+        WHEN coalesce(trim(name), '') = '' THEN 'name is required'
+        WHEN length(trim(name)) > 120 THEN 'name longer than 120 characters'
+        WHEN coalesce(base_unit, '') NOT IN ('g', 'ml', 'pcs') THEN 'base_unit must be one of g, ml, pcs'
+        WHEN length(coalesce(par_level, '')) > 9 OR coalesce(par_level, '') GLOB '*[^0-9]*'
+            THEN 'par_level must be a non-negative integer'
+        WHEN lower(coalesce(is_active, '')) NOT IN ('', 'true', 'false', 't', 'f', '1', '0', 'yes', 'no')
+            THEN 'is_active must be true/false'
+    END
+""")
+
+_DEDUPE_SQL_SQLITE = text("""
+    UPDATE items_import AS s
+    SET error = 'duplicate name in file; line ' || d.last_line || ' wins'
+    FROM (
+        SELECT line, max(line) OVER (PARTITION BY lower(trim(name))) AS last_line
+        FROM items_import
+        WHERE error IS NULL
+    ) AS d
+    WHERE s.line = d.line AND d.line <> d.last_line
+""")
+
+_KEEP_ACTIVE_SQL_SQLITE = text("""
+    UPDATE items_import AS s
+    SET is_active = CAST(i.is_active AS text)
+    FROM items AS i
+    WHERE s.error IS NULL AND coalesce(s.is_active, '') = ''
+      AND i.location_id = :location_id AND lower(i.name) = lower(trim(s.name))
+""")
+
+_PAR_RAISES_SQL_SQLITE = text("""
+    SELECT i.id, i.par_level
+    FROM items i
+    JOIN items_import s ON s.error IS NULL AND lower(i.name) = lower(trim(s.name))
+    WHERE i.location_id = :location_id
+      AND i.current_qty >= i.par_level
+      AND i.current_qty < coalesce(CAST(nullif(s.par_level, '') AS integer), 0)
+""")
+
+# No xmax to tell inserts from updates: count the names that already exist first
+_EXISTING_SQL_SQLITE = text("""
+    SELECT count(*) FROM items_import s
+    WHERE s.error IS NULL AND EXISTS (
+        SELECT 1 FROM items i WHERE i.location_id = :location_id AND lower(i.name) = lower(trim(s.name)))
+""")
+
+_UPSERT_SQL_SQLITE = text("""
+    INSERT INTO items (location_id, name, base_unit, par_level, is_active, current_qty)
+    SELECT :location_id,
+           trim(name),
+           base_unit,
+           coalesce(CAST(nullif(par_level, '') AS integer), 0),
+           CASE WHEN lower(is_active) IN ('false', 'f', '0', 'no') THEN 0 ELSE 1 END,
+           0
+    FROM items_import
+    WHERE error IS NULL
+    ON CONFLICT (location_id, lower(name)) DO UPDATE
+        SET base_unit = excluded.base_unit,
+            par_level = excluded.par_level,
+            is_active = excluded.is_active
+""")
+
+
+class ImportRowError:
+    __slots__ = ("line", "name", "error")
+
+    def __init__(self, line: int, name: Optional[str], error: str):
+        self.line = line
+        self.name = name
+        self.error = error
+
+
+class ImportResult:
+    def __init__(self, inserted: int, updated: int, errors: List[ImportRowError], dry_run: bool):
+        self.inserted = inserted
+        self.updated = updated
+        self.errors = errors
+        self.dry_run = dry_run
+
+
+def _driver_connection(db: Session):
+    """The raw psycopg connection bound to this session's transaction."""
+    return db.connection().connection.driver_connection
+
+
+def _emit_below_par(db: Session, par_before: Dict[int, int]) -> None:
+    """item.below_par for upserted items whose new par_level is above current_qty."""
+    if not par_before:
+        return
+    items = db.scalars(
+        select(Item).where(Item.id.in_(par_before)).execution_options(populate_existing=True)
+    )
+    for item in items:
+        # The upsert doesn't touch current_qty
+        outbox.par_changed(db, item, item.current_qty, par_before[item.id])
+
+
+def _iter_csv_rows(text_stream: IO[str]) -> Iterator[tuple]:
+    """
+    Yield (line, name, base_unit, par_level, is_active) tuples from a CSV with
+    a header row. Raises ValueError if required columns are missing.
+    """
+    reader = csv.DictReader(text_stream)
+    header = [h.strip().lower() for h in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+    reader.fieldnames = header
+    for row in reader:
+        yield (
+            reader.line_num,
+            row.get("name"),
+            (row.get("base_unit") or "").strip(),
+            (row.get("par_level") or "").strip(),
+            (row.get("is_active") or "").strip(),
+        )
+
+
+def import_items_csv(db: Session, location_id: int, text_stream: IO[str],
+                     dry_run: bool = False) -> ImportResult:
+    """
+    Load a CSV of items into one location in one transaction: COPY into
+    staging, validate, then a single upsert on (location_id, lower(name)). Invalid rows are skipped and reported
+    per line; valid rows are applied. With dry_run=True nothing is written.
+    The caller owns commit/rollback.
+    """
+    if dialect_name(db) == "sqlite":
+        return _import_items_csv_sqlite(db, location_id, text_stream, dry_run)
+    conn = _driver_connection(db)
+    with conn.cursor() as cur:
+        cur.execute(_STAGING_DDL)
+        with cur.copy(
+            "COPY items_import (line, name, base_unit, par_level, is_active) FROM STDIN"
+        ) as copy:
+            for rec in _iter_csv_rows(text_stream):
+                copy.write_row(rec)
+
+        cur.execute(_VALIDATE_SQL)
+        cur.execute(_DEDUPE_SQL)
+        cur.execute(
+            "SELECT line, name, error FROM items_import WHERE error IS NOT NULL ORDER BY line"
+        )
+        errors = [ImportRowError(line, name, error) for line, name, error in cur.fetchall()]
+
+        inserted = updated = 0
+        if not dry_run:
+            cur.execute(_PAR_RAISES_SQL, {"location_id": location_id})
+            par_before = dict(cur.fetchall())
+            cur.execute(_KEEP_ACTIVE_SQL, {"location_id": location_id})
+            cur.execute(_UPSERT_SQL, {"location_id": location_id})
+            for (was_insert,) in cur.fetchall():
+                if was_insert:
+                    inserted += 1
+                else:
+                    updated += 1
+            _emit_below_par(db, par_before)
+
+    return ImportResult(inserted=inserted, updated=updated, errors=errors, dry_run=dry_run)
+
+
+def _import_items_csv_sqlite(db: Session, location_id: int, text_stream: IO[str],
+                             dry_run: bool) -> ImportResult:
+    for stmt in _SQLITE_IMPORT:
+        db.execute(stmt)
+    rows = [dict(zip(("line", "name", "base_unit", "par_level", "is_active"), rec))
+            for rec in _iter_csv_rows(text_stream)]
+    if rows:
+        db.execute(_STAGE_SQL_SQLITE, rows)
+    db.execute(_VALIDATE_SQL_SQLITE)
+    db.execute(_DEDUPE_SQL_SQLITE)
+    errors = [ImportRowError(r.line, r.name, r.error) for r in db.execute(text(
+        "SELECT line, name, error FROM items_import WHERE error IS NOT NULL ORDER BY line"))]
+
+    inserted = updated = 0
+    if not dry_run:
+        par_before = dict(db.execute(_PAR_RAISES_SQL_SQLITE, {"location_id": location_id}).all())
+        db.execute(_KEEP_ACTIVE_SQL_SQLITE, {"location_id": location_id})
+        updated = db.execute(_EXISTING_SQL_SQLITE, {"location_id": location_id}).scalar_one()
+        inserted = db.execute(_UPSERT_SQL_SQLITE, {"location_id": location_id}).rowcount - updated
+        _emit_below_par(db, par_before)
+    db.execute(text("DROP TABLE items_import"))
+    return ImportResult(inserted=inserted, updated=updated, errors=errors, dry_run=dry_run)
+
+
+def _iter_items_csv_sqlite(location_id: int) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(_EXPORT_COLUMNS)
+    with stream_connection() as conn:
+        result = conn.execute(_EXPORT_SQL_SQLITE, {"location_id": location_id},
+                              execution_options={"yield_per": 1000})
+        for rows in result.partitions():
+            # COPY writes booleans as t/f
+            writer.writerows((r.id, r.name, r.base_unit, r.par_level, "t" if r.is_active else "f", r.current_qty)
+                             for r in rows)
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def iter_items_csv(location_id: int) -> Iterator[bytes]:
+    """
+    Stream a location's catalog as CSV via COPY TO STDOUT. Opens its own connection
+    so it can outlive the request's session while the response streams.
+    """
+    if dialect_name(engine) == "sqlite":
+        yield from _iter_items_csv_sqlite(location_id)
+        return
+    with stream_connection() as sa_conn:
+        raw = sa_conn.connection.driver_connection
+        with raw.cursor() as cur:
+            with cur.copy(EXPORT_SQL.format(location_id=sql.Literal(location_id))) as copy:
+                for block in copy:
+                    yield bytes(block)
+
+
+def export_items_csv(location_id: int, out: IO[bytes]) -> int:
+    """Write a location's catalog CSV to a binary file object; returns bytes written."""
+    written = 0
+    for block in iter_items_csv(location_id):
+        out.write(block)
+        written += len(block)
+    return written
+
+
+def decode_csv_bytes(data: bytes) -> IO[str]:
+    """Decode an uploaded CSV body (tolerates a UTF-8 BOM from Excel)."""
+    return io.StringIO(data.decode("utf-8-sig"), newline="")
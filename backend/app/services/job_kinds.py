@@ -0,0 +1,62 @@
+# app/services/job_kinds.py
+"""
+Built-in background job kinds. Handlers run in a runner thread with their own
+Session; the runner commits their writes together with the job's success.
+"""
+import io
+
+from pydantic import BaseModel, Field
+
+from app.core.invalidation import publish
+from app.services import inventory, item_csv
+from app.services.catalog import catalog
+from app.services.jobs import job_kind
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ItemImportParams(BaseModel):
+    csv: str = Field(..., description="CSV text with a header row: name, base_unit[, par_level, is_active]")
+    dry_run: bool = False
+
+
+@job_kind("items.import", roles=("admin",), params_model=ItemImportParams)
+def import_items(ctx, db):
+    ctx.progress(0.05, "loading CSV", force=True)
+    result = item_csv.import_items_csv(
+        db, ctx.location_id, io.StringIO(ctx.params["csv"], newline=""), dry_run=ctx.params["dry_run"]
+    )
+    if not result.dry_run:
+        publish(db, "items", ctx.location_id)
+        ctx.after_commit.append(lambda: catalog.invalidate(ctx.location_id))
+    return {
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "skipped": len(result.errors),
+        "dry_run": result.dry_run,
+        "errors": [{"line": e.line, "name": e.name, "error": e.error}
+                   for e in result.errors[:MAX_REPORTED_ERRORS]],
+    }
+
+
+@job_kind("items.export", roles=("admin",))
+def export_items(ctx, db):
+    ctx.progress(0.05, "exporting", force=True)
+    data = b"".join(item_csv.iter_items_csv(ctx.location_id))
+    ctx.set_output(data, "text/csv")
+    return {"bytes": len(data)}
+
+
+@job_kind("inventory.snapshots", max_attempts=3)
+def snapshot_inventory(ctx, db):
+    return {"written": inventory.take_snapshots(db, ctx.location_id)}
+
+
+@job_kind("inventory.reconcile", roles=("admin",), max_attempts=3)
+def reconcile_inventory(ctx, db):
+    """Recompute current_qty from the ledger (repairs drift from out-of-band writes)."""
+    report = inventory.reconcile_current_qty(db, ctx.location_id, progress=ctx.progress)
+    if report["fixed"]:
+        publish(db, "items", ctx.location_id)
+        ctx.after_commit.append(lambda: catalog.invalidate(ctx.location_id))
+    return report
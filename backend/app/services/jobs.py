@@ -0,0 +1,430 @@
+# app/services/jobs.py
+"""
+Lightweight background job runner.
+
+Jobs are rows in `jobs`; any process running a JobRunner (every API worker
+by default, or a dedicated `python -m app.jobs_worker`) claims them with
+FOR UPDATE SKIP LOCKED, so the queue is shared and each job runs once.
+
+- Bounded concurrency: JOB_WORKERS handler threads in the runner's own
+  executor, separate from the request threadpool, so a burst of exports
+  can't starve API requests.
+- The handler's writes and the "succeeded" update commit together; a
+  failure rolls the work back and records the error (retried with backoff
+  while attempts < max_attempts).
+- Progress and a heartbeat are written in short side transactions; a
+  running job whose heartbeat goes stale (worker killed) is requeued or
+  failed by whichever runner sweeps next.
+- A job is only settled by the claim that is running it (worker and attempt
+  still match): a worker that was swept as stale and then finishes anyway
+  rolls its work back instead of overwriting the new claim.
+
+Job kinds register with @job_kind (see app/services/job_kinds.py).
+
+On SQLite (tests, local runs) the statements below have plain twins: one
+writer at a time needs no SKIP LOCKED, and times are computed in Python.
+That single writer is the job's own transaction while a handler runs, so
+interim progress is not written there; the final update still sets it.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Set, Type
+
+from pydantic import BaseModel
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import dialect_name, engine
+from app.core.metrics import Counter, Gauge, registry
+from app.core.orm import SessionLocal
+from app.models.jobs import JSONType, Job
+
+log = logging.getLogger(__name__)
+
+PROGRESS_MIN_INTERVAL_SEC = 0.5
+RETRY_BACKOFF_BASE_SEC = 5
+
+jobs_finished = registry.register(Counter(
+    "pantrypal_jobs_finished_total", "Background jobs finished, by kind and status.", ("kind", "status")))
+jobs_running = registry.register(Gauge(
+    "pantrypal_jobs_running", "Background jobs running in this process."))
+
+
+# ----- registry --------------------------------------------------------------
+
+@dataclass
+class JobKind:
+    name: str
+    handler: Callable[["JobContext", Session], Optional[dict]]
+    roles: Sequence[str]
+    max_attempts: int = 1
+    params_model: Optional[Type[BaseModel]] = None
+
+
+JOB_KINDS: Dict[str, JobKind] = {}
+
+
+def job_kind(name: str, roles: Sequence[str] = ("admin", "manager"), max_attempts: int = 1,
+             params_model: Optional[Type[BaseModel]] = None):
+    """Register a handler: fn(ctx, db) -> result dict. It must not commit."""
+    def deco(fn):
+        JOB_KINDS[name] = JobKind(name, fn, tuple(roles), max_attempts, params_model)
+        return fn
+    return deco
+
+
+def get_kind(name: str) -> Optional[JobKind]:
+    import app.services.job_kinds  # noqa: F401  (registers the built-in kinds)
+    return JOB_KINDS.get(name)
+
+
+# ----- enqueue ---------------------------------------------------------------
+
+def enqueue(db: Session, location_id: int, kind: str, params: Optional[dict] = None,
+            created_by: Optional[int] = None) -> Job:
+    """
+    Add a queued job to the session (caller commits, then job_runner.wake()).
+    Raises ValueError for an unknown kind or params its model rejects.
+    """
+    spec = get_kind(kind)
+    if spec is None:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    params = params or {}
+    if spec.params_model is not None:
+        params = spec.params_model.model_validate(params).model_dump(mode="json")
+    job = Job(location_id=location_id, kind=kind, params=params, created_by=created_by,
+              max_attempts=spec.max_attempts)
+    db.add(job)
+    db.flush()
+    return job
+
+
+# ----- execution ---------------------------------------------------------------
+
+class JobContext:
+    """What a handler sees: its params plus progress/output/after-commit hooks."""
+
+    def __init__(self, job_id: int, kind: str, location_id: int, params: dict,
+                 created_by: Optional[int]) -> None:
+        self.job_id = job_id
+        self.kind = kind
+        self.location_id = location_id
+        self.params = params
+        self.created_by = created_by
+        self.output: Optional[bytes] = None
+        self.output_type: Optional[str] = None
+        self.after_commit: List[Callable[[], None]] = []
+        self._last_progress = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False) -> None:
+        """Report progress (0..1); throttled, written outside the job's transaction."""
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_MIN_INTERVAL_SEC:
+            return
+        if dialect_name(engine) == "sqlite":    # would wait on the job's own write lock
+            return
+        self._last_progress = now
+        with SessionLocal() as side:
+            side.execute(
+                _sql(side, "progress"),
+                {"p": max(0.0, min(1.0, fraction)), "m": (message or "")[:200] or None, "id": self.job_id,
+                 "now": _utcnow()},
+            )
+            side.commit()
+
+    def set_output(self, data: bytes, content_type: str) -> None:
+        self.output = data
+        self.output_type = content_type
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+_PROGRESS_SQL = text("UPDATE jobs SET progress = :p, message = :m, heartbeat_at = now() "
+                     "WHERE id = :id AND status = 'running'")
+
+_CLAIM_SQL = text("""
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, worker = :worker,
+        started_at = now(), heartbeat_at = now(), progress = 0, message = NULL, error = NULL
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE status = 'queued' AND run_after <= now()
+        ORDER BY run_after, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, kind, location_id, params, created_by, attempts, max_attempts
+""")
+
+_SWEEP_SQL = text("""
+    UPDATE jobs
+    SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END::job_status,
+        error = 'worker lost (no heartbeat)',
+        worker = NULL,
+        run_after = now(),
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END
+    WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale)
+    RETURNING id
+""")
+
+_HEARTBEAT_SQL = text("UPDATE jobs SET heartbeat_at = now() "
+                      "WHERE id = ANY(:ids) AND status = 'running' AND worker = :worker")
+
+# Settling a job: only while our claim on it still stands
+_OURS = "id = :id AND status = 'running' AND worker = :worker AND attempts = :attempts"
+
+_SUCCEEDED_SQL = text(f"""
+    UPDATE jobs SET status = 'succeeded', progress = 1, result = CAST(:result AS jsonb),
+                    output = :output, output_type = :output_type,
+                    finished_at = now(), heartbeat_at = now()
+    WHERE {_OURS}
+""")
+
+_FAILED_SQL = text(f"""
+    UPDATE jobs
+    SET status = CAST(:status AS job_status), error = :error, worker = NULL,
+        run_after = now() + make_interval(secs => :backoff),
+        finished_at = CASE WHEN :retry THEN NULL ELSE now() END
+    WHERE {_OURS}
+""")
+
+_SQLITE = {
+    "progress": text("UPDATE jobs SET progress = :p, message = :m, heartbeat_at = :now "
+                     "WHERE id = :id AND status = 'running'"),
+    "claim": text("""
+        UPDATE jobs
+        SET status = 'running', attempts = attempts + 1, worker = :worker,
+            started_at = :now, heartbeat_at = :now, progress = 0, message = NULL, error = NULL
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE status = 'queued' AND run_after <= :now
+            ORDER BY run_after, id
+            LIMIT 1
+        )
+        RETURNING id, kind, location_id, params, created_by, attempts, max_attempts
+    """).columns(params=JSONType),
+    "sweep": text("""
+        UPDATE jobs
+        SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+            error = 'worker lost (no heartbeat)',
+            worker = NULL,
+            run_after = :now,
+            finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE :now END
+        WHERE status = 'running' AND heartbeat_at < :stale_before
+        RETURNING id
+    """),
+    "heartbeat": text(
+        "UPDATE jobs SET heartbeat_at = :now WHERE id IN :ids AND status = 'running' AND worker = :worker"
+    ).bindparams(bindparam("ids", expanding=True)),
+    "succeeded": text(f"""
+        UPDATE jobs SET status = 'succeeded', progress = 1, result = :result,
+                        output = :output, output_type = :output_type,
+                        finished_at = :now, heartbeat_at = :now
+        WHERE {_OURS}
+    """),
+    "failed": text(f"""
+        UPDATE jobs
+        SET status = :status, error = :error, worker = NULL,
+            run_after = :run_after,
+            finished_at = CASE WHEN :retry THEN NULL ELSE :now END
+        WHERE {_OURS}
+    """),
+}
+_POSTGRES = {"progress": _PROGRESS_SQL, "claim": _CLAIM_SQL, "sweep": _SWEEP_SQL,
+             "heartbeat": _HEARTBEAT_SQL, "succeeded": _SUCCEEDED_SQL, "failed": _FAILED_SQL}
+
+
+def _sql(db: Session, name: str):
+    return (_SQLITE if dialect_name(db) == "sqlite" else _POSTGRES)[name]
+
+
+class JobRunner:
+    def __init__(self, workers: int = settings.job_workers, poll_sec: float = settings.job_poll_sec,
+                 stale_sec: float = settings.job_stale_sec) -> None:
+        self.workers = workers
+        self.poll_sec = poll_sec
+        self.stale_sec = stale_sec
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"[:80]
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._main: Optional[asyncio.Task] = None
+        self._upkeep: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._running_ids: Set[int] = set()
+        self._stopping = False
+
+    # ----- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._main is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._main = self._loop.create_task(self._run(), name="job-runner")
+        self._upkeep = self._loop.create_task(self._maintain(), name="job-runner-upkeep")
+
+    async def stop(self, grace_sec: float = 30) -> None:
+        if self._main is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        for task in (self._main, self._upkeep):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            # Threads can't be interrupted; unfinished jobs go back via the stale sweep
+            await asyncio.wait(self._running, timeout=grace_sec)
+        self._executor.shutdown(wait=False)
+        self._main = self._upkeep = None
+
+    def wake(self) -> None:
+        """Called after enqueue+commit (from any thread) to skip the poll wait."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ----- loop ------------------------------------------------------------
+
+    async def _run(self) -> None:
+        slots = asyncio.Semaphore(self.workers)
+        while not self._stopping:
+            try:
+                await slots.acquire()
+                claimed = await asyncio.to_thread(self._claim)
+                if claimed is None:
+                    slots.release()
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=self.poll_sec)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                task = asyncio.create_task(self._execute(claimed, slots))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("jobs: runner loop error")
+                await asyncio.sleep(self.poll_sec)
+
+    async def _maintain(self) -> None:
+        """Heartbeat our running jobs and requeue other workers' dead ones."""
+        tick = 0
+        while not self._stopping:
+            try:
+                if self._running_ids:
+                    await asyncio.to_thread(self._heartbeat, list(self._running_ids))
+                if tick % 2 == 0:
+                    await asyncio.to_thread(self._sweep)
+            except Exception:
+                log.exception("jobs: upkeep error")
+            tick += 1
+            await asyncio.sleep(self.stale_sec / 4)
+
+    async def _execute(self, claimed, slots: asyncio.Semaphore) -> None:
+        self._running_ids.add(claimed.id)
+        jobs_running.inc()
+        try:
+            await self._loop.run_in_executor(self._executor, self._run_job, claimed)
+        finally:
+            jobs_running.dec()
+            self._running_ids.discard(claimed.id)
+            slots.release()
+
+    # ----- blocking parts (threads) ----------------------------------------
+
+    def _claim(self):
+        with SessionLocal() as db:
+            row = db.execute(_sql(db, "claim"), {"worker": self.worker_id, "now": _utcnow()}).first()
+            db.commit()
+            return row
+
+    def _heartbeat(self, ids: List[int]) -> None:
+        with SessionLocal() as db:
+            db.execute(_sql(db, "heartbeat"), {"ids": ids, "worker": self.worker_id, "now": _utcnow()})
+            db.commit()
+
+    def _sweep(self) -> None:
+        with SessionLocal() as db:
+            now = _utcnow()
+            lost = db.execute(_sql(db, "sweep"), {"stale": self.stale_sec, "now": now,
+                                                  "stale_before": now - timedelta(seconds=self.stale_sec)}
+                              ).scalars().all()
+            db.commit()
+        if lost:
+            log.warning("jobs: reclaimed %d job(s) with a stale heartbeat: %s", len(lost), lost)
+
+    def _run_job(self, claimed) -> None:
+        spec = get_kind(claimed.kind)
+        ctx = JobContext(claimed.id, claimed.kind, claimed.location_id, claimed.params or {},
+                         claimed.created_by)
+        started = time.perf_counter()
+        db: Session = SessionLocal()
+        try:
+            if spec is None:
+                raise ValueError(f"Unknown job kind {claimed.kind!r}")
+            result = spec.handler(ctx, db) or {}
+            settled = db.execute(
+                _sql(db, "succeeded"),
+                {"id": claimed.id, "worker": self.worker_id, "attempts": claimed.attempts,
+                 "result": json.dumps(result, default=str), "output": ctx.output,
+                 "output_type": ctx.output_type, "now": _utcnow()},
+            ).rowcount
+            if not settled:
+                db.rollback()
+                log.warning("jobs: %s #%s was reclaimed while running (stale heartbeat); discarding this "
+                            "attempt", claimed.kind, claimed.id)
+                jobs_finished.inc(claimed.kind, "lost")
+                return
+            db.commit()   # the job's work and its success land together
+        except Exception as e:
+            db.rollback()
+            log.warning("jobs: %s #%s failed (attempt %s/%s): %s", claimed.kind, claimed.id,
+                        claimed.attempts, claimed.max_attempts, e)
+            self._record_failure(claimed, e)
+            jobs_finished.inc(claimed.kind, "failed")
+            return
+        finally:
+            db.close()
+
+        jobs_finished.inc(claimed.kind, "succeeded")
+        log.info("jobs: %s #%s succeeded in %.2fs", claimed.kind, claimed.id, time.perf_counter() - started)
+        for fn in ctx.after_commit:
+            try:
+                fn()
+            except Exception:
+                log.exception("jobs: after-commit hook failed for #%s", claimed.id)
+
+    def _record_failure(self, claimed, exc: Exception) -> None:
+        retry = claimed.attempts < claimed.max_attempts
+        backoff = RETRY_BACKOFF_BASE_SEC * 2 ** (claimed.attempts - 1) if retry else 0
+        now = _utcnow()
+        with SessionLocal() as db:
+            db.execute(
+                _sql(db, "failed"),
+                {"id": claimed.id, "worker": self.worker_id, "attempts": claimed.attempts,
+                 "status": "queued" if retry else "failed",
+                 "error": f"{type(exc).__name__}: {exc}"[:2000], "retry": retry, "backoff": backoff,
+                 "now": now, "run_after": now + timedelta(seconds=backoff)},
+            )
+            db.commit()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,337 @@
+# app/services/outbox.py
+"""
+Transactional outbox: side effects of a write, delivered after it commits.
+
+Handlers record events with emit() (or the helpers below) in the same
+transaction as the write that causes them, so an event exists iff the write
+committed, and the request never waits on a webhook or mailer:
+
+    outbox.count_approved(db, row, item, qty_before, current_qty)   # before db.commit()
+
+The OutboxDispatcher (started by the app lifespan when OUTBOX_ENABLED) claims
+pending rows in batches of OUTBOX_BATCH_SIZE with FOR UPDATE SKIP LOCKED, so
+every API process can run one, hands each batch to the sink, and marks it
+delivered. A failed batch is retried with exponential backoff; an event that
+fails OUTBOX_MAX_ATTEMPTS times is marked dead and kept for inspection.
+
+Delivery is at least once: a claim leases the rows (pushes available_at out by
+LEASE_SEC), so a dispatcher that dies mid-batch leaves them to whoever claims
+next. Sinks get each event's id to de-duplicate on. Events are ordered by id
+within a batch, not across retries.
+
+Sinks (OUTBOX_SINK):
+
+- log (default): one log line per event
+- file: JSON lines appended to OUTBOX_FILE
+- http: one POST {"events": [...]} per batch to OUTBOX_HTTP_URL; any error or
+  non-2xx status fails the batch. `python -m bench.outbox_receiver` is a
+  local stand-in for the real endpoint.
+"""
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, registry
+from app.core.orm import SessionLocal
+from app.models.counts import Count
+from app.models.items import Item
+from app.models.outbox import OutboxEvent
+
+log = logging.getLogger(__name__)
+
+COUNT_APPROVED = "count.approved"
+ITEM_BELOW_PAR = "item.below_par"
+
+LEASE_SEC = 60                  # a claimed batch is re-deliverable after this
+BACKOFF_BASE_SEC = 2
+BACKOFF_MAX_SEC = 600
+HTTP_TIMEOUT_SEC = 10           # well inside the lease
+PRUNE_EVERY_SEC = 60
+PRUNE_BATCH = 1000
+DELIVERED_RETENTION = timedelta(days=1)
+_EMITTED = "pantrypal_outbox_emitted"   # Session.info key
+
+outbox_events = registry.register(Counter(
+    "pantrypal_outbox_events_total", "Outbox events by sink and outcome (delivered, failed, dead).",
+    ("sink", "outcome")))
+outbox_lag = registry.register(Histogram(
+    "pantrypal_outbox_lag_seconds", "Time from an event's commit to its delivery.", ("sink",)))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ----- emit ------------------------------------------------------------------
+
+def emit(db: Session, location_id: int, topic: str, payload: Dict[str, Any]) -> None:
+    """Add an event to the session; it is written (and later sent) iff the transaction commits."""
+    db.add(OutboxEvent(location_id=location_id, topic=topic, payload=payload))
+    db.info[_EMITTED] = True
+
+
+def _item_state(item: Item, current_qty: int, par_level: int) -> Dict[str, Any]:
+    return {"item_id": item.id, "name": item.name, "base_unit": item.base_unit,
+            "current_qty": current_qty, "par_level": par_level}
+
+
+def _below_par_if_crossed(db: Session, item: Item, qty_before: int, par_before: int, qty_after: int,
+                          cause: Dict[str, Any]) -> None:
+    # Only the transition: an item that was already below par has been reported
+    if item.is_active and qty_before >= par_before and qty_after < item.par_level:
+        emit(db, item.location_id, ITEM_BELOW_PAR, {
+            **_item_state(item, qty_after, item.par_level), "deficit": item.par_level - qty_after,
+            "qty_before": qty_before, "par_before": par_before, **cause,
+        })
+
+
+def count_approved(db: Session, count: Count, item: Item, qty_before: int, current_qty: int) -> None:
+    """count.approved, plus item.below_par if the approval took the item below par."""
+    emit(db, item.location_id, COUNT_APPROVED, {
+        "count_id": count.id, **_item_state(item, current_qty, item.par_level),
+        "approved_count": count.approved_count, "qty_before": qty_before,
+        "approved_by": count.approved_by, "approved_at": count.approved_at.isoformat(),
+    })
+    _below_par_if_crossed(db, item, qty_before, item.par_level, current_qty,
+                          {"cause": "count", "count_id": count.id})
+
+
+def par_changed(db: Session, item: Item, qty_before: int, par_before: int) -> None:
+    """item.below_par if a par edit (already applied to `item`) put it below par."""
+    _below_par_if_crossed(db, item, qty_before, par_before, item.current_qty, {"cause": "par_change"})
+
+
+# ----- sinks -----------------------------------------------------------------
+
+class OutboxMessage(NamedTuple):
+    id: int
+    location_id: int
+    topic: str
+    payload: Dict[str, Any]
+    created_at: datetime
+    attempts: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "location_id": self.location_id, "topic": self.topic,
+                "payload": self.payload, "created_at": self.created_at.isoformat(), "attempt": self.attempts}
+
+
+class Sink(Protocol):
+    """Delivers a whole batch or raises; called from a worker thread."""
+    name: str
+
+    def send(self, batch: List[OutboxMessage]) -> None: ...
+
+
+class LogSink:
+    name = "log"
+
+    def send(self, batch: List[OutboxMessage]) -> None:
+        for m in batch:
+            log.info("outbox: %s #%s location=%s %s", m.topic, m.id, m.location_id, json.dumps(m.payload))
+
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, path: str = settings.outbox_file) -> None:
+        self.path = Path(path)
+
+    def send(self, batch: List[OutboxMessage]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(m.as_dict()) + "\n" for m in batch))
+
+
+class HttpSink:
+    name = "http"
+
+    def __init__(self, url: str = settings.outbox_http_url, timeout: float = HTTP_TIMEOUT_SEC) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, batch: List[OutboxMessage]) -> None:
+        body = json.dumps({"events": [m.as_dict() for m in batch]}).encode()
+        req = urllib.request.Request(self.url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        # urlopen raises HTTPError for 4xx/5xx
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+def make_sink(name: str = settings.outbox_sink) -> Sink:
+    if name == "log":
+        return LogSink()
+    if name == "file":
+        return FileSink()
+    if name == "http":
+        return HttpSink()
+    raise ValueError(f"Unknown OUTBOX_SINK {name!r} (expected 'log', 'file' or 'http')")
+
+
+# ----- dispatcher ------------------------------------------------------------
+
+class OutboxDispatcher:
+    def __init__(self, sink: Optional[Sink] = None, batch_size: int = settings.outbox_batch_size,
+                 poll_sec: float = settings.outbox_poll_sec,
+                 max_attempts: int = settings.outbox_max_attempts) -> None:
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_sec = poll_sec
+        self.max_attempts = max_attempts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._main: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_prune = 0.0
+
+    # ----- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        if self._main is not None:
+            return
+        if self.sink is None:
+            self.sink = make_sink()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._main = self._loop.create_task(self._run(), name="outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._main is None:
+            return
+        # A batch in flight finishes in its thread; if it is cut off, the lease brings it back
+        self._stopping = True
+        self._main.cancel()
+        try:
+            await self._main
+        except asyncio.CancelledError:
+            pass
+        self._main = None
+
+    def wake(self) -> None:
+        """Skip the poll wait (after a commit that emitted events; from any thread)."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def install(self, factory: sessionmaker) -> None:
+        """Hook the session factory so a commit that emitted events wakes the dispatcher."""
+        event.listen(factory, "after_commit", lambda s: s.info.pop(_EMITTED, False) and self.wake())
+        event.listen(factory, "after_rollback", lambda s: s.info.pop(_EMITTED, None))
+
+    # ----- loop ------------------------------------------------------------
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                self._wake.clear()
+                delivered = await asyncio.to_thread(self.dispatch_once)
+                if delivered == self.batch_size:
+                    continue                # more backlog: no wait
+                if time.monotonic() - self._last_prune > PRUNE_EVERY_SEC:
+                    await asyncio.to_thread(self.prune)
+                    self._last_prune = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_sec)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("outbox: dispatcher loop error")
+                await asyncio.sleep(self.poll_sec)
+
+    # ----- blocking parts (threads) ----------------------------------------
+
+    def dispatch_once(self) -> int:
+        """Claim, send and settle one batch; returns how many events were delivered."""
+        batch = self._claim()
+        if not batch:
+            return 0
+        try:
+            self.sink.send(batch)
+        except Exception as e:
+            self._record_failure(batch, e)
+            return 0
+        now = _utcnow()
+        with SessionLocal() as db:
+            db.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_([m.id for m in batch]))
+                .values(status="delivered", delivered_at=now, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        outbox_events.inc(self.sink.name, "delivered", amount=len(batch))
+        for m in batch:
+            outbox_lag.observe(self.sink.name, value=max(0.0, (now - m.created_at).total_seconds()))
+        return len(batch)
+
+    def _claim(self) -> List[OutboxMessage]:
+        now = _utcnow()
+        due = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)      # rendered on Postgres only
+        )
+        with SessionLocal() as db:
+            rows = db.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_(due.scalar_subquery()))
+                .values(attempts=OutboxEvent.attempts + 1, available_at=now + timedelta(seconds=LEASE_SEC))
+                .returning(OutboxEvent.id, OutboxEvent.location_id, OutboxEvent.topic, OutboxEvent.payload,
+                           OutboxEvent.created_at, OutboxEvent.attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+        return sorted((OutboxMessage(*r) for r in rows), key=lambda m: m.id)
+
+    def _record_failure(self, batch: List[OutboxMessage], exc: Exception) -> None:
+        error = f"{type(exc).__name__}: {exc}"[:2000]
+        now = _utcnow()
+        settled = []
+        for m in batch:
+            dead = m.attempts >= self.max_attempts
+            backoff = min(BACKOFF_BASE_SEC * 2 ** (m.attempts - 1), BACKOFF_MAX_SEC)
+            settled.append({"id": m.id, "status": "dead" if dead else "pending", "last_error": error,
+                            "available_at": now + timedelta(seconds=backoff)})
+        with SessionLocal() as db:
+            db.execute(update(OutboxEvent), settled)        # bulk UPDATE by primary key
+            db.commit()
+        dead = sum(1 for s in settled if s["status"] == "dead")
+        outbox_events.inc(self.sink.name, "failed", amount=len(batch) - dead)
+        outbox_events.inc(self.sink.name, "dead", amount=dead)
+        log.warning("outbox: %s sink failed for %d event(s) (%d now dead): %s",
+                    self.sink.name, len(batch), dead, error)
+
+    def prune(self) -> int:
+        """Delete up to PRUNE_BATCH delivered events older than DELIVERED_RETENTION."""
+        old = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == "delivered", OutboxEvent.delivered_at < _utcnow() - DELIVERED_RETENTION)
+            .limit(PRUNE_BATCH)
+        )
+        with SessionLocal() as db:
+            n = db.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_(old.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+        return n
+
+
+def _install_default() -> OutboxDispatcher:
+    d = OutboxDispatcher()
+    d.install(SessionLocal)
+    return d
+
+
+dispatcher = _install_default()
@@ -0,0 +1,140 @@
+# app/services/queries.py
+"""
+Hot-path read statements as 2.0-style lambda_stmt()s.
+
+A plain select() is rebuilt on every call and then walked to compute its
+cache key before the compiled-SQL cache can be consulted. A lambda_stmt is
+keyed by the lambda's code location plus its closure variables, so after the
+first call the construct isn't rebuilt at all: closure values become bound
+parameters and the SQL comes straight from the engine's compiled cache.
+Optional filters are appended with `stmt += lambda s: ...`; each combination
+gets its own cache entry.
+
+Closure variables must be plain values (ints, strings, lists of ints), never
+SQL expressions computed outside the lambda.
+
+Statements whose shape never changes (only their parameters) are simply
+built once at import time and executed with a parameter dict.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import ARRAY, Integer, any_, bindparam, func, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+from app.core.db import dialect_name
+from app.models.counts import Count
+from app.models.items import Item, ITEM_DEFICIT, LOW_STOCK_WHERE
+from app.models.users import User
+
+
+def user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.execute(lambda_stmt(lambda: select(User).where(User.email == email))).scalar_one_or_none()
+
+
+def pending_item_among(db: Session, location_id: int, item_ids: Iterable[int]) -> Optional[int]:
+    """An item id from `item_ids` that already has a pending count, if any."""
+    ids = list(item_ids)
+    return db.execute(lambda_stmt(lambda: (
+        select(Count.item_id)
+        .where(Count.location_id == location_id, Count.status == "pending", Count.item_id.in_(ids))
+        .limit(1)
+    ))).scalar()
+
+
+def item_has_counts(db: Session, item_id: int) -> bool:
+    return db.execute(lambda_stmt(
+        lambda: select(Count.id).where(Count.item_id == item_id).limit(1)
+    )).first() is not None
+
+
+# One array parameter instead of an expanded IN list: the SQL text (and the
+# server's plan) is the same whatever the batch size. SQLite has no arrays.
+_ITEMS_BY_IDS = {
+    "postgresql": select(Item).where(
+        Item.location_id == bindparam("location_id"),
+        Item.id == any_(bindparam("ids", type_=ARRAY(Integer))),
+    ),
+    "sqlite": select(Item).where(
+        Item.location_id == bindparam("location_id"),
+        Item.id.in_(bindparam("ids", expanding=True)),
+    ),
+}
+
+
+def items_by_ids(db: Session, location_id: int, item_ids: Iterable[int]) -> List[Item]:
+    """Items of one location among `item_ids`, in no particular order."""
+    stmt = _ITEMS_BY_IDS[dialect_name(db)]
+    return list(db.execute(stmt, {"location_id": location_id, "ids": list(item_ids)}).scalars())
+
+
+def _count_filters(stmt, location_id, status, item_id, submitted_by):
+    if location_id is not None:
+        stmt += lambda s: s.where(Count.location_id == location_id)
+    if status is not None:
+        stmt += lambda s: s.where(Count.status == status)
+    if item_id is not None:
+        stmt += lambda s: s.where(Count.item_id == item_id)
+    if submitted_by is not None:
+        stmt += lambda s: s.where(Count.submitted_by == submitted_by)
+    return stmt
+
+
+def count_rows(
+    db: Session,
+    location_id: Optional[int] = None,
+    status: Optional[str] = None,
+    item_id: Optional[int] = None,
+    submitted_by: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Count]:
+    """Counts matching the filters, newest submission first."""
+    stmt = _count_filters(lambda_stmt(lambda: select(Count)), location_id, status, item_id, submitted_by)
+    stmt += lambda s: s.order_by(Count.submitted_at.desc())
+    if limit is not None:
+        stmt += lambda s: s.limit(limit).offset(offset)
+    return list(db.execute(stmt).scalars())
+
+
+def count_total(
+    db: Session,
+    location_id: Optional[int] = None,
+    status: Optional[str] = None,
+    item_id: Optional[int] = None,
+    submitted_by: Optional[int] = None,
+) -> int:
+    stmt = _count_filters(lambda_stmt(lambda: select(func.count()).select_from(Count)),
+                          location_id, status, item_id, submitted_by)
+    return db.execute(stmt).scalar_one()
+
+
+def count_page(
+    db: Session,
+    location_id: Optional[int] = None,
+    status: Optional[str] = None,
+    item_id: Optional[int] = None,
+    submitted_by: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Tuple[int, List[Count]]:
+    """(total matching, one page of rows)."""
+    total = count_total(db, location_id, status, item_id, submitted_by)
+    return total, count_rows(db, location_id, status, item_id, submitted_by, limit, offset)
+
+
+def low_stock_items(db: Session, location_id: int, sort: str, limit: int, offset: int) -> List[Item]:
+    """Active below-par items; the predicate matches the partial indexes' WHERE."""
+    stmt = lambda_stmt(lambda: select(Item).where(Item.location_id == location_id, LOW_STOCK_WHERE))
+    if sort == "name":
+        stmt += lambda s: s.order_by(Item.name, Item.id)
+    else:
+        stmt += lambda s: s.order_by(ITEM_DEFICIT.desc(), Item.id)
+    stmt += lambda s: s.limit(limit).offset(offset)
+    return list(db.execute(stmt).scalars())
+
+
+def low_stock_total(db: Session, location_id: int) -> int:
+    """How many items low_stock_items() pages over (a count on the same partial index)."""
+    stmt = lambda_stmt(lambda: select(func.count()).select_from(Item)
+                       .where(Item.location_id == location_id, LOW_STOCK_WHERE))
+    return db.execute(stmt).scalar_one()
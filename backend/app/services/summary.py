@@ -0,0 +1,115 @@
+# app/services/summary.py
+"""
+Manager home-screen numbers in one SQL round trip.
+
+pending / low-stock counts are scalar subqueries served by the location-scoped
+indexes; today's approvals/rejections come from one FILTER aggregate; the top-N
+deficit items are joined onto that single aggregate row.
+"""
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import InvalidationEvent, bus
+from app.models.counts import Count
+from app.models.items import Item, ITEM_DEFICIT, LOW_STOCK_WHERE
+from app.schemas.dashboard import DashSummary, DeficitItem
+
+# "Today" boundary for approvals/rejections
+DASH_TZ = ZoneInfo(settings.dash_tz)
+
+summary_cache = TTLCache(settings.dash_summary_ttl_sec, name="dash_summary")
+
+
+class _SummaryInvalidation:
+    """Keys are (location_id, include_review, top_n): drop the location's entries."""
+
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        loc = event.location_id
+        summary_cache.invalidate_where(lambda key: loc is None or key[0] == loc)
+
+
+bus.subscribe(["items", "counts"], _SummaryInvalidation())
+
+
+def _start_of_today() -> datetime:
+    now = datetime.now(DASH_TZ)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def summary_statement(location_id: int, top_n: int):
+    day_start = _start_of_today()
+
+    pending = (
+        select(func.count())
+        .select_from(Count)
+        .where(Count.location_id == location_id, Count.status == "pending")
+        .scalar_subquery()
+    )
+    low_stock = (
+        select(func.count())
+        .select_from(Item)
+        .where(Item.location_id == location_id, LOW_STOCK_WHERE)
+        .scalar_subquery()
+    )
+    reviewed = (
+        select(
+            func.count().filter(Count.status == "approved").label("approved_today"),
+            func.count().filter(Count.status == "rejected").label("rejected_today"),
+        )
+        .where(Count.location_id == location_id, Count.approved_at >= day_start)
+        .subquery("reviewed")
+    )
+    top = (
+        select(
+            Item.id, Item.name, Item.base_unit, Item.par_level, Item.current_qty,
+            ITEM_DEFICIT.label("deficit"),
+        )
+        .where(Item.location_id == location_id, LOW_STOCK_WHERE)
+        .order_by(ITEM_DEFICIT.desc(), Item.id)
+        .limit(top_n)
+        .subquery("top_items")
+    )
+    return (
+        select(
+            pending.label("pending"),
+            low_stock.label("low_stock"),
+            reviewed.c.approved_today,
+            reviewed.c.rejected_today,
+            top,
+        )
+        .select_from(reviewed.outerjoin(top, true()))
+        .order_by(top.c.deficit.desc(), top.c.id)
+    )
+
+
+def build_summary(db: Session, location_id: int, include_review: bool, top_n: int) -> DashSummary:
+    rows = db.execute(summary_statement(location_id, top_n)).all()
+    first = rows[0]  # the aggregate row always exists
+    return DashSummary(
+        generated_at=datetime.now(timezone.utc),
+        pending=first.pending if include_review else None,
+        approved_today=first.approved_today if include_review else None,
+        rejected_today=first.rejected_today if include_review else None,
+        low_stock=first.low_stock,
+        top_deficit=[
+            DeficitItem(
+                id=r.id, name=r.name, base_unit=r.base_unit,
+                par_level=r.par_level, current_qty=r.current_qty, deficit=r.deficit,
+            )
+            for r in rows if r.id is not None
+        ],
+    )
+
+
+def get_summary(db: Session, location_id: int, role: str, top_n: int) -> DashSummary:
+    """Cached per (location, role class, N); one recomputation per key per TTL."""
+    include_review = role in ("admin", "manager")
+    key = (location_id, include_review, top_n)
+    return summary_cache.get_or_compute(
+        key, lambda: build_summary(db, location_id, include_review, top_n)
+    )
@@ -0,0 +1,190 @@
+# app/testing.py
+"""
+pytest fixtures for running the app against a throwaway database.
+
+    # conftest.py
+    pytest_plugins = ["app.testing"]
+
+    def test_low_stock(client, make_item, auth_headers):
+        make_item(name="Tomatoes", par_level=10, current_qty=2)
+        r = client.get("/dash/low-stock", headers=auth_headers())
+        assert "Tomatoes" in [i["name"] for i in r.json()["items"]]
+
+The database is TEST_DATABASE_URL, default the in-memory shared-cache SQLite
+database (app.core.db). It must be chosen before anything imports app.core.config,
+which is why this module sets DATABASE_URL at import time: load it as a plugin,
+not from inside a test module. The schema is built from the models once per
+session; each test then runs inside one outer transaction that is rolled back
+afterwards. Sessions the app opens join it through savepoints, so a handler's
+commit() releases a savepoint instead of committing.
+
+The count sheet and CSV export streams (app.core.db.stream_connection) read
+on the test's connection too. Code that opens its own connection (the
+Postgres rate-limit/invalidation backends, the health probe) runs outside the
+transaction and doesn't see the test's rows. Also on Postgres, now() is the
+outer transaction's start time for the whole test, so rows stamped in Python
+(e.g. a job's run_after) are "later".
+"""
+import os
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite://")
+os.environ.setdefault("WARMUP", "0")
+os.environ.setdefault("JOBS_ENABLED", "0")
+os.environ.setdefault("OUTBOX_ENABLED", "0")
+
+import itertools  # noqa: E402
+from typing import Callable, Dict, Iterator, Optional  # noqa: E402
+
+import pytest  # noqa: E402
+from sqlalchemy.engine import Connection, Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core.db import dialect_name, engine  # noqa: E402
+from app.core.orm import SessionLocal, create_schema  # noqa: E402
+from app.models.counts import Count  # noqa: E402
+from app.models.items import Item  # noqa: E402
+from app.models.locations import DEFAULT_LOCATION_ID, Location  # noqa: E402
+from app.models.users import User  # noqa: E402
+
+TEST_PASSWORD = "test-password"
+
+_seq = itertools.count(1)
+_password_hash: Optional[str] = None
+
+
+def _test_password_hash() -> str:
+    # bcrypt is deliberately slow: hash the shared test password once
+    global _password_hash
+    if _password_hash is None:
+        from app.security.passwords import hash_password
+        _password_hash = hash_password(TEST_PASSWORD)
+    return _password_hash
+
+
+@pytest.fixture(scope="session")
+def db_engine() -> Engine:
+    """The app engine with the schema in place (created from the models on SQLite)."""
+    if dialect_name(engine) == "sqlite":
+        create_schema(engine)
+    return engine
+
+
+@pytest.fixture
+def db_connection(db_engine: Engine) -> Iterator[Connection]:
+    """One connection and outer transaction per test, rolled back at the end."""
+    from app.core import db as core_db
+    from app.core.invalidation import bus
+    from app.security.ratelimit import MemoryStore, limiter
+
+    conn = db_engine.connect()
+    outer = conn.begin()
+    SessionLocal.configure(bind=conn, join_transaction_mode="create_savepoint")
+    core_db._stream_connection = conn
+    limiter.store = MemoryStore()
+    bus.evict_all()
+    try:
+        yield conn
+    finally:
+        SessionLocal.configure(bind=db_engine, join_transaction_mode="conservative_savepoint")
+        core_db._stream_connection = None
+        bus.evict_all()
+        outer.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def db(db_connection: Connection) -> Iterator[Session]:
+    """A Session inside the test's transaction; commit() releases a savepoint."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db_connection: Connection):
+    """TestClient on a fresh app, without the lifespan (no warm-up, probe or workers)."""
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+
+    return TestClient(create_app())
+
+
+# ----- factories ---------------------------------------------------------------
+
+@pytest.fixture
+def make_location(db: Session) -> Callable[..., Location]:
+    def _make(**fields) -> Location:
+        n = next(_seq)
+        fields.setdefault("code", f"loc-{n}")
+        fields.setdefault("name", f"Location {n}")
+        loc = Location(**fields)
+        db.add(loc)
+        db.flush()
+        return loc
+    return _make
+
+
+@pytest.fixture
+def make_user(db: Session) -> Callable[..., User]:
+    """Users log in with TEST_PASSWORD; default role manager at the default location."""
+    def _make(**fields) -> User:
+        n = next(_seq)
+        fields.setdefault("email", f"user{n}@test.pantrypal.dev")
+        fields.setdefault("name", f"User {n}")
+        fields.setdefault("role", "manager")
+        fields.setdefault("location_id", DEFAULT_LOCATION_ID)
+        fields.setdefault("password_hash", _test_password_hash())
+        user = User(**fields)
+        db.add(user)
+        db.flush()
+        return user
+    return _make
+
+
+@pytest.fixture
+def make_item(db: Session) -> Callable[..., Item]:
+    """Items at the default location; a non-zero current_qty goes on the ledger as a reset."""
+    from app.services.inventory import record_reset
+
+    def _make(**fields) -> Item:
+        n = next(_seq)
+        fields.setdefault("name", f"Item {n}")
+        fields.setdefault("base_unit", "pcs")
+        fields.setdefault("par_level", 0)
+        fields.setdefault("location_id", DEFAULT_LOCATION_ID)
+        qty = fields.setdefault("current_qty", 0)
+        item = Item(**fields)
+        db.add(item)
+        db.flush()
+        if qty:
+            record_reset(db, item.location_id, item.id, "opening", qty)
+        return item
+    return _make
+
+
+@pytest.fixture
+def make_count(db: Session) -> Callable[..., Count]:
+    """A pending count of `item` by `user`; pass status/approved_* for other states."""
+    def _make(item, user, count: int = 0, **fields) -> Count:
+        row = Count(location_id=item.location_id, item_id=item.id, count=count,
+                    submitted_by=user.id, **fields)
+        db.add(row)
+        db.flush()
+        return row
+    return _make
+
+
+@pytest.fixture
+def auth_headers(make_user) -> Callable[..., Dict[str, str]]:
+    """Bearer headers for `user` (a new manager if omitted), minted without /auth/login."""
+    from app.security.jwt import create_access_token
+
+    def _headers(user=None) -> Dict[str, str]:
+        user = user or make_user()
+        token = create_access_token({"sub": str(user.id), "role": user.role,
+                                     "email": user.email, "loc": user.location_id})
+        return {"Authorization": f"Bearer {token}"}
+    return _headers
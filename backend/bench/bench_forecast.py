@@ -0,0 +1,84 @@
+# bench/bench_forecast.py
+"""
+Benchmark the vectorized forecast core at fleet scale.
+
+Default: synthetic in-memory history (no DB needed), 50k items x 365 daily counts.
+
+    python -m bench.bench_forecast --items 50000 --days 365
+
+With --db, also times build_forecast() end-to-end against DATABASE_URL
+(whatever history is already loaded there).
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.services.forecast import compute_usage, suggest_par
+
+
+def synth_history(n_items: int, days: int, seed: int = 42):
+    """Daily counts with per-item usage, noise and weekly restocks, sorted by (item, t)."""
+    rng = np.random.default_rng(seed)
+    usage = rng.gamma(2.0, 5.0, n_items)                      # mean units/day per item
+    daily = rng.poisson(usage[:, None], size=(n_items, days)).astype(np.float64)
+
+    # Restock to ~10 days of usage every 7 days; on-hand = level - usage since restock
+    day = np.arange(days)
+    week_start = day - day % 7
+    cum = np.cumsum(daily, axis=1)
+    since_restock = cum - cum[:, week_start] + daily[:, week_start]
+    qty = np.clip(usage[:, None] * 10 - since_restock, 0, None)
+
+    idx = np.repeat(np.arange(n_items, dtype=np.int64), days)
+    t = np.tile(day.astype(np.float64), n_items)
+    return idx, t, qty.ravel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Forecast engine benchmark")
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", action="store_true", help="also time build_forecast() against DATABASE_URL")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    idx, t, qty = synth_history(args.items, args.days)
+    gen_s = time.perf_counter() - t0
+
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        usage = compute_usage(idx, t, qty, args.items)
+        suggest_par(usage["rate"], usage["sd"])
+        timings.append(time.perf_counter() - t0)
+
+    results = {
+        "items": args.items,
+        "days": args.days,
+        "observations": int(idx.size),
+        "generate_seconds": round(gen_s, 3),
+        "compute_seconds_best": round(min(timings), 3),
+        "observations_per_sec": round(idx.size / min(timings)),
+    }
+
+    if args.db:
+        from app.core.orm import SessionLocal
+        from app.models.locations import DEFAULT_LOCATION_ID
+        from app.services.forecast import build_forecast
+        db = SessionLocal()
+        try:
+            t0 = time.perf_counter()
+            snap = build_forecast(db, DEFAULT_LOCATION_ID)
+            results["db_build_seconds"] = round(time.perf_counter() - t0, 3)
+            results["db_items"] = len(snap.rows)
+        finally:
+            db.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
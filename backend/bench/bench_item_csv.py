@@ -0,0 +1,92 @@
+# bench/bench_item_csv.py
+"""
+Benchmark COPY-based item CSV import/export at catalog scale.
+
+Needs a migrated Postgres at DATABASE_URL (rows are written to `items`,
+so point it at a scratch database):
+
+    python -m bench.bench_item_csv --rows 100000
+"""
+import argparse
+import io
+import json
+import time
+
+from sqlalchemy import text
+
+from app.core.orm import SessionLocal
+from app.models.locations import DEFAULT_LOCATION_ID
+from app.services import item_csv
+
+UNITS = ("g", "ml", "pcs")
+
+
+def make_csv(rows: int, prefix: str, bad_every: int = 0) -> str:
+    """Synthetic catalog; every `bad_every`-th row has an invalid base_unit."""
+    buf = io.StringIO()
+    buf.write("name,base_unit,par_level\n")
+    for i in range(rows):
+        unit = "kg" if bad_every and i % bad_every == 0 else UNITS[i % 3]
+        buf.write(f"{prefix} {i:07d},{unit},{(i * 37) % 5000}\n")
+    return buf.getvalue()
+
+
+def timed_import(csv_text: str) -> dict:
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        result = item_csv.import_items_csv(db, DEFAULT_LOCATION_ID, io.StringIO(csv_text, newline=""))
+        db.commit()
+        elapsed = time.perf_counter() - t0
+    finally:
+        db.close()
+    return {
+        "seconds": round(elapsed, 3),
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "errors": len(result.errors),
+    }
+
+
+def timed_export() -> dict:
+    out = io.BytesIO()
+    t0 = time.perf_counter()
+    written = item_csv.export_items_csv(DEFAULT_LOCATION_ID, out)
+    return {"seconds": round(time.perf_counter() - t0, 3), "bytes": written}
+
+
+def cleanup(prefix: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM items WHERE name LIKE :p"), {"p": f"{prefix} %"})
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="COPY import/export benchmark")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--bad-every", type=int, default=1000, help="inject an invalid row every N rows (0=off)")
+    parser.add_argument("--keep", action="store_true", help="leave benchmark rows in the table")
+    args = parser.parse_args()
+
+    prefix = "bench-item"
+    cleanup(prefix)
+    csv_text = make_csv(args.rows, prefix, args.bad_every)
+
+    results = {"rows": args.rows}
+    results["import_fresh"] = timed_import(csv_text)       # all INSERTs
+    results["import_upsert"] = timed_import(csv_text)      # all ON CONFLICT updates
+    results["export"] = timed_export()
+    for key in ("import_fresh", "import_upsert", "export"):
+        secs = results[key]["seconds"]
+        results[key]["rows_per_sec"] = round(args.rows / secs) if secs else None
+
+    if not args.keep:
+        cleanup(prefix)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bench/bench_outbox.py
+"""
+What notifications cost the approval request: outbox vs an inline webhook.
+
+    python -m bench.bench_outbox --approvals 100 --delay-ms 200    # needs seed users/items; writes counts
+
+Starts bench.outbox_receiver in-process as a webhook that takes --delay-ms to
+answer, then submits and approves counts (alternating just below and just
+above par, so every other approval also raises item.below_par), timing each
+from the submit to the approve response:
+
+- outbox: the app as shipped (OUTBOX_SINK=http to the receiver); the
+  dispatcher delivers in the background. Also reports the delivery lag from
+  the approve response to the receiver seeing the event.
+- inline: the same approval followed by a synchronous POST of its event to
+  the receiver inside the timed window, i.e. what calling the webhook from
+  approve_count would add to the manager's click.
+"""
+import argparse
+import json
+import os
+import time
+
+
+def _pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Approval latency with outbox vs inline notifications")
+    parser.add_argument("--approvals", type=int, default=100, help="approvals per mode")
+    parser.add_argument("--delay-ms", type=float, default=200, help="webhook response time")
+    args = parser.parse_args()
+
+    from bench.outbox_receiver import Receiver
+
+    receiver = Receiver(delay_ms=args.delay_ms, quiet=True)
+    url = receiver.serve_in_thread()
+    # Settings are read at import: configure before importing the app
+    os.environ.update({"OUTBOX_ENABLED": "1", "OUTBOX_SINK": "http", "OUTBOX_HTTP_URL": url,
+                       "OUTBOX_POLL_SEC": "0.5", "WARMUP": "0", "JOBS_ENABLED": "0", "RATE_LIMIT_ENABLED": "0"})
+
+    from datetime import datetime, timezone
+
+    from fastapi.testclient import TestClient
+
+    from app.main import create_app
+    from app.services.outbox import COUNT_APPROVED, HttpSink, OutboxMessage
+
+    inline_sink = HttpSink(url)
+    with TestClient(create_app()) as client:
+        r = client.post("/auth/login", json={"email": "manager@pantrypal.dev", "password": "manager123"})
+        r.raise_for_status()
+        mgr = {"Authorization": "Bearer " + r.json()["access_token"]}
+        items = client.get("/items?limit=50&is_active=true", headers=mgr).json()["items"]
+        pending = {c["item_id"] for c in client.get("/counts/pending?limit=100", headers=mgr).json()["items"]}
+        item = next(i for i in items if i["id"] not in pending and i["par_level"] > 0)
+
+        def approve(n: int) -> dict:
+            count = item["par_level"] - 1 if n % 2 == 0 else item["par_level"] + 1
+            r = client.post("/counts/submit", json={"item_id": item["id"], "count": count}, headers=mgr)
+            r.raise_for_status()
+            r = client.post(f"/counts/{r.json()['id']}/approve", headers=mgr)
+            r.raise_for_status()
+            return r.json()
+
+        report = {}
+        for mode in ("outbox", "inline"):
+            latencies, answered = [], {}
+            for n in range(args.approvals):
+                t0 = time.perf_counter()
+                row = approve(n)
+                if mode == "inline":
+                    inline_sink.send([OutboxMessage(0, item["location_id"], COUNT_APPROVED, row,
+                                                    datetime.now(timezone.utc), 1)])
+                latencies.append(time.perf_counter() - t0)
+                answered[row["id"]] = time.time()
+            report[mode] = {"approvals": len(latencies), "p50_ms": _pct(latencies, 0.5),
+                            "p95_ms": _pct(latencies, 0.95), "max_ms": _pct(latencies, 1.0)}
+            if mode == "outbox":
+                deadline = time.monotonic() + 60
+                while time.monotonic() < deadline:
+                    seen = {e["payload"]["count_id"]: e["received_at"] for e in receiver.events
+                            if e["topic"] == COUNT_APPROVED and e["id"]}
+                    if all(cid in seen for cid in answered):
+                        break
+                    time.sleep(0.1)
+                lags = [seen[cid] - t for cid, t in answered.items() if cid in seen]
+                report[mode]["delivered"] = len(lags)
+                report[mode]["lag_p50_ms"] = _pct(lags, 0.5)
+                report[mode]["lag_p95_ms"] = _pct(lags, 0.95)
+                report[mode]["below_par_events"] = sum(1 for e in receiver.events if e["topic"] == "item.below_par")
+                report[mode]["webhook_batches"] = receiver.batches
+    receiver.shutdown()
+    report["delay_ms"] = args.delay_ms
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
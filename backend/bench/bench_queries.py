@@ -0,0 +1,172 @@
+# bench/bench_queries.py
+"""
+Python-side cost of the hot read statements: legacy Query vs 2.0 select()
+vs lambda_stmt (app.services.queries).
+
+    python -m bench.bench_queries --iterations 2000      # needs a seeded DB
+    DATABASE_URL=sqlite:// python -m bench.bench_queries  # in-memory; seeds itself
+
+Per call, in microseconds of this process's CPU time (time.process_time, so
+time spent waiting on Postgres is excluded; best of 5 batches):
+
+- build_key_us: construct the statement and compute its cache key — the
+  work done on every call before the compiled cache is even consulted
+- compile_us:   a full SQL compile, i.e. what a compiled-cache miss costs
+- execute_us:   the whole db.execute()+fetch with a warm compiled cache
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import func, lambda_stmt, select
+
+from app.core.db import dialect_name, engine
+from app.core.orm import SessionLocal
+from app.models.counts import Count
+from app.models.items import Item
+from app.models.users import User
+from app.services import queries
+
+
+def _cpu_per_call(fn, iterations: int, repeat: int = 5) -> float:
+    """Best of `repeat` batches (least disturbed by the rest of the machine)."""
+    for _ in range(min(50, iterations)):
+        fn()
+    batch = max(1, iterations // repeat)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(batch):
+            fn()
+        best = min(best, (time.process_time() - start) / batch)
+    return round(best * 1e6, 1)
+
+
+def cases(db, location_id: int, item_id: int, count_id: int, email: str):
+    """name -> {variant: (build() -> statement | None, execute())}."""
+
+    def pending_legacy():
+        q = db.query(Count).filter(Count.location_id == location_id, Count.status == "pending")
+        q = q.filter(Count.item_id == item_id)
+        return q.order_by(Count.submitted_at.desc()).limit(20).offset(0)
+
+    def pending_select():
+        return (select(Count)
+                .where(Count.location_id == location_id, Count.status == "pending", Count.item_id == item_id)
+                .order_by(Count.submitted_at.desc()).limit(20).offset(0))
+
+    def pending_lambda():
+        stmt = lambda_stmt(lambda: select(Count))
+        stmt += lambda s: s.where(Count.location_id == location_id)
+        stmt += lambda s: s.where(Count.status == "pending")
+        stmt += lambda s: s.where(Count.item_id == item_id)
+        stmt += lambda s: s.order_by(Count.submitted_at.desc())
+        stmt += lambda s: s.limit(20).offset(0)
+        return stmt
+
+    def total_legacy():
+        return db.query(Count).filter(Count.location_id == location_id, Count.status == "pending")
+
+    def total_select():
+        return (select(func.count()).select_from(Count)
+                .where(Count.location_id == location_id, Count.status == "pending"))
+
+    def login_legacy():
+        return db.query(User).filter(User.email == email)
+
+    def login_select():
+        return select(User).where(User.email == email)
+
+    def login_lambda():
+        return lambda_stmt(lambda: select(User).where(User.email == email))
+
+    def fresh(fn):
+        def run():
+            db.expunge_all()     # no identity-map shortcut for the get() cases
+            return fn()
+        return run
+
+    return {
+        "count_page_rows": {
+            "legacy_query": (lambda: pending_legacy()._statement_20(), lambda: pending_legacy().all()),
+            "select": (pending_select, lambda: db.execute(pending_select()).scalars().all()),
+            "lambda_stmt": (pending_lambda, lambda: queries.count_rows(
+                db, location_id=location_id, status="pending", item_id=item_id, limit=20)),
+        },
+        "count_page_total": {
+            "legacy_query": (None, lambda: total_legacy().count()),
+            "select": (total_select, lambda: db.execute(total_select()).scalar_one()),
+            "lambda_stmt": (None, lambda: queries.count_total(db, location_id=location_id, status="pending")),
+        },
+        "login_user_lookup": {
+            "legacy_query": (lambda: login_legacy()._statement_20(), lambda: login_legacy().first()),
+            "select": (login_select, lambda: db.execute(login_select()).scalar_one_or_none()),
+            "lambda_stmt": (login_lambda, lambda: queries.user_by_email(db, email)),
+        },
+        "get_by_pk": {
+            "legacy_query": (None, fresh(lambda: db.query(Item).get(item_id))),
+            "session_get": (None, fresh(lambda: db.get(Item, item_id))),
+        },
+        "count_by_pk": {
+            "legacy_query": (None, fresh(lambda: db.query(Count).get(count_id))),
+            "session_get": (None, fresh(lambda: db.get(Count, count_id))),
+        },
+    }
+
+
+def _seed_sqlite() -> None:
+    """Schema plus the demo seeds and one count, if the SQLite database is empty."""
+    from app.core.orm import create_schema
+    from app.seed_items import run as seed_items
+    from app.seed_users import seed_users
+
+    create_schema(engine)
+    with SessionLocal() as db:
+        if db.execute(select(Count.id).limit(1)).first() is not None:
+            return
+    seed_users()
+    seed_items()
+    with SessionLocal() as db:
+        item = db.execute(select(Item).limit(1)).scalar_one()
+        user_id = db.execute(select(User.id).limit(1)).scalar_one()
+        db.add(Count(location_id=item.location_id, item_id=item.id, count=1, submitted_by=user_id))
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Statement construction/compilation micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    import warnings
+    from sqlalchemy.exc import LegacyAPIWarning
+    warnings.simplefilter("ignore", LegacyAPIWarning)
+
+    if dialect_name(engine) == "sqlite":
+        _seed_sqlite()
+    db = SessionLocal()
+    try:
+        row = db.execute(select(Count.location_id, Count.item_id, Count.id).limit(1)).one()
+        email = db.execute(select(User.email).limit(1)).scalar_one()
+        report = {}
+        for name, variants in cases(db, row.location_id, row.item_id, row.id, email).items():
+            report[name] = {}
+            for variant, (build, execute) in variants.items():
+                out = {}
+                if build is not None:
+                    out["build_key_us"] = _cpu_per_call(lambda: build()._generate_cache_key(), args.iterations)
+                    stmt = build()
+                    if hasattr(stmt, "_resolved"):     # lambda: compile the statement it stands for
+                        stmt = stmt._resolved
+                    out["compile_us"] = _cpu_per_call(lambda: stmt.compile(dialect=engine.dialect),
+                                                      max(50, args.iterations // 10))
+                out["execute_us"] = _cpu_per_call(execute, args.iterations)
+                report[name][variant] = out
+    finally:
+        db.close()
+    report["iterations"] = args.iterations
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
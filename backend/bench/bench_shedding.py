@@ -0,0 +1,130 @@
+# bench/bench_shedding.py
+"""
+Overload benchmark: how the write path (submit + reject a count) holds up
+while many clients hammer exports and large list reads.
+
+    python -m bench.bench_shedding --flood 64 --seconds 10     # needs seed users
+
+Runs the same load twice in fresh interpreters, with CONCURRENCY_ENABLED=1
+and =0, and reports write-path latency, how many requests were shed (503),
+and how much flood traffic still completed. Flood clients honour Retry-After.
+Client and app share one process (and GIL), so absolute numbers are
+pessimistic; compare the two runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+FLOOD_REQUESTS = ["/items/export", "/items?limit=100", "/dash/forecast"]
+WRITE_TIMEOUT_SEC = 30
+
+
+def _pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1)
+
+
+async def _child_async(flood: int, seconds: float) -> dict:
+    import httpx
+    from app.main import create_app
+
+    application = create_app()
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def login(email, password):
+            r = await client.post("/auth/login", json={"email": email, "password": password})
+            r.raise_for_status()
+            return {"Authorization": "Bearer " + r.json()["access_token"]}
+
+        admin = await login("admin@pantrypal.dev", "admin123")
+        mgr = await login("manager@pantrypal.dev", "manager123")
+        items = (await client.get("/items?limit=50&is_active=true", headers=mgr)).json()["items"]
+        pending = {c["item_id"] for c in (await client.get("/counts/pending?limit=100", headers=mgr)).json()["items"]}
+        item_id = next(i["id"] for i in items if i["id"] not in pending)
+
+        stop = asyncio.Event()
+        flood_done = {"ok": 0, "shed": 0, "other": 0}
+
+        async def flooder(n):
+            path = FLOOD_REQUESTS[n % len(FLOOD_REQUESTS)]
+            while not stop.is_set():
+                r = await client.get(path, headers=admin)
+                key = "ok" if r.status_code == 200 else "shed" if r.status_code == 503 else "other"
+                flood_done[key] += 1
+                if r.status_code == 503:     # well-behaved clients honour Retry-After
+                    await asyncio.sleep(float(r.headers.get("retry-after", 1)))
+
+        tasks = [asyncio.create_task(flooder(n)) for n in range(flood)]
+        await asyncio.sleep(0.5)      # let the flood build up
+
+        async def write_once():
+            r = await client.post("/counts/submit", json={"item_id": item_id, "count": 1}, headers=mgr)
+            if r.status_code == 201:
+                r = await client.post(f"/counts/{r.json()['id']}/reject", headers=mgr)
+            return r.status_code
+
+        latencies, statuses = [], {}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                code = await asyncio.wait_for(write_once(), timeout=WRITE_TIMEOUT_SEC)
+            except asyncio.TimeoutError:
+                code = "timeout"
+            latencies.append(time.perf_counter() - t0)
+            statuses[code] = statuses.get(code, 0) + 1
+
+        stop.set()
+        # Without limits the flood can wedge the thread and DB pools; don't wait it out
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    limiter = application.state.concurrency
+    return {
+        "write_path": {"n": len(latencies), "p50_ms": _pct(latencies, 0.5), "p95_ms": _pct(latencies, 0.95),
+                       "max_ms": _pct(latencies, 1.0), "statuses": statuses},
+        "flood": {**flood_done, "per_sec": round(flood_done["ok"] / seconds, 1)},
+        "limiter": limiter.snapshot() if limiter else None,
+    }
+
+
+def child(flood: int, seconds: float) -> None:
+    print(json.dumps(asyncio.run(_child_async(flood, seconds))), flush=True)
+    os._exit(0)   # abandoned handler threads may still be blocked on the pool
+
+
+def run(enabled: bool, flood: int, seconds: float) -> dict:
+    env = {**os.environ, "CONCURRENCY_ENABLED": "1" if enabled else "0", "RATE_LIMIT_ENABLED": "0",
+           "WARMUP": "0", "JOBS_ENABLED": "0"}
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.bench_shedding", "--child", "--flood", str(flood), "--seconds", str(seconds)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Overload / load-shedding benchmark")
+    parser.add_argument("--flood", type=int, default=64, help="concurrent flooding clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.flood, args.seconds)
+        return
+
+    results = {"limited": run(True, args.flood, args.seconds),
+               "unlimited": run(False, args.flood, args.seconds),
+               "flood": args.flood, "seconds": args.seconds}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
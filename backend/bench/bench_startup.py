@@ -0,0 +1,81 @@
+# bench/bench_startup.py
+"""
+Cold-start benchmark: import time, app construction, warm-up and the latency
+of the first requests, each measured in a fresh interpreter.
+
+    python -m bench.bench_startup --repeat 5            # needs seed users
+
+Runs every cold start twice, with WARMUP=1 and WARMUP=0, so the report shows
+where the one-off costs land (lifespan vs first requests).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_REQUESTS = [
+    ("POST", "/auth/login", {"email": "admin@pantrypal.dev", "password": "admin123"}),
+    ("GET", "/items?limit=20", None),
+    ("GET", "/dash/summary", None),
+    ("GET", "/openapi.json", None),
+]
+
+
+def child() -> None:
+    """One cold start; prints a JSON line of timings (seconds)."""
+    t0 = time.perf_counter()
+    import app.main
+    out = {"import": time.perf_counter() - t0}
+
+    t0 = time.perf_counter()
+    application = app.main.create_app()
+    out["create_app"] = time.perf_counter() - t0
+
+    from fastapi.testclient import TestClient
+    t0 = time.perf_counter()
+    with TestClient(application) as client:
+        out["lifespan_startup"] = time.perf_counter() - t0
+        headers = {}
+        for method, path, body in FIRST_REQUESTS:
+            t0 = time.perf_counter()
+            r = client.request(method, path, json=body, headers=headers)
+            out[f"first {method} {path}"] = time.perf_counter() - t0
+            if path == "/auth/login" and r.status_code == 200:
+                headers = {"Authorization": "Bearer " + r.json()["access_token"]}
+        out["ready_to_first_response_total"] = sum(out.values())
+    print(json.dumps(out))
+
+
+def run(warmup: bool) -> dict:
+    env = {**os.environ, "WARMUP": "1" if warmup else "0"}
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.bench_startup", "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    results = {}
+    for warmup in (True, False):
+        runs = [run(warmup) for _ in range(args.repeat)]
+        results["warmup" if warmup else "no_warmup"] = {
+            k: round(statistics.median(r[k] for r in runs), 4) for k in runs[0]
+        }
+    results["repeat"] = args.repeat
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
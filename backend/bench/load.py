@@ -0,0 +1,320 @@
+# bench/load.py
+"""
+Load/benchmark harness for the API hot paths.
+
+Drives login, item list/search, count submit (single + batch), the pending
+queue, approve/reject and the dashboard endpoints at a configurable
+concurrency, and reports throughput, p50/p95/p99 latency and SQL statements
+per request as JSON you can diff between commits.
+
+In-process (default): the app runs inside this process over httpx's ASGI
+transport against DATABASE_URL, so statements per request can be counted.
+Its lifespan runs around the benchmark as it would under uvicorn (warm-up,
+health probe, invalidation bus, job runner, outbox dispatcher), since httpx's
+transport doesn't send lifespan events itself.
+
+    python -m app.seed_users                      # bench logs in as the seed users
+    python -m bench.load --requests 300 --concurrency 16 --out before.json
+    python -m bench.load --requests 300 --concurrency 16 --compare before.json
+
+Remote: --base-url http://localhost:8000 (statements per request = null).
+Start that server with RATE_LIMIT_ENABLED=0; in-process runs disable the
+limits themselves, since the harness is one IP and a handful of users.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+BENCH_PREFIX = "bench-load"
+USERS = {
+    "admin": ("admin@pantrypal.dev", "admin123"),
+    "manager": ("manager@pantrypal.dev", "manager123"),
+    "counter": ("counter@pantrypal.dev", "counter123"),
+}
+
+# Per-request SQL statement counter (in-process mode only). The ASGI app runs
+# in the caller's task and sync handlers inherit the context in the threadpool,
+# so the listener can attribute statements to the request that issued them.
+_stmt_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "bench_stmt_counter", default=None
+)
+
+
+def _install_statement_counter() -> None:
+    from sqlalchemy import event
+    from app.core.db import engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        box = _stmt_counter.get()
+        if box is not None:
+            box[0] += 1
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, in_process: bool, concurrency: int, requests: int):
+        self.client = client
+        self.in_process = in_process
+        self.concurrency = concurrency
+        self.requests = requests
+        self.headers: Dict[str, dict] = {}
+        self.item_ids: List[int] = []
+        self.pending_ids: List[int] = []
+
+    async def call(self, method: str, url: str, **kw) -> "tuple[httpx.Response, float, Optional[int]]":
+        box = [0] if self.in_process else None
+        token = _stmt_counter.set(box)
+        try:
+            t0 = time.perf_counter()
+            resp = await self.client.request(method, url, **kw)
+            elapsed = time.perf_counter() - t0
+        finally:
+            _stmt_counter.reset(token)
+        return resp, elapsed, (box[0] if box is not None else None)
+
+    async def run(self, name: str, make_request: Callable[[int], Awaitable], n: Optional[int] = None) -> dict:
+        """Issue n requests (request i built by make_request(i)) across `concurrency` workers."""
+        n = self.requests if n is None else n
+        latencies: List[float] = []
+        statements: List[int] = []
+        errors: Dict[str, int] = {}
+        next_i = 0
+
+        async def worker():
+            nonlocal next_i
+            while next_i < n:
+                i = next_i
+                next_i += 1
+                resp, elapsed, stmts = await make_request(i)
+                latencies.append(elapsed)
+                if stmts is not None:
+                    statements.append(stmts)
+                if resp.status_code >= 400:
+                    errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, n))))
+        wall = time.perf_counter() - t0
+
+        latencies.sort()
+        ms = lambda v: round(v * 1000, 2) if v is not None else None
+        result = {
+            "requests": n,
+            "errors": errors,
+            "throughput_rps": round(n / wall, 1) if wall else None,
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "statements_per_request": round(sum(statements) / len(statements), 2) if statements else None,
+        }
+        print(f"  {name:<18} {result['throughput_rps']:>8} rps  p50 {result['p50_ms']:>7} ms  "
+              f"p99 {result['p99_ms']:>7} ms  stmts {result['statements_per_request']}", file=sys.stderr)
+        return result
+
+    # ----- setup -----------------------------------------------------------
+
+    async def login_all(self) -> None:
+        for role, (email, password) in USERS.items():
+            resp = await self.client.post("/auth/login", json={"email": email, "password": password})
+            if resp.status_code != 200:
+                raise SystemExit(f"Login failed for {email} ({resp.status_code}). Run: python -m app.seed_users")
+            self.headers[role] = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    async def ensure_items(self, count: int) -> None:
+        """Upsert a pool of bench items in one CSV import and clear leftover pending counts."""
+        lines = ["name,base_unit,par_level"]
+        lines += [f"{BENCH_PREFIX} {i:05d},pcs,{50 + i % 50}" for i in range(count)]
+        resp = await self.client.post(
+            "/items/import",
+            content="\n".join(lines) + "\n",
+            headers={**self.headers["admin"], "Content-Type": "text/csv"},
+        )
+        resp.raise_for_status()
+
+        ids: List[int] = []
+        offset = 0
+        while True:
+            resp = await self.client.get(
+                "/items", params={"q": BENCH_PREFIX, "limit": 100, "offset": offset},
+                headers=self.headers["counter"],
+            )
+            page = resp.json()
+            ids += [it["id"] for it in page["items"]]
+            offset += 100
+            if offset >= page["total"]:
+                break
+        self.item_ids = ids[:count]
+
+        # A previous aborted run may have left pending counts on the pool
+        pool = set(self.item_ids)
+        while True:
+            resp = await self.client.get("/counts/pending", params={"limit": 100},
+                                         headers=self.headers["manager"])
+            stale = [c["id"] for c in resp.json()["items"] if c["item_id"] in pool]
+            if not stale:
+                break
+            for cid in stale:
+                await self.client.post(f"/counts/{cid}/reject", headers=self.headers["manager"])
+
+    # ----- scenarios -------------------------------------------------------
+
+    async def scenarios(self) -> Dict[str, dict]:
+        n, mgr, ctr = self.requests, self.headers["manager"], self.headers["counter"]
+        email, password = USERS["counter"]
+        batch = 10
+        out: Dict[str, dict] = {}
+
+        out["auth_login"] = await self.run(
+            "auth_login", lambda i: self.call("POST", "/auth/login", json={"email": email, "password": password}),
+            n=max(1, n // 10),  # bcrypt-bound; keep it short
+        )
+        out["items_list"] = await self.run(
+            "items_list", lambda i: self.call("GET", "/items", params={"limit": 50, "offset": (i * 50) % 500}, headers=ctr))
+        out["items_search"] = await self.run(
+            "items_search", lambda i: self.call("GET", "/items", params={"q": f"{i % 100:02d}"}, headers=ctr))
+
+        # Single submits: one fresh pool item per request
+        submitted: List[int] = []
+
+        async def submit_one(i):
+            resp, el, st = await self.call("POST", "/counts/submit", headers=ctr,
+                                           json={"item_id": self.item_ids[i], "count": i % 40})
+            if resp.status_code == 201:
+                submitted.append(resp.json()["id"])
+            return resp, el, st
+
+        out["counts_submit"] = await self.run("counts_submit", submit_one)
+        out["counts_pending"] = await self.run(
+            "counts_pending", lambda i: self.call("GET", "/counts/pending", params={"limit": 50}, headers=mgr))
+
+        half = len(submitted) // 2
+        approve_ids, reject_ids = submitted[:half], submitted[half:]
+        out["counts_approve"] = await self.run(
+            "counts_approve", lambda i: self.call("POST", f"/counts/{approve_ids[i]}/approve", headers=mgr),
+            n=len(approve_ids))
+        out["counts_reject"] = await self.run(
+            "counts_reject", lambda i: self.call("POST", f"/counts/{reject_ids[i]}/reject", headers=mgr),
+            n=len(reject_ids))
+
+        # Batch submits: `batch` pool items per request, then clear them again
+        batch_ids: List[int] = []
+
+        async def submit_batch(i):
+            items = self.item_ids[i * batch:(i + 1) * batch]
+            resp, el, st = await self.call("POST", "/counts/submit", headers=ctr, json={
+                "counts": [{"item_id": it, "count": 7} for it in items]})
+            if resp.status_code == 201:
+                batch_ids.extend(c["id"] for c in resp.json())
+            return resp, el, st
+
+        out["counts_submit_batch"] = await self.run(
+            "counts_submit_batch", submit_batch, n=len(self.item_ids) // batch)
+        for cid in batch_ids:
+            await self.client.post(f"/counts/{cid}/reject", headers=mgr)
+
+        for name, path in (
+            ("dash_summary", "/dash/summary"),
+            ("dash_low_stock", "/dash/low-stock"),
+            ("dash_pending", "/dash/pending-approvals"),
+            ("dash_forecast", "/dash/forecast"),
+        ):
+            out[name] = await self.run(name, lambda i, p=path: self.call("GET", p, headers=mgr))
+        return out
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        base = json.load(f)
+    print(f"\n{'scenario':<20}{'rps':>18}{'p95 ms':>20}{'stmts/req':>16}", file=sys.stderr)
+    for name, cur in current["results"].items():
+        old = base.get("results", {}).get(name)
+        if not old:
+            continue
+        fmt = lambda a, b: f"{b} -> {a}" if a is not None and b is not None else "n/a"
+        print(f"{name:<20}{fmt(cur['throughput_rps'], old['throughput_rps']):>18}"
+              f"{fmt(cur['p95_ms'], old['p95_ms']):>20}"
+              f"{fmt(cur['statements_per_request'], old['statements_per_request']):>16}", file=sys.stderr)
+
+
+async def main_async(args) -> dict:
+    in_process = args.base_url is None
+    async with AsyncExitStack() as stack:
+        if in_process:
+            os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+            from app.main import app
+            _install_statement_counter()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+        else:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=60,
+                                       limits=httpx.Limits(max_connections=args.concurrency))
+        await stack.enter_async_context(client)
+        bench = Bench(client, in_process, args.concurrency, args.requests)
+        await bench.login_all()
+        await bench.ensure_items(max(args.requests, 10))
+        print(f"pantrypal bench: {args.requests} req/scenario, concurrency {args.concurrency}, "
+              f"{'in-process' if in_process else args.base_url}", file=sys.stderr)
+        results = await bench.scenarios()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": "in-process" if in_process else "remote",
+            "base_url": args.base_url,
+            "database_url_set": bool(os.getenv("DATABASE_URL")),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PantryPal API load benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-url", default=None, help="benchmark a running server instead of in-process")
+    parser.add_argument("--out", default=None, help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="baseline JSON to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# bench/migration_harness.py
+"""
+Migration harness: run migrations against a large synthetic counts table
+while writers keep inserting and approving counts, and report how long the
+writes stalled.
+
+    python -m bench.migration_harness --counts 2000000              # scratch DB, dropped after
+    python -m bench.migration_harness --from 9c3e5a7d1f48 --contrast
+
+Steps, each with the writers running:
+
+1. migrations   `alembic upgrade <--to>` from --from (the revisions under test)
+2. helpers      the app.core.migration_ops toolkit end to end on counts:
+                expand (ddl add column), backfill,
+                add_check_not_valid + validate_constraint,
+                create/drop_index_concurrently, contract (ddl drop column)
+3. set_not_null a defaulted column made NOT NULL via set_not_null()
+4. contrast     (--contrast) a plain CREATE INDEX, to show what a blocking
+                migration looks like in the same numbers
+
+Fails (exit 1) if a write in steps 1-3 took longer than --max-stall seconds
+or failed. Builds a fresh database (--database, on the same server as
+DATABASE_URL): migrates it to --from, fills it with app.gen_data, then runs
+the steps. Needs CREATE DATABASE rights. tests/test_migrations.py runs it
+on a small table when TEST_DATABASE_URL is Postgres.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+BACKEND = Path(__file__).resolve().parent.parent
+DEFAULT_FROM = "9c3e5a7d1f48"        # before the counts indexes of the sheet/history endpoints
+DEFAULT_DATABASE = "pantrypal_migration_harness"
+
+
+def _pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1)
+
+
+class Writers:
+    """Threads submitting and approving counts, logging (start, seconds, ok) per statement."""
+
+    def __init__(self, url: str, threads: int) -> None:
+        self.engine = create_engine(url, pool_size=threads, max_overflow=0)
+        self.threads = threads
+        self.samples = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._workers = []
+        with self.engine.connect() as conn:
+            self.items = conn.execute(text("SELECT id, location_id FROM items")).all()
+            self.user = conn.execute(text("SELECT id FROM users ORDER BY id LIMIT 1")).scalar()
+            self.max_count = conn.execute(text("SELECT max(id) FROM counts")).scalar()
+
+    def _run(self, seed: int) -> None:
+        rng = random.Random(seed)
+        with self.engine.connect() as conn:
+            while not self._stop.is_set():
+                item = rng.choice(self.items)
+                t0 = time.perf_counter()
+                ok = True
+                try:
+                    with conn.begin():
+                        if rng.random() < 0.5:
+                            conn.execute(text("""
+                                INSERT INTO counts (location_id, item_id, count, status, submitted_by, submitted_at)
+                                VALUES (:loc, :item, :n, 'pending', :user, now())
+                            """), {"loc": item.location_id, "item": item.id, "n": rng.randint(0, 500),
+                                   "user": self.user})
+                        else:
+                            conn.execute(text("""
+                                UPDATE counts SET status = 'approved', approved_by = :user,
+                                       approved_at = now(), approved_count = count
+                                WHERE id = :id
+                            """), {"id": rng.randint(1, self.max_count), "user": self.user})
+                except Exception:
+                    ok = False
+                    time.sleep(0.1)
+                with self._lock:
+                    self.samples.append((t0, time.perf_counter() - t0, ok))
+                time.sleep(0.005)
+
+    def start(self) -> None:
+        self._workers = [threading.Thread(target=self._run, args=(n,), daemon=True) for n in range(self.threads)]
+        for w in self._workers:
+            w.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for w in self._workers:
+            w.join(timeout=60)
+        self.engine.dispose()
+
+    def window(self, start: float, end: float) -> dict:
+        with self._lock:
+            rows = [(t0, dt, ok) for t0, dt, ok in self.samples if start <= t0 <= end]
+        latencies = [dt for _, dt, _ in rows]
+        worst = max(rows, key=lambda r: r[1], default=None)
+        # A write that started before the window can still be stuck in it
+        with self._lock:
+            stuck = [t0 + dt - start for t0, dt, _ in self.samples if t0 < start < t0 + dt]
+        return {"writes": len(rows), "errors": sum(1 for _, _, ok in rows if not ok),
+                "p50_ms": _pct(latencies, 0.5), "p99_ms": _pct(latencies, 0.99),
+                "max_ms": _pct(latencies + stuck, 1.0),
+                "max_at_sec": round(worst[0] - start, 1) if worst else None}
+
+
+def alembic(url: str, *args: str) -> None:
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=BACKEND, check=True,
+                   env={**os.environ, "DATABASE_URL": url}, stdout=subprocess.DEVNULL)
+
+
+def run_as_migration(url: str, upgrade) -> None:
+    """Run upgrade() with `op` bound the way env.py binds it (one migration transaction)."""
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        ctx = MigrationContext.configure(conn)
+        with Operations.context(ctx), ctx.begin_transaction():
+            upgrade()
+    engine.dispose()
+
+
+def exercise_helpers() -> None:
+    """Expand/backfill/constrain/index/contract a throwaway counts column via migration_ops."""
+    from app.core import migration_ops as m
+
+    m.ddl("ALTER TABLE counts ADD COLUMN harness_qty integer")
+    m.backfill("counts", "harness_qty = count", where="harness_qty IS NULL")
+    # Rows written since the first pass; the app would be dual-writing by now
+    m.backfill("counts", "harness_qty = count", where="harness_qty IS NULL", pause=0)
+    m.add_check_not_valid("counts", "ck_counts_harness_qty", "harness_qty >= 0")
+    m.validate_constraint("counts", "ck_counts_harness_qty")
+    m.create_index_concurrently("ix_counts_harness_qty", "counts", ["harness_qty"])
+    m.drop_index_concurrently("ix_counts_harness_qty", "counts")
+    m.ddl("ALTER TABLE counts DROP CONSTRAINT ck_counts_harness_qty")
+    m.ddl("ALTER TABLE counts DROP COLUMN harness_qty")
+
+
+def exercise_set_not_null() -> None:
+    """set_not_null on a column the writers never leave NULL (constant default: metadata-only add)."""
+    from app.core import migration_ops as m
+
+    m.ddl("ALTER TABLE counts ADD COLUMN harness_flag boolean DEFAULT false")
+    m.set_not_null("counts", "harness_flag")
+    m.ddl("ALTER TABLE counts DROP COLUMN harness_flag")
+
+
+def blocking_contrast(url: str) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_counts_harness_blocking ON counts (item_id, count)"))
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_counts_harness_blocking"))
+    engine.dispose()
+
+
+def run(database: str = DEFAULT_DATABASE, from_rev: str = DEFAULT_FROM, to: str = "head",
+        counts: int = 1_000_000, writers: int = 4, max_stall: float = 1.0, contrast: bool = False,
+        keep: bool = False, url: Optional[str] = None) -> dict:
+    """
+    Build the scratch database next to `url` (default DATABASE_URL), run the
+    steps and return the report; report["ok"] is False if a gated step's
+    writes failed or stalled longer than max_stall seconds.
+    """
+    from app.core.config import settings
+
+    base = make_url(url or settings.database_url)
+    url = base.set(database=database).render_as_string(hide_password=False)
+    admin = create_engine(base.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        conn.execute(text(f'CREATE DATABASE "{database}"'))
+
+    report = {"database": database, "from": from_rev, "to": to, "counts": counts}
+    load = None
+    try:
+        t0 = time.perf_counter()
+        alembic(url, "upgrade", from_rev)
+        subprocess.run([sys.executable, "-m", "app.gen_data", "--locations", "4", "--items", "250",
+                        "--counts", str(counts), "--reset", "--quiet"],
+                       cwd=BACKEND, check=True, env={**os.environ, "DATABASE_URL": url}, stdout=subprocess.DEVNULL)
+        report["seed_sec"] = round(time.perf_counter() - t0, 1)
+
+        load = Writers(url, writers)
+        load.start()
+        time.sleep(2)
+        report["idle"] = load.window(time.perf_counter() - 2, time.perf_counter())
+
+        steps = [("migrations", lambda: alembic(url, "upgrade", to)),
+                 ("helpers", lambda: run_as_migration(url, exercise_helpers)),
+                 ("set_not_null", lambda: run_as_migration(url, exercise_set_not_null))]
+        if contrast:
+            steps.append(("contrast_blocking_index", lambda: blocking_contrast(url)))
+        for name, step in steps:
+            start = time.perf_counter()
+            step()
+            end = time.perf_counter()
+            time.sleep(0.5)                      # let stalled writes finish and be logged
+            report[name] = {"seconds": round(end - start, 2), **load.window(start, end)}
+    finally:
+        if load is not None:
+            load.stop()
+        if not keep:
+            with admin.connect() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        admin.dispose()
+
+    gated = [report[n] for n in ("migrations", "helpers", "set_not_null")]
+    report["ok"] = not any(s["errors"] or (s["max_ms"] or 0) > max_stall * 1000 for s in gated)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run migrations under concurrent write load")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="scratch database (recreated)")
+    parser.add_argument("--from", dest="from_rev", default=DEFAULT_FROM, help="revision to seed at")
+    parser.add_argument("--to", default="head", help="revision to migrate to under load")
+    parser.add_argument("--counts", type=int, default=1_000_000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--max-stall", type=float, default=1.0, help="max seconds any write may take")
+    parser.add_argument("--contrast", action="store_true", help="also time a plain (blocking) CREATE INDEX")
+    parser.add_argument("--keep", action="store_true", help="don't drop the scratch database afterwards")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(relativeCreated)8.0fms %(message)s", stream=sys.stderr)
+
+    report = run(args.database, args.from_rev, args.to, args.counts, args.writers, args.max_stall,
+                 args.contrast, args.keep)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
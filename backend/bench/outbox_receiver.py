@@ -0,0 +1,92 @@
+# bench/outbox_receiver.py
+"""
+Local stand-in for a webhook endpoint, for OUTBOX_SINK=http.
+
+    python -m bench.outbox_receiver --port 8099 --delay-ms 200 --fail-rate 0.2
+
+Accepts POST {"events": [...]} on any path and prints one line per event.
+--delay-ms makes it slow and --fail-rate makes it answer 503 at random, to
+watch the dispatcher's batching, retries and backoff (and that approvals
+don't slow down with it).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class Receiver:
+    def __init__(self, delay_ms: float = 0, fail_rate: float = 0, quiet: bool = False) -> None:
+        self.delay_ms = delay_ms
+        self.fail_rate = fail_rate
+        self.quiet = quiet
+        self.events: List[dict] = []        # accepted, with "received_at" (epoch seconds)
+        self.batches = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if receiver.delay_ms:
+                    time.sleep(receiver.delay_ms / 1000)
+                if random.random() < receiver.fail_rate:
+                    with receiver._lock:
+                        receiver.rejected += 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                events = json.loads(body)["events"]
+                now = time.time()
+                with receiver._lock:
+                    receiver.batches += 1
+                    receiver.events.extend({**e, "received_at": now} for e in events)
+                if not receiver.quiet:
+                    for e in events:
+                        print(f"{e['topic']:<16} #{e['id']} attempt {e['attempt']} {json.dumps(e['payload'])}")
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start in a daemon thread; returns the URL to put in OUTBOX_HTTP_URL."""
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        threading.Thread(target=self._server.serve_forever, name="outbox-receiver", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/events"
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in HTTP endpoint for the outbox's http sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    receiver = Receiver(args.delay_ms, args.fail_rate)
+    server = ThreadingHTTPServer((args.host, args.port), receiver._handler())
+    print(f"Listening on http://{args.host}:{args.port}/events; Ctrl-C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# bench/plan_check.py
+"""
+Query-plan regression check for the items, counts and dash endpoints.
+
+    python -m bench.plan_check                 # check against bench/plan_baselines.json
+    python -m bench.plan_check --update        # accept the current plans as the baseline
+
+tests/test_query_plans.py runs the same check under pytest when
+TEST_DATABASE_URL points at such a database.
+
+Drives every scenario below through the app (TestClient), captures each SQL
+statement it issues, and runs EXPLAIN (FORMAT JSON) on it with the same
+parameters. Fails (exit 1) when
+
+- a watched table (--tables, default counts,items) is read with a Seq Scan
+  and holds at least --min-rows rows (pg_class.reltuples), or
+- a statement no longer uses an index on a watched table that its baseline
+  plan used (a query or migration change lost an index). Small side tables
+  flip between index and Seq Scan with their stats, so they aren't compared.
+
+Run it against a large seeded database, where the planner's choices look
+like production's; on a tiny table a Seq Scan is the right plan, which is
+what --min-rows is for. The committed baseline was taken on
+
+    python -m app.gen_data --locations 20 --items 1000 --counts 1000000 --reset
+    python -m app.seed_users
+
+Everything runs inside one transaction that is rolled back, so the write
+scenarios leave no trace.
+Needs the seed users (admin@/manager@/counter@pantrypal.dev).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("CONCURRENCY_ENABLED", "0")
+os.environ.setdefault("INVALIDATION_BACKEND", "memory")
+
+DEFAULT_BASELINE = Path(__file__).with_name("plan_baselines.json")
+USERS = {"admin": ("admin@pantrypal.dev", "admin123"),
+         "manager": ("manager@pantrypal.dev", "manager123"),
+         "counter": ("counter@pantrypal.dev", "counter123")}
+
+
+def scenarios(ids: dict) -> List[tuple]:
+    """(label, role, method, path, json body). {item}/{count}/... come from `ids`."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return [
+        ("items.list", "counter", "GET", "/items?limit=50", None),
+        ("items.search", "counter", "GET", "/items?q=oil&active=true", None),
+        ("items.get", "counter", "GET", f"/items/{ids['item']}", None),
+        ("items.as_of", "manager", "GET", f"/items/{ids['item']}/as-of?ts={now}", None),
+        ("items.history", "counter", "GET", f"/items/{ids['item']}/history?limit=20", None),
+        ("items.create", "manager", "POST", "/items", {"name": "Plan Check Item", "base_unit": "g", "par_level": 5}),
+        ("items.update", "manager", "PUT", f"/items/{ids['item']}", {"par_level": ids["par_level"]}),
+        ("items.soft_delete", "manager", "DELETE", f"/items/{ids['item']}", None),
+        ("items.restore", "manager", "POST", f"/items/{ids['item']}/restore", None),
+        ("counts.submit", "counter", "POST", "/counts/submit", {"item_id": ids["item"], "count": 7}),
+        ("counts.sheet", "counter", "GET", "/counts/sheet", None),
+        ("counts.pending", "manager", "GET", "/counts/pending", None),
+        ("counts.pending_item", "manager", "GET", f"/counts/pending?item_id={ids['item']}", None),
+        ("counts.list", "manager", "GET", "/counts?status_filter=approved", None),
+        ("counts.list_item", "manager", "GET", f"/counts?item_id={ids['item']}", None),
+        ("counts.list_mine", "counter", "GET", "/counts?mine=true", None),
+        ("counts.approve", "manager", "POST", "/counts/{submitted}/approve", None),
+        ("counts.submit_again", "counter", "POST", "/counts/submit", {"item_id": ids["item"], "count": 8}),
+        ("counts.reject", "manager", "POST", "/counts/{submitted}/reject", None),
+        ("dash.summary", "manager", "GET", "/dash/summary", None),
+        ("dash.pending_approvals", "manager", "GET", "/dash/pending-approvals", None),
+        ("dash.low_stock", "counter", "GET", "/dash/low-stock?sort=deficit", None),
+        ("dash.low_stock_name", "counter", "GET", "/dash/low-stock?sort=name", None),
+        ("dash.forecast", "manager", "GET", "/dash/forecast", None),
+        ("dash.my_submissions", "counter", "GET", "/dash/my-submissions", None),
+    ]
+
+
+# ----- plan inspection -------------------------------------------------------
+
+_PARAM = re.compile(r"%\(\w+\)s")
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize(sql: str) -> str:
+    """Collapse bind names and expanded IN lists so the key is stable across runs."""
+    sql = _PARAM_LIST.sub("?...", _PARAM.sub("?", sql))
+    return " ".join(sql.split())
+
+
+def statement_key(label: str, sql: str) -> str:
+    return f"{label} #{hashlib.sha1(normalize(sql).encode()).hexdigest()[:10]}"
+
+
+def scans(plan: dict) -> List[dict]:
+    """Flatten the plan tree to the nodes that touch a relation or index."""
+    out = []
+    if "Relation Name" in plan or "Index Name" in plan:
+        out.append({"node": plan["Node Type"], "relation": plan.get("Relation Name"),
+                    "index": plan.get("Index Name")})
+    for child in plan.get("Plans", ()):
+        out.extend(scans(child))
+    return out
+
+
+def describe(s: dict) -> str:
+    return " ".join(p for p in (s["node"], s["index"] and f"using {s['index']}",
+                                s["relation"] and f"on {s['relation']}") if p)
+
+
+# ----- run -------------------------------------------------------------------
+
+def capture(min_rows: int, tables: List[str]) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, text
+
+    from app.core.db import engine
+    from app.core.invalidation import bus
+    from app.core.orm import SessionLocal
+    from app.main import create_app
+
+    bus.evict_all()     # cold caches: every scenario reaches the database
+    conn = engine.connect()
+    outer = conn.begin()
+    SessionLocal.configure(bind=conn, join_transaction_mode="create_savepoint")
+
+    captured: List[tuple] = []
+    recording = [False]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(c, cursor, statement, parameters, context, executemany):
+        if recording[0]:
+            captured.append((statement, parameters[0] if executemany and parameters else parameters))
+
+    try:
+        sizes = dict(conn.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(:t) AND relkind = 'r'"
+        ), {"t": tables}).all())
+        client = TestClient(create_app())
+        headers = {}
+        for role, (email, password) in USERS.items():
+            r = client.post("/auth/login", json={"email": email, "password": password})
+            r.raise_for_status()
+            headers[role] = {"Authorization": "Bearer " + r.json()["access_token"]}
+
+        # An active item in the manager's location with no pending count
+        loc = client.get("/auth/whoami", headers=headers["manager"]).json()["location_id"]
+        row = conn.execute(text("""
+            SELECT i.id, i.par_level FROM items i
+            WHERE i.location_id = :loc AND i.is_active
+              AND NOT EXISTS (SELECT 1 FROM counts c WHERE c.item_id = i.id AND c.status = 'pending')
+            ORDER BY i.id LIMIT 1
+        """), {"loc": loc}).one()
+        ids = {"item": row.id, "par_level": row.par_level}
+
+        results: Dict[str, dict] = {}
+        for label, role, method, path, body in scenarios(ids):
+            path = path.format(**ids)
+            captured.clear()
+            recording[0] = True
+            r = client.request(method, path, json=body, headers=headers[role])
+            recording[0] = False
+            if r.status_code >= 400:
+                print(f"! {label}: {method} {path} -> {r.status_code} {r.text[:200]}", file=sys.stderr)
+            if label.startswith("counts.submit") and r.status_code == 201:
+                ids["submitted"] = r.json()["id"]
+
+            for statement, params in list(captured):
+                if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+                    continue
+                key = statement_key(label, statement)
+                entry = results.setdefault(key, {"sql": normalize(statement)[:300], "scans": [], "problems": []})
+                try:
+                    with conn.begin_nested():
+                        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params).scalar()
+                except Exception as e:
+                    entry["problems"].append(f"EXPLAIN failed: {type(e).__name__}: {str(e).splitlines()[0]}")
+                    continue
+                plan = plan if isinstance(plan, list) else json.loads(plan)
+                entry["scans"] = sorted({describe(s) for s in scans(plan[0]["Plan"])})
+                for s in scans(plan[0]["Plan"]):
+                    if s["node"] == "Seq Scan" and s["relation"] in sizes and sizes[s["relation"]] >= min_rows:
+                        entry["problems"].append(
+                            f"Seq Scan on {s['relation']} ({sizes[s['relation']]} rows >= {min_rows})")
+        return results
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+        SessionLocal.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+        bus.evict_all()
+        outer.rollback()
+        conn.close()
+
+
+def indexes(scan_lines: List[str], tables: Optional[List[str]] = None) -> set:
+    """Index names in describe() lines, optionally only those on `tables`."""
+    found = set()
+    for line in scan_lines:
+        if "using " not in line:
+            continue
+        index, _, relation = line.split("using ", 1)[1].partition(" on ")
+        if tables is None or relation in tables:
+            found.add(index)
+    return found
+
+
+def load_baseline(path: Path = DEFAULT_BASELINE) -> dict:
+    """{"min_rows": ..., "queries": {key: {"sql", "scans"}}}"""
+    return json.loads(path.read_text())
+
+
+def compare(results: Dict[str, dict], baseline: Optional[dict],
+            tables: Optional[List[str]] = None) -> Tuple[List[str], List[str], List[str]]:
+    """
+    (failures, statements without a baseline, baseline statements not seen).
+    Failures are the captured problems plus, with a baseline, lost indexes
+    (on `tables`, default all).
+    """
+    failures, new = [], []
+    for key, entry in sorted(results.items()):
+        for p in entry["problems"]:
+            failures.append(f"{key}: {p}")
+        if baseline is None:
+            continue
+        if key not in baseline:
+            new.append(key)
+            continue
+        lost = indexes(baseline[key]["scans"], tables) - indexes(entry["scans"], tables)
+        if lost:
+            failures.append(f"{key}: no longer uses {', '.join(sorted(lost))} (now: {'; '.join(entry['scans'])})")
+    stale = sorted(set(baseline or ()) - set(results))
+    return failures, new, stale
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN-based query plan regression check")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update", action="store_true", help="write the current plans as the baseline")
+    parser.add_argument("--min-rows", type=int, default=10_000,
+                        help="only flag Seq Scans on tables at least this big (default 10000)")
+    parser.add_argument("--tables", default="counts,items", help="comma-separated tables to watch")
+    args = parser.parse_args()
+
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    results = capture(args.min_rows, tables)
+    baseline: Optional[dict] = None
+    if args.baseline.exists() and not args.update:
+        baseline = load_baseline(args.baseline)["queries"]
+    failures, new, stale = compare(results, baseline, tables)
+
+    if args.update:
+        args.baseline.write_text(json.dumps(
+            {"min_rows": args.min_rows, "queries": {k: {"sql": v["sql"], "scans": v["scans"]}
+                                                    for k, v in sorted(results.items())}},
+            indent=2) + "\n")
+
+    for line in failures:
+        print(f"FAIL {line}", file=sys.stderr)
+    print(json.dumps({
+        "statements": len(results),
+        "failures": len(failures),
+        "new_without_baseline": new,
+        "baseline_not_seen": stale,
+        "baseline": str(args.baseline) + (" (updated)" if args.update else ""),
+    }, indent=2))
+    return 1 if failures and not args.update else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
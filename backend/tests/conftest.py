@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""
+API tests against a throwaway database (app.testing): in-memory SQLite by
+default, or Postgres with TEST_DATABASE_URL=postgresql+psycopg://...
+"""
+pytest_plugins = ["app.testing"]
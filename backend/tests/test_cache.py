@@ -0,0 +1,54 @@
+# tests/test_cache.py
+import threading
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_hit_miss_and_expiry():
+    cache = TTLCache(60)
+    assert cache.get_or_compute("a", lambda: 1) == 1
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses, cache.computes) == (1, 1, 1)
+
+    expired = TTLCache(0)
+    expired.get_or_compute("a", lambda: 1)
+    assert expired.get("a") is None
+    assert expired.get_or_compute("a", lambda: 2) == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = TTLCache(60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_value_computed_across_an_invalidation_is_not_cached():
+    cache = TTLCache(60)
+    assert cache.get_or_compute(("loc", 1), lambda: cache.invalidate(("loc", 1)) or "stale") == "stale"
+    assert cache.get(("loc", 1)) is None
+    assert cache.get_or_compute(("loc", 1), lambda: cache.invalidate() or "stale") == "stale"
+    assert cache.get(("loc", 1)) is None
+    cache.get_or_compute(("loc", 2), lambda: "other")
+
+    value = cache.get_or_compute(("loc", 1), lambda: cache.invalidate_where(lambda k: k[1] == 1) or "stale")
+    assert value == "stale"
+    assert cache.get(("loc", 1)) is None
+    assert cache.get(("loc", 2)) == "other"
+    assert cache.get_or_compute(("loc", 1), lambda: "fresh") == "fresh"
+    assert cache.get(("loc", 1)) == "fresh"
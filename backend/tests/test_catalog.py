@@ -0,0 +1,22 @@
+# tests/test_catalog.py
+from app.services.catalog import CatalogCache
+
+
+def test_load_racing_a_write_is_not_installed(db, make_item, monkeypatch):
+    item = make_item(current_qty=5)
+    cache = CatalogCache()
+    execute = db.execute
+
+    def execute_then_write(*args, **kwargs):
+        rows = execute(*args, **kwargs)
+        cache.set_qty(item.location_id, item.id, 2)     # committed after the SELECT's snapshot
+        return rows
+
+    monkeypatch.setattr(db, "execute", execute_then_write)
+    assert cache.get(db, item.location_id, item.id).current_qty == 5   # served once...
+    assert cache.stats()["loads"] == 0                                   # ...not installed
+    monkeypatch.undo()
+    item.current_qty = 2
+    db.flush()
+    assert cache.get(db, item.location_id, item.id).current_qty == 2
+    assert cache.stats()["loads"] == 1
@@ -0,0 +1,32 @@
+# tests/test_concurrency.py
+import asyncio
+
+import pytest
+
+from app.core.concurrency import ClassBudget, Shed, _Gate
+
+
+def test_cancelled_waiter_returns_a_handed_over_slot():
+    async def scenario():
+        gate = _Gate("test", ClassBudget(limit=1, queue=4, timeout=5, adaptive=False))
+        await gate.acquire()
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()         # client went away...
+        gate.release()          # ...just as _admit() handed it the slot
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gate.in_flight == 0
+        await asyncio.wait_for(gate.acquire(), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_sheds():
+    async def scenario():
+        gate = _Gate("test", ClassBudget(limit=1, queue=0, timeout=5, adaptive=False))
+        await gate.acquire()
+        with pytest.raises(Shed):
+            await gate.acquire()
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+# tests/test_counts.py
+from sqlalchemy import select
+
+from app.models.inventory import InventoryMovement
+from app.models.outbox import OutboxEvent
+from app.services.catalog import catalog
+
+
+def test_approve_updates_ledger_catalog_and_outbox(client, db, make_item, make_user, make_count, auth_headers):
+    manager = make_user()
+    headers = auth_headers(manager)
+    item = make_item(par_level=5, current_qty=10)
+    count = make_count(item, manager, count=3)
+    assert client.get(f"/items/{item.id}", headers=headers).json()["current_qty"] == 10   # catalog loaded
+
+    r = client.post(f"/counts/{count.id}/approve", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["approved_count"] == 3
+
+    movement = db.scalars(select(InventoryMovement).where(InventoryMovement.count_id == count.id)).one()
+    assert (movement.kind, movement.is_reset, movement.quantity) == ("count", True, 3)
+    db.refresh(item)
+    assert item.current_qty == 3
+    assert catalog.get(db, item.location_id, item.id).current_qty == 3
+    assert client.get(f"/items/{item.id}", headers=headers).json()["current_qty"] == 3
+
+    events = db.scalars(select(OutboxEvent).where(OutboxEvent.location_id == item.location_id)
+                        .order_by(OutboxEvent.id)).all()
+    assert [e.topic for e in events] == ["count.approved", "item.below_par"]
+    assert events[0].payload["count_id"] == count.id
+    assert events[1].payload["qty_before"] == 10 and events[1].payload["deficit"] == 2
+
+
+def test_approve_twice_conflicts(client, make_item, make_user, make_count, auth_headers):
+    manager = make_user()
+    count = make_count(make_item(), manager, count=1)
+    assert client.post(f"/counts/{count.id}/approve", headers=auth_headers(manager)).status_code == 200
+    assert client.post(f"/counts/{count.id}/approve", headers=auth_headers(manager)).status_code == 409
+
+
+def test_review_of_a_reviewed_count_conflicts(client, make_item, make_user, make_count, auth_headers):
+    headers = auth_headers()
+    approved = make_count(make_item(), make_user(), count=1)
+    rejected = make_count(make_item(), make_user(), count=1)
+    assert client.post(f"/counts/{approved.id}/approve", headers=headers).status_code == 200
+    assert client.post(f"/counts/{approved.id}/reject", headers=headers).status_code == 409
+    assert client.post(f"/counts/{rejected.id}/reject", headers=headers).status_code == 200
+    assert client.post(f"/counts/{rejected.id}/approve", headers=headers).status_code == 409
+
+
+def test_count_sheet_streams_one_json_document(client, make_location, make_user, make_item, make_count,
+                                               auth_headers):
+    from datetime import datetime, timedelta, timezone
+
+    from app.schemas.counts import CountSheet
+
+    loc = make_location()
+    user = make_user(location_id=loc.id)
+    counted = make_item(location_id=loc.id, name="Sheet b counted", par_level=4, current_qty=7)
+    waiting = make_item(location_id=loc.id, name="Sheet a waiting")
+    make_item(location_id=loc.id, name="Sheet c inactive", is_active=False)
+    now = datetime.now(timezone.utc)
+    make_count(counted, user, count=9, status="approved", approved_count=9, approved_at=now - timedelta(days=2))
+    make_count(counted, user, count=7, status="approved", approved_count=7, approved_at=now - timedelta(days=1))
+    pending = make_count(waiting, user, count=1)
+
+    r = client.get("/counts/sheet", headers=auth_headers(user))
+    assert r.status_code == 200 and r.headers["content-type"] == "application/json"
+    sheet = CountSheet.model_validate_json(r.content)
+    assert sheet.location_id == loc.id
+    assert [line.name for line in sheet.items] == ["Sheet a waiting", "Sheet b counted"]
+    a, b = sheet.items
+    assert (a.pending_count_id, a.last_count, a.last_counted_at) == (pending.id, None, None)
+    assert (b.current_qty, b.par_level, b.last_count, b.pending_count_id) == (7, 4, 7, None)
+    assert b.last_counted_at == now - timedelta(days=1)
+
+    empty = make_user(location_id=make_location().id)
+    r = client.get("/counts/sheet", headers=auth_headers(empty))
+    assert r.status_code == 200
+    assert r.json()["items"] == [] and r.json()["location_id"] == empty.location_id
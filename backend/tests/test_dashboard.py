@@ -0,0 +1,27 @@
+# tests/test_dashboard.py
+
+
+def test_low_stock_pages_active_below_par_items_with_total(client, make_location, make_user, make_item,
+                                                           auth_headers):
+    loc = make_location()
+    headers = auth_headers(make_user(location_id=loc.id))
+    make_item(location_id=loc.id, name="Low b", par_level=10, current_qty=8)       # deficit 2
+    make_item(location_id=loc.id, name="Low a", par_level=10, current_qty=1)       # deficit 9
+    make_item(location_id=loc.id, name="Low c", par_level=5, current_qty=0)        # deficit 5
+    make_item(location_id=loc.id, name="Stocked", par_level=5, current_qty=5)
+    make_item(location_id=loc.id, name="Retired", par_level=5, current_qty=0, is_active=False)
+
+    r = client.get("/dash/low-stock", headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [i["name"] for i in body["items"]] == ["Low a", "Low b", "Low c"]
+    assert (body["total"], body["limit"], body["offset"]) == (3, 50, 0)
+    assert all(i["is_below_par"] for i in body["items"])
+
+    r = client.get("/dash/low-stock", params={"sort": "deficit", "limit": 2, "offset": 1}, headers=headers)
+    assert [i["name"] for i in r.json()["items"]] == ["Low c", "Low b"]
+    assert r.json()["total"] == 3
+
+    empty = auth_headers(make_user(location_id=make_location().id))
+    assert client.get("/dash/low-stock", headers=empty).json() == {"items": [], "total": 0, "limit": 50,
+                                                                    "offset": 0}
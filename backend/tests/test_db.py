@@ -0,0 +1,43 @@
+# tests/test_db.py
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.db import _sqlite_datetime, dialect_name, engine
+from app.models.items import Item
+
+sqlite_only = pytest.mark.skipif(dialect_name(engine) != "sqlite", reason="SQLite engine setup")
+
+
+@sqlite_only
+def test_datetime_parameters_are_converted_by_the_engine_only(db_connection):
+    assert sqlite3.adapters.get((datetime, sqlite3.PrepareProtocol)) is not _sqlite_datetime
+    ts = datetime(2026, 1, 2, 3, 4, 5, 6000, tzinfo=timezone(timedelta(hours=2)))
+    assert db_connection.execute(text("SELECT :ts"), {"ts": ts}).scalar() == "2026-01-02 01:04:05.006000"
+
+
+def test_other_connections_do_not_see_uncommitted_rows(make_item):
+    item = make_item(name="Uncommitted isolation item")
+    with engine.connect() as other:
+        try:
+            seen = other.execute(select(Item.id).where(Item.id == item.id)).all()
+        except OperationalError as e:     # in-memory shared cache: the table is write-locked
+            assert "locked" in str(e)
+        else:
+            assert seen == []
+
+
+def test_compiled_cache_stats_reads_hits_from_the_counter(monkeypatch):
+    from app.core import db as core_db
+    from app.core.metrics import sql_compiled_cache
+
+    stats = core_db.compiled_cache_stats()
+    assert stats["hits"] == int(sql_compiled_cache.value("cache_hit"))
+    assert stats["misses"] == int(sql_compiled_cache.value("cache_miss"))
+    assert isinstance(stats["size"], int)
+
+    monkeypatch.setattr(core_db, "engine", object())       # no private LRU to read
+    assert core_db.compiled_cache_stats()["size"] is None
@@ -0,0 +1,68 @@
+# tests/test_forecast.py
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import forecast
+from app.services.forecast import ForecastCache, build_forecast, compute_usage, suggest_par
+
+
+def test_compute_usage_counts_drops_and_ignores_deliveries():
+    # item 0: 10 -> 6 over 2 days, +2 delivery over 1 day, 8 -> 2 over 2 days; item 1: one count
+    idx = np.array([0, 0, 0, 0, 1])
+    t = np.array([0.0, 2.0, 3.0, 5.0, 1.0])
+    qty = np.array([10.0, 6.0, 8.0, 2.0, 4.0])
+    usage = compute_usage(idx, t, qty, 3)
+
+    assert usage["rate"].tolist() == [2.0, 0.0, 0.0]
+    assert usage["samples"].tolist() == [4, 1, 0]
+    assert usage["span_days"].tolist() == [5.0, 0.0, 0.0]
+    # interval rates 2, 0, 3 weighted by 2, 1, 2 days around the mean of 2
+    assert usage["sd"][0] == pytest.approx(math.sqrt(6 / 5))
+
+
+def test_suggest_par_covers_usage_plus_safety_stock():
+    par = suggest_par(np.array([2.0, 0.0, 2.0]), np.array([0.0, 0.0, 1.0]), cover_days=7, z=1.65)
+    assert par.tolist() == [14, 0, math.ceil(14 + 1.65 * math.sqrt(7))]
+
+
+def test_build_forecast_from_approved_counts(db, make_location, make_item, make_user, make_count):
+    loc = make_location()
+    user = make_user(location_id=loc.id)
+    item = make_item(location_id=loc.id, par_level=3, current_qty=6)
+    idle = make_item(location_id=loc.id, current_qty=1)
+    now = datetime.now(timezone.utc)
+    for days_ago, qty in ((4, 10), (2, 6)):
+        make_count(item, user, count=qty, status="approved", approved_count=qty,
+                   approved_at=now - timedelta(days=days_ago))
+
+    rows = {r.item_id: r for r in build_forecast(db, loc.id).rows}
+    assert rows[item.id].daily_usage == pytest.approx(2.0)
+    assert rows[item.id].days_until_stockout == pytest.approx(3.0)
+    assert rows[item.id].samples == 2
+    assert rows[item.id].suggested_par_level == math.ceil(rows[item.id].daily_usage * settings.forecast_cover_days)
+    assert rows[idle.id].days_until_stockout is None
+    assert rows[idle.id].suggested_par_level is None
+
+
+def test_cache_drops_a_snapshot_built_across_an_invalidation(db, monkeypatch):
+    cache = ForecastCache()
+    builds = []
+
+    def build(db, location_id):
+        builds.append(location_id)
+        if len(builds) == 1:
+            cache.invalidate(location_id)       # a write lands mid-build
+        return forecast.ForecastSnapshot(datetime.now(timezone.utc), 1, [])
+
+    monkeypatch.setattr(forecast, "build_forecast", build)
+    first = cache.get(db, 1)
+    assert cache.get(db, 1) is not first        # not cached: rebuilt
+    assert cache.get(db, 1) is cache.get(db, 1)
+    cache.get(db, 2)
+    cache.invalidate()
+    cache.get(db, 2)
+    assert builds == [1, 1, 2, 2]
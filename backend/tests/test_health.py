@@ -0,0 +1,73 @@
+# tests/test_health.py
+import dataclasses
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core import health
+from app.core.config import settings
+from app.core.health import HealthProbe, health_probe
+
+
+@pytest.fixture
+def probe(db_connection, monkeypatch):
+    """A probe against the test database with a fake app pool at `probe.pool` saturation."""
+    p = HealthProbe(interval=5, timeout=1)
+    p.pool = 0.0
+    monkeypatch.setattr(health, "pool_stats", lambda: {"size": 4, "max_overflow": 0,
+                                                       "checked_out": int(p.pool * 4), "saturation": p.pool})
+    yield p
+    if p._engine is not None:
+        p._engine.dispose()
+
+
+def _saturation_check(monkeypatch, limit: float, sustained: float = 10) -> None:
+    monkeypatch.setattr(health, "settings", dataclasses.replace(
+        settings, readyz_max_pool_saturation=limit, readyz_pool_saturated_sec=sustained))
+
+
+def test_livez(client):
+    r = client.get("/livez")
+    assert (r.status_code, r.json()) == (200, {"ok": True})
+
+
+def test_readyz_serves_the_cached_probe_state(client, probe, monkeypatch):
+    monkeypatch.setattr(health_probe, "state", None)
+    r = client.get("/readyz")
+    assert (r.status_code, r.json()["reasons"]) == (503, ["starting"])
+
+    monkeypatch.setattr(health_probe, "state", probe.check())
+    r = client.get("/readyz")
+    assert r.status_code == 200, r.json()
+    assert r.json()["probe"]["db"] == "ok"
+
+
+def test_unreachable_db_and_stale_probe_are_not_ready(probe):
+    down = HealthProbe(url="postgresql+psycopg://nobody@127.0.0.1:1/none", interval=5, timeout=1)
+    down.state = down.check()
+    assert down.readiness()["reasons"] == ["db unreachable"]
+
+    probe.state = {**probe.check(), "checked_at": (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()}
+    assert probe.readiness()["reasons"][0].startswith("probe stale")
+
+
+def test_pool_saturation_is_ignored_by_default(probe):
+    assert settings.readyz_max_pool_saturation == 0
+    probe.pool = 1.0
+    probe.state = probe.check()
+    assert probe.readiness()["ready"] is True
+
+
+def test_only_sustained_pool_saturation_fails_readiness(probe, monkeypatch):
+    _saturation_check(monkeypatch, limit=0.75, sustained=10)
+    probe.pool = 1.0
+    probe.state = probe.check()
+    assert probe.readiness()["ready"] is True                  # a burst
+
+    probe._saturated_since -= 11
+    probe.state = probe.check()                                # still saturated
+    assert probe.readiness()["reasons"] == ["db pool saturated (11s)"]
+
+    probe.pool = 0.5
+    probe.state = probe.check()
+    assert probe.readiness()["ready"] is True
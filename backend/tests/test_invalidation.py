@@ -0,0 +1,47 @@
+# tests/test_invalidation.py
+from sqlalchemy.orm import sessionmaker
+
+from app.core.invalidation import InvalidationBus, InvalidationEvent, MemoryBackend, MemoryHub
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.events = []
+
+    def handle_invalidation(self, event: InvalidationEvent) -> None:
+        self.events.append(event)
+
+
+def test_forecast_sees_par_edit_in_the_writing_process(client, make_location, make_user, make_item,
+                                                       auth_headers):
+    loc = make_location()
+    headers = auth_headers(make_user(location_id=loc.id))
+    item = make_item(location_id=loc.id, par_level=4, current_qty=10)
+
+    r = client.get("/dash/forecast", headers=headers)
+    assert [i["par_level"] for i in r.json()["items"]] == [4]
+
+    assert client.put(f"/items/{item.id}", json={"par_level": 9}, headers=headers).status_code == 200
+    r = client.get("/dash/forecast", headers=headers)
+    assert [i["par_level"] for i in r.json()["items"]] == [9]
+
+
+def test_local_events_skip_write_through_subscribers(db_connection):
+    hub = MemoryHub()
+    writer, other = InvalidationBus(MemoryBackend(hub)), InvalidationBus(MemoryBackend(hub))
+    derived, write_through, remote = _Recorder(), _Recorder(), _Recorder()
+    writer.subscribe(["items"], derived)
+    writer.subscribe(["items"], write_through, write_through=True)
+    other.subscribe(["items"], remote, write_through=True)
+    factory = sessionmaker(bind=db_connection, join_transaction_mode="create_savepoint")
+    writer.install(factory)
+
+    with factory() as db:
+        writer.publish(db, "items", 1, 7)
+        db.commit()
+        writer.publish(db, "items", 2)
+        db.rollback()
+
+    assert derived.events == [InvalidationEvent("items", 1, 7)]
+    assert write_through.events == []
+    assert remote.events == [InvalidationEvent("items", 1, 7)]
@@ -0,0 +1,67 @@
+# tests/test_item_csv.py
+from sqlalchemy import select
+
+from app.models.items import Item
+from app.models.outbox import OutboxEvent
+
+
+def _import(client, headers, body: str, **params):
+    return client.post("/items/import", content=body, params=params,
+                       headers={**headers, "Content-Type": "text/csv"})
+
+
+def test_import_reports_bad_rows_and_applies_the_rest(client, make_user, auth_headers):
+    headers = auth_headers(make_user(role="admin"))
+    body = (
+        "name,base_unit,par_level,is_active\n"
+        "Csv Flour,g,500,true\n"           # 2: ok
+        ",g,1,\n"                          # 3
+        "Csv Salt,kg,1,\n"                 # 4
+        "Csv Sugar,g,-1,\n"                # 5
+        "Csv Yeast,g,1,maybe\n"            # 6
+        "csv flour,g,250,\n"               # 7: wins over line 2
+    )
+    r = _import(client, headers, body)
+    assert r.status_code == 200, r.text
+    report = r.json()
+    assert (report["inserted"], report["updated"], report["skipped"]) == (1, 0, 5)
+    assert [(e["line"], e["error"]) for e in report["errors"]] == [
+        (2, "duplicate name in file; line 7 wins"),
+        (3, "name is required"),
+        (4, "base_unit must be one of g, ml, pcs"),
+        (5, "par_level must be a non-negative integer"),
+        (6, "is_active must be true/false"),
+    ]
+    items = client.get("/items", params={"q": "csv "}, headers=headers).json()["items"]
+    assert [(i["name"], i["par_level"]) for i in items] == [("csv flour", 250)]
+
+
+def test_import_rejects_missing_columns_and_dry_run_writes_nothing(client, make_user, auth_headers):
+    headers = auth_headers(make_user(role="admin"))
+    r = _import(client, headers, "name,par_level\nCsv Oats,1\n")
+    assert r.status_code == 400
+    assert "base_unit" in r.json()["detail"]
+    r = _import(client, headers, "name,base_unit\nCsv Oats,g\n", dry_run="true")
+    assert r.json()["inserted"] == 0 and r.json()["dry_run"]
+    assert client.get("/items", params={"q": "csv oats"}, headers=headers).json()["total"] == 0
+
+
+def test_import_keeps_is_active_unless_given(client, db, make_item, make_user, auth_headers):
+    headers = auth_headers(make_user(role="admin"))
+    kept = make_item(name="Csv Retired", is_active=False)
+    changed = make_item(name="Csv Live")
+    r = _import(client, headers, "name,base_unit,is_active\nCsv Retired,pcs,\nCsv Live,pcs,false\n")
+    assert r.json()["updated"] == 2
+    db.expire_all()
+    assert (db.get(Item, kept.id).is_active, db.get(Item, changed.id).is_active) == (False, False)
+
+
+def test_import_par_raise_emits_below_par(client, db, make_item, make_user, auth_headers):
+    headers = auth_headers(make_user(role="admin"))
+    item = make_item(name="Csv Beans", par_level=2, current_qty=5)
+    make_item(name="Csv Rice", par_level=0, current_qty=5)
+    r = _import(client, headers, "name,base_unit,par_level\ncsv beans,pcs,8\nCsv Rice,pcs,3\n")
+    assert r.json()["updated"] == 2
+    events = db.scalars(select(OutboxEvent).where(OutboxEvent.location_id == item.location_id)).all()
+    assert [(e.topic, e.payload["item_id"], e.payload["par_before"]) for e in events] == [
+        ("item.below_par", item.id, 2)]
@@ -0,0 +1,85 @@
+# tests/test_items.py
+from datetime import datetime, timedelta, timezone
+
+from app.services.inventory import record_delta, take_snapshots
+
+
+def test_create_rejects_case_insensitive_duplicate_name(client, auth_headers):
+    headers = auth_headers()
+    r = client.post("/items", json={"name": "Basil Test", "base_unit": "g"}, headers=headers)
+    assert r.status_code == 201, r.text
+    r = client.post("/items", json={"name": "  basil TEST ", "base_unit": "pcs"}, headers=headers)
+    assert r.status_code == 409
+
+
+def test_hard_delete_removes_opening_balance_and_snapshots(client, db, make_item, make_user, auth_headers):
+    item = make_item(current_qty=5)
+    take_snapshots(db, item.location_id)
+    headers = auth_headers(make_user(role="admin"))
+    assert client.delete(f"/items/{item.id}/hard", headers=headers).status_code == 204
+    assert client.get(f"/items/{item.id}", headers=headers).status_code == 404
+
+
+def test_hard_delete_conflicts_on_movements_and_counts(client, db, make_item, make_user, make_count,
+                                                       auth_headers):
+    admin = make_user(role="admin")
+    headers = auth_headers(admin)
+    moved = make_item(current_qty=5)
+    record_delta(db, moved.location_id, moved.id, "waste", -1)
+    counted = make_item()
+    make_count(counted, admin, count=3)
+    assert client.delete(f"/items/{moved.id}/hard", headers=headers).status_code == 409
+    assert client.delete(f"/items/{counted.id}/hard", headers=headers).status_code == 409
+    assert client.delete(f"/items/{make_item().id}/hard", headers=auth_headers()).status_code == 403
+
+
+def test_history_pages_newest_first_with_variance(client, make_item, make_user, make_count, auth_headers):
+    user = make_user()
+    item = make_item()
+    t0 = datetime.now(timezone.utc) - timedelta(days=1)
+    counts = [
+        make_count(item, user, count=10 + n, submitted_at=t0 + timedelta(minutes=n),
+                   status="approved", approved_by=user.id, approved_count=10 + n,
+                   approved_at=t0 + timedelta(minutes=n, seconds=30))
+        for n in range(5)
+    ]
+    headers = auth_headers(user)
+
+    seen, cursor = [], None
+    while True:
+        r = client.get(f"/items/{item.id}/history", params={"limit": 2, "cursor": cursor}, headers=headers)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page["items"]) <= 2
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [e["id"] for e in seen] == [c.id for c in reversed(counts)]
+    assert [e["variance"] for e in seen] == [1, 1, 1, 1, None]
+
+    r = client.get(f"/items/{item.id}/history", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert r.status_code == 422
+
+
+def test_batch_get_keeps_order_dedupes_and_reports_misses(client, make_location, make_item, auth_headers):
+    from app.schemas.items import ITEM_BATCH_MAX
+
+    headers = auth_headers()
+    first, second = make_item(), make_item()
+    elsewhere = make_item(location_id=make_location().id)
+    ids = [second.id, first.id, second.id, elsewhere.id, 999999999]
+
+    for r in (client.post("/items/batch-get", json={"ids": ids}, headers=headers),
+              client.get("/items", params={"ids": ",".join(map(str, ids))}, headers=headers)):
+        assert r.status_code == 200, r.text
+        assert [i["id"] for i in r.json()["items"]] == [second.id, first.id]
+        assert r.json()["missing"] == [elsewhere.id, 999999999]
+
+    too_many = list(range(1, ITEM_BATCH_MAX + 2))
+    assert client.post("/items/batch-get", json={"ids": too_many[:-1]}, headers=headers).status_code == 200
+    assert client.post("/items/batch-get", json={"ids": too_many}, headers=headers).status_code == 422
+    assert client.post("/items/batch-get", json={"ids": []}, headers=headers).status_code == 422
+    assert client.get("/items", params={"ids": ",".join(map(str, too_many))}, headers=headers).status_code == 422
+    assert client.get("/items", params={"ids": "1,x"}, headers=headers).status_code == 422
+    assert client.get("/items", params={"ids": ""}, headers=headers).status_code == 422
@@ -0,0 +1,142 @@
+# tests/test_jobs.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.models.jobs import Job
+from app.models.locations import DEFAULT_LOCATION_ID
+from app.services.jobs import RETRY_BACKOFF_BASE_SEC, JobRunner, enqueue, job_kind
+
+_PAST = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+@job_kind("test.ok", max_attempts=2)
+def _ok(ctx, db):
+    return {"echo": ctx.params.get("echo")}
+
+
+@job_kind("test.fail", max_attempts=2)
+def _fail(ctx, db):
+    raise RuntimeError("boom")
+
+
+def _queue(db, kind: str, **params) -> Job:
+    job = enqueue(db, DEFAULT_LOCATION_ID, kind, params)
+    job.run_after = _PAST          # Postgres tests: now() is the outer transaction's start
+    db.commit()
+    return job
+
+
+def _runner(worker: str) -> JobRunner:
+    runner = JobRunner(workers=1, stale_sec=30)
+    runner.worker_id = worker
+    return runner
+
+
+def _claim(runner: JobRunner, job: Job):
+    claimed = runner._claim()
+    assert claimed is not None and claimed.id == job.id
+    return claimed
+
+
+def _make_stale(db, job: Job) -> None:
+    db.execute(update(Job).where(Job.id == job.id).values(heartbeat_at=_PAST))
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def _park_queued_jobs(db):
+    # The dev database may hold queued jobs; keep them out of these claims
+    db.execute(update(Job).where(Job.status.in_(["queued", "running"])).values(status="failed"))
+    db.commit()
+
+
+def test_claim_runs_and_settles_a_job(db):
+    job = _queue(db, "test.ok", echo="hi")
+    runner = _runner("a")
+    claimed = _claim(runner, job)
+    assert runner._claim() is None                 # one claim per job
+    runner._run_job(claimed)
+
+    db.refresh(job)
+    assert (job.status, job.attempts, job.progress, job.result) == ("succeeded", 1, 1.0, {"echo": "hi"})
+
+
+def test_failure_retries_with_backoff_then_fails(db):
+    job = _queue(db, "test.fail")
+    runner = _runner("a")
+    runner._run_job(_claim(runner, job))
+
+    db.refresh(job)
+    assert (job.status, job.attempts, job.worker) == ("queued", 1, None)
+    assert "boom" in job.error
+    assert job.run_after >= job.started_at + timedelta(seconds=RETRY_BACKOFF_BASE_SEC)
+    assert runner._claim() is None                 # backing off
+
+    job.run_after = _PAST
+    db.commit()
+    runner._run_job(_claim(runner, job))
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.finished_at is not None
+
+
+def test_sweep_requeues_a_stale_job_and_the_lost_worker_cannot_settle_it(db):
+    job = _queue(db, "test.ok")
+    lost, other = _runner("lost"), _runner("other")
+    stale_claim = _claim(lost, job)
+    _make_stale(db, job)
+    other._sweep()
+    db.refresh(job)
+    assert (job.status, job.worker, job.error) == ("queued", None, "worker lost (no heartbeat)")
+
+    job.run_after = _PAST
+    db.commit()
+    claimed = _claim(other, job)
+    lost._run_job(stale_claim)                     # finishes late: must not touch the new claim
+    lost._record_failure(stale_claim, RuntimeError("late"))
+    db.refresh(job)
+    assert (job.status, job.worker, job.attempts) == ("running", "other", 2)
+
+    other._run_job(claimed)
+    db.refresh(job)
+    assert job.status == "succeeded"
+
+
+def test_sweep_fails_a_stale_job_out_of_attempts(db):
+    job = _queue(db, "test.ok")
+    db.execute(update(Job).where(Job.id == job.id).values(max_attempts=1))
+    db.commit()
+    runner = _runner("a")
+    _claim(runner, job)
+    _make_stale(db, job)
+    runner._sweep()
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.finished_at is not None
+
+
+def test_jobs_api(client, db, make_location, make_user, auth_headers):
+    manager = make_user()
+    headers = auth_headers(manager)
+    r = client.post("/jobs", json={"kind": "inventory.snapshots"}, headers=headers)
+    assert r.status_code == 202, r.text
+    job_id = r.json()["id"]
+    assert r.headers["Location"] == f"/jobs/{job_id}"
+    assert r.json()["status"] == "queued"
+
+    assert client.get(f"/jobs/{job_id}/output", headers=headers).status_code == 409
+    assert client.post("/jobs", json={"kind": "nope"}, headers=headers).status_code == 400
+    assert client.post("/jobs", json={"kind": "items.export"}, headers=headers).status_code == 403
+    elsewhere = auth_headers(make_user(location_id=make_location().id))
+    assert client.get(f"/jobs/{job_id}", headers=elsewhere).status_code == 404
+
+    db.execute(update(Job).where(Job.id == job_id).values(run_after=_PAST))
+    db.commit()
+    runner = _runner("a")
+    runner._run_job(runner._claim())
+    r = client.get(f"/jobs/{job_id}", headers=headers)
+    assert r.json()["status"] == "succeeded", r.json()
+    assert r.json()["has_output"] is False
+    assert client.get(f"/jobs/{job_id}/output", headers=headers).status_code == 404
@@ -0,0 +1,68 @@
+# tests/test_metrics.py
+import re
+
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, Registry
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def test_requests_are_labelled_with_the_route_template(client, make_item, auth_headers):
+    headers = auth_headers()
+    item = make_item()
+    before = metrics.http_requests.value("/items/{item_id}", "GET", "200")
+    unmatched = metrics.http_requests.value(metrics.UNMATCHED_ROUTE, "GET", "404")
+    statements = metrics.db_statements.value("/items/{item_id}", "GET")
+
+    assert client.get(f"/items/{item.id}", headers=headers).status_code == 200
+    assert client.get("/no/such/path").status_code == 404
+    assert client.request("BREW", "/items").status_code == 405
+
+    assert metrics.http_requests.value("/items/{item_id}", "GET", "200") == before + 1
+    assert metrics.http_requests.value(metrics.UNMATCHED_ROUTE, "GET", "404") == unmatched + 1
+    assert metrics.db_statements.value("/items/{item_id}", "GET") > statements
+    assert all(labels[1] in metrics.KNOWN_METHODS | {"OTHER"} for labels in metrics.http_requests._values)
+    assert not any(str(item.id) in labels[0] for labels in metrics.http_requests._values)
+
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    client.get("/livez")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == metrics.CONTENT_TYPE
+    lines = r.text.rstrip("\n").split("\n")
+    declared = set()
+    for line in lines:
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            declared.add(line.split()[2])
+            continue
+        m = _SAMPLE.match(line)
+        assert m, line
+        assert re.sub(r"_(bucket|sum|count)$", "", m.group(1)) in declared or m.group(1) in declared, line
+        float(m.group(3))
+    assert '# TYPE pantrypal_http_requests_total counter' in lines
+    assert any(line.startswith('pantrypal_http_requests_total{route="/livez",method="GET",status="200"} ')
+               for line in lines)
+
+
+def test_render_escapes_labels_and_accumulates_buckets():
+    registry = Registry()
+    c = registry.register(Counter("t_total", "Test counter.", ("name",)))
+    h = registry.register(Histogram("t_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0)))
+    c.inc('say "hi"\nback\\slash')
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.observe("/x", value=v)
+
+    assert registry.render().split("\n") == [
+        "# HELP t_total Test counter.",
+        "# TYPE t_total counter",
+        't_total{name="say \\"hi\\"\\nback\\\\slash"} 1',
+        "# HELP t_seconds Test histogram.",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/x",le="0.1"} 1',
+        't_seconds_bucket{route="/x",le="1.0"} 3',
+        't_seconds_bucket{route="/x",le="+Inf"} 4',
+        't_seconds_sum{route="/x"} 4.05',
+        't_seconds_count{route="/x"} 4',
+        "",
+    ]
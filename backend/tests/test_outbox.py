@@ -0,0 +1,113 @@
+# tests/test_outbox.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models.locations import DEFAULT_LOCATION_ID
+from app.models.outbox import OutboxEvent
+from app.services import outbox
+from app.services.outbox import BACKOFF_BASE_SEC, LEASE_SEC, OutboxDispatcher
+
+
+class _Sink:
+    name = "test"
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.batches = []
+
+    def send(self, batch) -> None:
+        self.batches.append([m.id for m in batch])
+        if self.fail:
+            raise RuntimeError("receiver down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """outbox._utcnow() pinned to a time the test moves forward."""
+    class _Clock:
+        now = datetime.now(timezone.utc)
+
+        def advance(self, seconds: float) -> None:
+            self.now += timedelta(seconds=seconds)
+
+    c = _Clock()
+    monkeypatch.setattr(outbox, "_utcnow", lambda: c.now)
+    return c
+
+
+def _emit(db, n: int):
+    for i in range(n):
+        outbox.emit(db, DEFAULT_LOCATION_ID, "test.event", {"n": i})
+    db.commit()
+    return db.scalars(select(OutboxEvent.id).order_by(OutboxEvent.id.desc()).limit(n)).all()[::-1]
+
+
+def _rows(db, ids):
+    db.expire_all()
+    return db.scalars(select(OutboxEvent).where(OutboxEvent.id.in_(ids)).order_by(OutboxEvent.id)).all()
+
+
+def test_claims_batches_in_id_order_and_marks_delivered(db, clock):
+    ids = _emit(db, 3)
+    sink = _Sink()
+    d = OutboxDispatcher(sink, batch_size=2)
+    clock.advance(1)
+
+    assert d.dispatch_once() == 2
+    assert d.dispatch_once() == 1
+    assert d.dispatch_once() == 0
+    assert sink.batches == [ids[:2], ids[2:]]
+    rows = _rows(db, ids)
+    assert {r.status for r in rows} == {"delivered"}
+    assert [r.attempts for r in rows] == [1, 1, 1]
+
+
+def test_lease_expiry_makes_a_claimed_batch_deliverable_again(db, clock):
+    ids = _emit(db, 1)
+    sink = _Sink()
+    d = OutboxDispatcher(sink)
+    clock.advance(1)
+
+    assert [m.id for m in d._claim()] == ids    # the dispatcher dies before settling
+    assert d.dispatch_once() == 0               # leased
+    clock.advance(LEASE_SEC)
+    assert d.dispatch_once() == 1
+    assert sink.batches == [ids]
+    assert _rows(db, ids)[0].attempts == 2
+
+
+def test_failed_batch_backs_off_exponentially(db, clock):
+    ids = _emit(db, 1)
+    sink = _Sink(fail=True)
+    d = OutboxDispatcher(sink, max_attempts=5)
+    clock.advance(1)
+
+    assert d.dispatch_once() == 0
+    row = _rows(db, ids)[0]
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert "receiver down" in row.last_error
+    assert row.available_at == clock.now + timedelta(seconds=BACKOFF_BASE_SEC)
+
+    clock.advance(BACKOFF_BASE_SEC - 0.5)
+    d.dispatch_once()
+    assert len(sink.batches) == 1               # still backing off
+    clock.advance(0.5)
+    d.dispatch_once()
+    row = _rows(db, ids)[0]
+    assert row.attempts == 2
+    assert row.available_at == clock.now + timedelta(seconds=BACKOFF_BASE_SEC * 2)
+
+
+def test_event_is_dead_after_max_attempts(db, clock):
+    ids = _emit(db, 1)
+    sink = _Sink(fail=True)
+    d = OutboxDispatcher(sink, max_attempts=2)
+    for _ in range(3):
+        clock.advance(LEASE_SEC)
+        d.dispatch_once()
+
+    assert len(sink.batches) == 2
+    row = _rows(db, ids)[0]
+    assert (row.status, row.attempts) == ("dead", 2)
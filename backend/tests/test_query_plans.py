@@ -0,0 +1,59 @@
+# tests/test_query_plans.py
+"""
+bench.plan_check as a test: EXPLAIN every statement the items/counts/dash
+scenarios issue. Postgres only, with the seed users; see bench/plan_check.py
+for the database the baseline was taken on.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.core.db import dialect_name, engine
+from bench import plan_check
+
+pytestmark = pytest.mark.skipif(dialect_name(engine) != "postgresql",
+                                reason="needs TEST_DATABASE_URL on Postgres")
+
+TABLES = ["counts", "items"]
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return plan_check.load_baseline()
+
+
+@pytest.fixture(scope="module")
+def table_rows(db_engine):
+    with db_engine.connect() as conn:
+        users = conn.execute(text("SELECT count(*) FROM users WHERE email = ANY(:e)"),
+                             {"e": [email for email, _ in plan_check.USERS.values()]}).scalar_one()
+        if users < len(plan_check.USERS):
+            pytest.skip("needs the seed users (python -m app.seed_users)")
+        return dict(conn.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(:t) AND relkind = 'r'"
+        ), {"t": TABLES}).all())
+
+
+@pytest.fixture(scope="module")
+def results(table_rows, baseline):
+    from app.security.ratelimit import limiter
+
+    enabled, limiter.enabled = limiter.enabled, False
+    try:
+        return plan_check.capture(baseline["min_rows"], TABLES)
+    finally:
+        limiter.enabled = enabled
+
+
+def test_no_seq_scans_on_large_tables(results):
+    failures, _, _ = plan_check.compare(results, None)
+    assert not failures, "\n".join(failures)
+
+
+def test_plans_keep_baseline_indexes(results, baseline, table_rows):
+    if min(table_rows.values()) < baseline["min_rows"]:
+        pytest.skip(f"tables smaller than the baseline's {baseline['min_rows']} rows plan differently")
+    failures, new, _ = plan_check.compare(results, baseline["queries"], TABLES)
+    assert not failures, "\n".join(failures)
+    # Statements that read no table (pg_notify from the postgres invalidation backend) don't need one
+    new = [key for key in new if results[key]["scans"]]
+    assert not new, f"statements without a baseline (python -m bench.plan_check --update): {new}"
@@ -0,0 +1,18 @@
+# tests/test_ratelimit.py
+from app.security.ratelimit import Limit, limiter
+from app.testing import TEST_PASSWORD
+
+
+def test_login_email_limit_returns_429(client, make_user, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", True)
+    monkeypatch.setitem(limiter.rules, "login_email", Limit(burst=2, per_sec=2 / 60))
+    user = make_user()
+
+    assert client.post("/auth/login", json={"email": user.email, "password": "wrong"}).status_code == 401
+    assert client.post("/auth/login", json={"email": user.email, "password": TEST_PASSWORD}).status_code == 200
+    r = client.post("/auth/login", json={"email": user.email.upper(), "password": TEST_PASSWORD})
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+    # Other emails have their own bucket
+    other = make_user()
+    assert client.post("/auth/login", json={"email": other.email, "password": TEST_PASSWORD}).status_code == 200
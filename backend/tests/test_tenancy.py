@@ -0,0 +1,61 @@
+# tests/test_tenancy.py
+import pytest
+
+
+@pytest.fixture
+def two_locations(make_location, make_user, make_item, make_count):
+    """A manager, an item and a pending count at each of two new locations."""
+    sites = []
+    for _ in range(2):
+        loc = make_location()
+        manager = make_user(location_id=loc.id)
+        item = make_item(location_id=loc.id, name=f"Tenant item {loc.code}")
+        sites.append((loc, manager, item, make_count(item, manager, count=2)))
+    return sites
+
+
+def _names(r):
+    assert r.status_code == 200, r.text
+    return [i["name"] for i in r.json()["items"]]
+
+
+def test_x_location_id_resolution(client, two_locations, make_location, make_user, auth_headers):
+    (a, manager_a, item_a, _), (b, _, item_b, _) = two_locations
+    admin = make_user(role="admin", location_id=a.id)
+    headers = auth_headers(admin)
+
+    assert _names(client.get("/items", headers=headers)) == [item_a.name]
+    assert _names(client.get("/items", headers={**headers, "X-Location-Id": str(b.id)})) == [item_b.name]
+    assert _names(client.get("/items", headers={**headers, "X-Location-Id": str(a.id)})) == [item_a.name]
+    closed = make_location(is_active=False)
+    assert client.get("/items", headers={**headers, "X-Location-Id": str(closed.id)}).status_code == 404
+    assert client.get("/items", headers={**headers, "X-Location-Id": "999999"}).status_code == 404
+
+    manager_headers = auth_headers(manager_a)
+    assert client.get("/items", headers={**manager_headers, "X-Location-Id": str(b.id)}).status_code == 403
+    assert _names(client.get("/items", headers={**manager_headers, "X-Location-Id": str(a.id)})) == [item_a.name]
+
+
+def test_other_locations_items_and_counts_are_not_found(client, two_locations, auth_headers):
+    (_, manager_a, _, _), (_, _, item_b, count_b) = two_locations
+    headers = auth_headers(manager_a)
+
+    assert client.get(f"/items/{item_b.id}", headers=headers).status_code == 404
+    assert client.put(f"/items/{item_b.id}", json={"par_level": 3}, headers=headers).status_code == 404
+    assert client.get(f"/items/{item_b.id}/history", headers=headers).status_code == 404
+    assert client.post(f"/counts/{count_b.id}/approve", headers=headers).status_code == 404
+    assert client.post(f"/counts/{count_b.id}/reject", headers=headers).status_code == 404
+
+
+def test_my_submissions_is_scoped_to_the_location(client, two_locations, make_user, make_count,
+                                                  auth_headers):
+    (a, _, item_a, _), (b, _, item_b, _) = two_locations
+    admin = make_user(role="admin", location_id=a.id)
+    own = make_count(item_a, admin, count=1)
+    elsewhere = make_count(item_b, admin, count=1)
+    headers = auth_headers(admin)
+
+    r = client.get("/dash/my-submissions", headers=headers)
+    assert [c["id"] for c in r.json()] == [own.id]
+    r = client.get("/dash/my-submissions", headers={**headers, "X-Location-Id": str(b.id)})
+    assert [c["id"] for c in r.json()] == [elsewhere.id]